@@ -0,0 +1,90 @@
+"""
+Transcript loading benchmark: directory of .txt files vs packed corpus.
+
+Writes N synthetic participant_*.txt files (or uses --dir), packs them with
+src/transcript_corpus.py, and reports:
+  - directory: list + open + read every file (what a batch run does at startup)
+  - corpus: open the mmap and read every transcript / one shard of it
+  - random access by participant id (mean microseconds)
+
+Point --dir at a network mount to measure the case that matters.
+
+Usage:
+    python benchmarks/corpus_benchmark.py                  # 5000 synthetic transcripts in a temp dir
+    python benchmarks/corpus_benchmark.py --dir /mnt/exports/listen_labs --shards 8
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.transcript_corpus import TranscriptCorpus, build_corpus, iter_transcript_dir  # noqa: E402
+
+SENTENCES = [
+    "I've been really anxious lately about the wildfires.",
+    "Every time I see climate news I get a knot in my stomach.",
+    "I can't sleep because I keep thinking about flooding.",
+    "When I don't sleep, I can't focus at work.",
+    "Joining a local group made me feel less hopeless.",
+]
+
+
+def synthesize(directory: Path, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(count):
+        text = "\n".join(f"Participant: {rng.choice(SENTENCES)}" for _ in range(rng.randint(20, 200)))
+        (directory / f"participant_{i:05d}.txt").write_text(text, encoding="utf-8")
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="existing transcript directory (default: synthesize one)")
+    parser.add_argument("--count", type=int, default=5000, help="synthetic transcripts when no --dir")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(args.dir) if args.dir else Path(tmp) / "transcripts"
+        if not args.dir:
+            source.mkdir()
+            synthesize(source, args.count)
+        corpus_path = Path(tmp) / "corpus.cctc"
+
+        dir_ms, texts = timed(lambda: [data.decode("utf-8") for _, data in iter_transcript_dir(source)])
+        build_ms, built = timed(lambda: build_corpus(source, corpus_path))
+
+        open_ms, corpus = timed(lambda: TranscriptCorpus(corpus_path))
+        with corpus:
+            read_ms, _ = timed(lambda: [text for _, text in corpus.items()])
+            shard_ms, _ = timed(lambda: [text for _, text in corpus.items(corpus.shard(0, args.shards))])
+            ids = corpus.ids()
+            picks = [random.choice(ids) for _ in range(args.lookups)]
+            lookup_ms, _ = timed(lambda: [corpus[pid] for pid in picks])
+            shard_sizes = [len(corpus.shard(k, args.shards)) for k in range(args.shards)]
+
+    print(f"transcripts: {len(texts)} ({built['bytes'] / 1e6:.1f} MB packed)")
+    print(f"directory list+read all:   {dir_ms:9.1f} ms")
+    print(f"corpus build (one-off):    {build_ms:9.1f} ms")
+    print(f"corpus open:               {open_ms:9.3f} ms")
+    print(f"corpus read all:           {read_ms:9.1f} ms")
+    print(f"corpus read shard 1/{args.shards}:     {shard_ms:9.1f} ms  (shard sizes {shard_sizes}, "
+          f"stdev {statistics.pstdev(shard_sizes):.1f})")
+    print(f"random lookup by id:       {lookup_ms * 1000 / args.lookups:9.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Parse/orchestration microbenchmark over replayed provider traffic.
+
+Feeds thousands of recorded (or synthesized) responses through the hot
+parsing paths and reports, per parser:
+  - parse time (mean / p95, microseconds)
+  - allocations (tracemalloc peak bytes per call, blocks retained per call)
+  - parse-failure rate (parser returned an empty result)
+plus end-to-end orchestration time for CausalReasoningEngine on a replay client.
+
+Each run is appended to a JSONL history file so regressions show up over time.
+
+Usage:
+    python benchmarks/parse_benchmark.py                      # 2000 synthetic responses
+    python benchmarks/parse_benchmark.py --fixtures fixtures/*.jsonl
+    python benchmarks/parse_benchmark.py --synthesize 5000 --save-fixtures fixtures/synthetic.jsonl
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.causal_reasoning_engine import (  # noqa: E402
+    CausalReasoningEngine, parse_pairs_response, parse_chains_response,
+    parse_confidence_response, parse_interventions_response
+)
+from src.claude_persistent_protocol import parse_memory_updates  # noqa: E402
+from src.letta_trauma_agent import parse_session_response  # noqa: E402
+from src.replay import ReplayClient, request_key  # noqa: E402
+
+DEFAULT_HISTORY = REPO_ROOT / "benchmarks" / "parse_history.jsonl"
+
+# Prompt markers -> parser name (same markers the engine/agents put in prompts)
+STEP_MARKERS = [
+    ("extract ALL cause-effect pairs", "pairs"),
+    ("generate complete implicit causal chains", "chains"),
+    ("evaluate confidence in the causal connection", "confidence"),
+    ("identify high-ROI intervention points", "interventions"),
+    ("memory_updates", "memory_updates"),
+    ("We're starting Session #", "letta_session"),
+]
+
+
+def _text(response) -> str:
+    text = ""
+    for block in response.content:
+        if block.get("type", "text") == "text":
+            text = block.text
+    return text
+
+
+PARSERS = {
+    "pairs": lambda r: parse_pairs_response(_text(r))["pairs"],
+    "chains": lambda r: parse_chains_response(_text(r)),
+    "confidence": lambda r: parse_confidence_response(_text(r)),
+    "interventions": lambda r: parse_interventions_response(_text(r)),
+    "memory_updates": lambda r: parse_memory_updates(_text(r)),
+    "letta_session": lambda r: parse_session_response(1, r),
+}
+
+
+def classify(record: dict):
+    if record.get("step"):
+        return record["step"]
+    request = json.dumps(record.get("request", {}), ensure_ascii=False)
+    for marker, step in STEP_MARKERS:
+        if marker in request:
+            return step
+    return None
+
+
+# ============ SYNTHETIC TRAFFIC ============
+
+PHRASES = ["climate news", "anxiety", "insomnia", "poor focus at work", "irritability",
+           "doomscrolling", "guilt about flying", "wildfire smoke", "hopelessness", "social withdrawal"]
+
+
+def _wrap(rng, payload: str) -> str:
+    """Give a clean payload one of the shapes models actually produce."""
+    roll = rng.random()
+    if roll < 0.55:
+        return payload
+    if roll < 0.80:
+        return f"Here is the analysis you asked for:\n```json\n{payload}\n```\nLet me know if you need more."
+    if roll < 0.92:
+        return payload[: int(len(payload) * rng.uniform(0.5, 0.95))]  # truncated at max_tokens
+    return payload.replace('"', "'", 3)  # malformed quoting
+
+
+def _record(step: str, text: str, latency: float, endpoint="messages.create", response=None) -> dict:
+    request = {"messages": [{"role": "user", "content": f"synthetic {step}"}]}
+    return {
+        "endpoint": endpoint,
+        "key": request_key(endpoint, request),
+        "step": step,
+        "request": request,
+        "response": response or {"content": [{"type": "text", "text": text}], "stop_reason": "end_turn"},
+        "latency_s": latency,
+    }
+
+
+def synthesize(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    records = []
+    steps = list(PARSERS)
+    for i in range(n):
+        step = steps[i % len(steps)]
+        k = rng.randint(3, 12)
+        chain = [rng.choice(PHRASES) for _ in range(rng.randint(2, 5))]
+        latency = rng.lognormvariate(0, 0.5)
+        if step == "pairs":
+            payload = json.dumps({"pairs": [
+                {"cause": rng.choice(PHRASES), "effect": rng.choice(PHRASES), "explicit": rng.random() < 0.5}
+                for _ in range(k)]})
+            records.append(_record(step, _wrap(rng, payload), latency))
+        elif step == "chains":
+            lines = [f"{j + 1}. " + " → ".join(rng.choice(PHRASES) for _ in range(rng.randint(2, 5))) for j in range(k)]
+            records.append(_record(step, "CHAINS:\n" + "\n".join(lines), latency))
+        elif step == "confidence":
+            payload = json.dumps({f"chain_{j + 1}": {
+                "chain": " → ".join(chain),
+                "links": [{"connection": f"{a}→{b}", "confidence": round(rng.random(), 2),
+                           "evidence": f"I noticed {a} led to {b}"} for a, b in zip(chain, chain[1:])],
+                "overall_confidence": round(rng.random(), 2)} for j in range(k)}, ensure_ascii=False)
+            records.append(_record(step, _wrap(rng, payload), latency))
+        elif step == "interventions":
+            payload = json.dumps({"highest_roi_interventions": [{
+                "link": f"{rng.choice(PHRASES)} → {rng.choice(PHRASES)}", "confidence": 0.9, "roi_score": 0.8,
+                "modifiability": "high", "leverage_blocked_effects": rng.randint(1, 4),
+                "suggested_interventions": ["CBT", "sleep hygiene"], "reasoning": "High leverage link"}
+                for _ in range(rng.randint(1, 3))]}, ensure_ascii=False)
+            records.append(_record(step, _wrap(rng, payload), latency))
+        elif step == "memory_updates":
+            reply = "It makes sense that the news feels overwhelming. " * rng.randint(3, 20)
+            payload = json.dumps({"memory_updates": {"sessions.md": "Discussed sleep", "therapeutic_goals.md": "Sleep"}})
+            records.append(_record(step, reply + "\n" + _wrap(rng, payload), latency))
+        else:
+            messages = [{"message_type": "reasoning_message", "content": "thinking"}]
+            for _ in range(rng.randint(0, 3)):
+                messages.append({"tool_calls": [{"name": rng.choice(["memory_replace", "memory_insert"]),
+                                                 "input": {"label": "coping_inventory", "value": "breathing helps " * 10}}]})
+            messages.append({"content": "Thank you for sharing that with me."})
+            records.append(_record(step, "", latency, "agents.messages.create", {"messages": messages}))
+    return records
+
+
+# ============ BENCHMARK ============
+
+def bench_parsers(records: list) -> dict:
+    by_step = {}
+    for record in records:
+        step = classify(record)
+        if step in PARSERS:
+            by_step.setdefault(step, []).append(record)
+
+    report = {}
+    for step, recs in by_step.items():
+        parser = PARSERS[step]
+        # Going through ReplayClient exercises the same response objects agents see
+        replay = ReplayClient(recs, match="sequence")
+        responses = [
+            replay.agents.messages.create() if r["endpoint"] == "agents.messages.create" else replay.messages.create()
+            for r in recs
+        ]
+
+        timings = []
+        failures = 0
+        for response in responses:
+            start = time.perf_counter_ns()
+            try:
+                result = parser(response)
+            except Exception:
+                result = None
+            timings.append((time.perf_counter_ns() - start) / 1000)
+            if not result:
+                failures += 1
+
+        # Allocation passes (separate so tracemalloc overhead doesn't skew timings).
+        # Peak per call: tracing restarts for every call, which resets the peak
+        # (tracemalloc.reset_peak needs Python 3.9)
+        peaks = []
+        for response in responses:
+            tracemalloc.start()
+            try:
+                parser(response)
+            except Exception:
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        tracemalloc.start()
+        kept = []
+        before = tracemalloc.take_snapshot()
+        for response in responses:
+            try:
+                kept.append(parser(response))
+            except Exception:
+                kept.append(None)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        retained_blocks = sum(max(0, s.count_diff) for s in after.compare_to(before, "filename"))
+
+        timings.sort()
+        report[step] = {
+            "responses": len(recs),
+            "mean_us": round(statistics.fmean(timings), 2),
+            "p95_us": round(timings[int(len(timings) * 0.95) - 1], 2),
+            "alloc_peak_bytes_mean": int(statistics.fmean(peaks)),
+            "retained_blocks_per_call": round(retained_blocks / len(recs), 1),
+            "failure_rate": round(failures / len(recs), 4),
+        }
+    return report
+
+
+def bench_orchestration(records: list, runs: int) -> dict:
+    """End-to-end 4-step analysis with every provider call served from replay."""
+    steps = {s: [r for r in records if classify(r) == s] for s in ("pairs", "chains", "confidence", "interventions")}
+    if not all(steps.values()) or runs <= 0:
+        return {}
+    sequence = []
+    for i in range(runs):
+        # Only clean pair responses, so runs don't stop early at "No causal pairs found"
+        clean_pairs = [r for r in steps["pairs"] if parse_pairs_response(r["response"]["content"][0]["text"])["pairs"]]
+        for step in ("pairs", "chains", "confidence", "interventions"):
+            pool = clean_pairs if step == "pairs" else steps[step]
+            sequence.append(pool[i % len(pool)])
+
+    engine = CausalReasoningEngine(groq_api_key="replay", client=ReplayClient(sequence, match="sequence"))
+    transcript = "Every time I see climate news I get anxious, then I can't sleep. " * 20
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(runs):
+            start = time.perf_counter()
+            engine.analyze_transcript_end_to_end(transcript)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "runs": runs,
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _previous(history: Path):
+    if not history.exists():
+        return None
+    lines = [l for l in history.read_text().splitlines() if l.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", nargs="*", default=[], help="recorded JSONL fixture files")
+    parser.add_argument("--synthesize", type=int, default=2000, help="synthetic responses when no fixtures given")
+    parser.add_argument("--save-fixtures", help="write synthesized traffic to this fixture file")
+    parser.add_argument("--orchestration-runs", type=int, default=200)
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY))
+    parser.add_argument("--no-history", action="store_true")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        from src.replay import load_fixtures
+        records = load_fixtures(*args.fixtures)
+        source = ",".join(args.fixtures)
+    else:
+        records = synthesize(args.synthesize)
+        source = f"synthetic:{args.synthesize}"
+        if args.save_fixtures:
+            Path(args.save_fixtures).parent.mkdir(parents=True, exist_ok=True)
+            with open(args.save_fixtures, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_rev": _git_rev(),
+        "python": sys.version.split()[0],
+        "source": source,
+        "parsers": bench_parsers(records),
+        "orchestration": bench_orchestration(records, args.orchestration_runs),
+    }
+
+    history = Path(args.history)
+    previous = _previous(history)
+
+    print(f"{'parser':<15} {'n':>6} {'mean µs':>9} {'p95 µs':>9} {'peak B':>9} {'kept blk':>9} {'fail %':>7}  vs last")
+    for step, r in entry["parsers"].items():
+        delta = ""
+        if previous and step in previous.get("parsers", {}):
+            old = previous["parsers"][step]["mean_us"]
+            delta = f"{(r['mean_us'] - old) / old * 100:+.1f}%" if old else ""
+        print(f"{step:<15} {r['responses']:>6} {r['mean_us']:>9} {r['p95_us']:>9} "
+              f"{r['alloc_peak_bytes_mean']:>9} {r['retained_blocks_per_call']:>9} "
+              f"{r['failure_rate'] * 100:>6.1f}%  {delta}")
+    if entry["orchestration"]:
+        o = entry["orchestration"]
+        print(f"\norchestration: {o['runs']} replayed analyses, mean {o['mean_ms']} ms, p95 {o['p95_ms']} ms")
+
+    if not args.no_history:
+        history.parent.mkdir(parents=True, exist_ok=True)
+        with history.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
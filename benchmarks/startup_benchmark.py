@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark for stage-only worker profiles.
+
+Each profile runs in a fresh interpreter with `python -X importtime`, imports
+the pipeline and loads only the provider SDKs that profile needs. Reports
+total import time (sum of top-level cumulative times), wall time to ready,
+and peak RSS.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --profiles groq claude --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    "bare": [],
+    "groq": ["groq"],
+    "letta": ["letta"],
+    "claude": ["claude"],
+    "full": ["groq", "letta", "claude"],
+}
+
+WORKER_CODE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from src.climatecircle_pipeline import STAGE_PROVIDERS
+from src import providers
+status = "ok"
+for stage in {stages!r}:
+    for name in STAGE_PROVIDERS[stage]:
+        try:
+            providers.load_provider(name)
+        except ImportError:
+            status = "missing:" + name
+ready_ms = (time.perf_counter() - start) * 1000
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print(json.dumps({{"ready_ms": ready_ms, "rss_kb": rss_kb, "status": status,
+                  "loaded": providers.loaded_providers()}}))
+"""
+
+
+def parse_importtime(stderr: str) -> float:
+    """Sum cumulative microseconds of top-level imports (-X importtime output)."""
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        if len(parts) < 3:
+            continue
+        name = parts[2]
+        # Nested imports are indented; only count top-level modules
+        if name.startswith(" ") and not name.startswith("  "):
+            try:
+                total_us += int(parts[1].strip())
+            except ValueError:
+                pass
+    return total_us / 1000
+
+
+def run_profile(stages: list) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", WORKER_CODE.format(stages=stages)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        return {"status": "error", "error": result.stderr.strip().splitlines()[-1:]}
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats["import_ms"] = parse_importtime(result.stderr)
+    return stats
+
+
+def benchmark(profiles: list, repeat: int) -> dict:
+    report = {}
+    for profile in profiles:
+        runs = [run_profile(PROFILES[profile]) for _ in range(repeat)]
+        ok = [r for r in runs if "import_ms" in r]
+        if not ok:
+            report[profile] = runs[0]
+            continue
+        report[profile] = {
+            "stages": PROFILES[profile],
+            "status": ok[-1]["status"],
+            "loaded_providers": ok[-1]["loaded"],
+            "import_ms_median": round(statistics.median(r["import_ms"] for r in ok), 1),
+            "ready_ms_median": round(statistics.median(r["ready_ms"] for r in ok), 1),
+            "rss_mb_max": round(max(r["rss_kb"] for r in ok) / 1024, 1),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=list(PROFILES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print raw JSON report")
+    args = parser.parse_args()
+
+    report = benchmark(args.profiles, args.repeat)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'profile':<8} {'import ms':>10} {'ready ms':>10} {'RSS MB':>8}  providers / status")
+        for profile, r in report.items():
+            if "import_ms_median" not in r:
+                print(f"{profile:<8} {'-':>10} {'-':>10} {'-':>8}  {r['status']} {r.get('error', '')}")
+                continue
+            print(f"{profile:<8} {r['import_ms_median']:>10} {r['ready_ms_median']:>10} {r['rss_mb_max']:>8}  "
+                  f"{','.join(r['loaded_providers']) or '-'} ({r['status']})")
@@ -0,0 +1,286 @@
+# File: async_agents.py
+# asyncio counterparts of the Groq engine, Letta agent and Claude agent
+
+import asyncio
+from functools import partial
+
+from src.causal_graph import CausalGraph
+from src.causal_reasoning_engine import (
+    CausalReasoningEngine, parse_pairs_response_checked, parse_chains_response,
+    parse_interventions_response
+)
+from src.claude_persistent_protocol import ClaudeTherapeuticAgent
+from src.flows import drive_async
+from src.letta_trauma_agent import (
+    TraumaJourneyAgent, CROSS_LEARNING_PROMPT, parse_session_response, parse_progress_report
+)
+from src.providers import create_client
+from src.results import CausalAnalysis
+from src.token_budget import estimate_tokens
+
+# Each class keeps its sync parent's prompts, parsers, result assembly and
+# multi-step flows (src.flows) and only overrides the methods that talk to a
+# provider or the disk, so the same transcript produces the same requests and
+# result shapes in both modes.
+# Awaiting a provider call yields the event loop, so one process can run many
+# sessions concurrently without a thread per session.
+
+
+async def _in_thread(func, *args):
+    # asyncio.to_thread needs Python 3.9
+    return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args))
+
+
+class AsyncCausalReasoningEngine(CausalReasoningEngine):
+    """
+    CausalReasoningEngine on the AsyncGroq client; every public method is a coroutine.
+
+    Parallel confidence scoring runs as concurrent tasks (at most max_workers
+    in flight), and the chunks of an over-long transcript are extracted concurrently.
+    """
+
+    def __init__(self, groq_api_key: str, client=None, parallel_confidence: bool = False,
+                 confidence_batch_size: int = 1, max_workers: int = 8, hedger=None, router=None):
+        super().__init__(
+            groq_api_key,
+            client=client or create_client("groq_async", api_key=groq_api_key),
+            parallel_confidence=parallel_confidence,
+            confidence_batch_size=confidence_batch_size,
+            max_workers=max_workers,
+            hedger=hedger,
+            router=router
+        )
+
+    async def _complete(self, step: str, prompt: str, expected_output_tokens: int, temperature: float,
+                        trimmed: bool = False, model: str = None) -> str:
+        return await drive_async(self._complete_flow(step, prompt, expected_output_tokens, temperature, trimmed, model))
+
+    async def _send(self, step: str, request: dict):
+        if self.hedger:
+            return await self.hedger.acall(f"groq:{step}:{request['model']}", self.client.messages.create, **request)
+        return await self.client.messages.create(**request)
+
+    async def _run_step(self, request: dict, parse, validate=bool):
+        if not self.router:
+            return parse(await self._complete(**request))
+        return await self.router.arun(
+            "groq",
+            request["step"],
+            estimate_tokens(request["prompt"]),
+            self.model,
+            call=lambda route: self._complete(**request, model=route["model"]),
+            parse=parse,
+            validate=validate
+        )
+
+    async def extract_causal_pairs(self, transcript: str) -> dict:
+        chunks = self._pair_chunks(transcript)
+        if len(chunks) > 1:
+            results = await asyncio.gather(*(self._extract_causal_pairs_chunk(chunk) for chunk in chunks))
+            return self._merge_chunk_pairs(list(results))
+
+        return await self._extract_causal_pairs_chunk(transcript)
+
+    async def _extract_causal_pairs_chunk(self, transcript: str) -> dict:
+        pairs, _ = await self._run_step(
+            self._pairs_request(transcript), parse_pairs_response_checked, validate=lambda result: result[1]
+        )
+        return pairs
+
+    async def generate_implicit_causal_chains(self, pairs: list) -> list:
+        return await self._run_step(self._chains_request(pairs), parse_chains_response)
+
+    async def evaluate_causal_confidence(self, transcript: str, chains: list) -> dict:
+        if self.parallel_confidence:
+            return await self.evaluate_causal_confidence_parallel(transcript, chains)
+
+        scored = await self._run_step(
+            self._confidence_request("evaluate_causal_confidence", transcript, chains),
+            lambda text: self._rekey_batch(0, chains, text)
+        )
+        return self._merge_batches(scored, chains)
+
+    async def evaluate_causal_confidence_parallel(self, transcript: str, chains: list,
+                                                  batch_size: int = None, max_workers: int = None) -> dict:
+        batch_size = batch_size or self.confidence_batch_size
+        max_workers = max_workers or self.max_workers
+        if not chains:
+            return {}
+
+        batches = self._confidence_batches(chains, batch_size)
+        in_flight = asyncio.Semaphore(max_workers)
+
+        async def score(start: int, batch: list) -> dict:
+            async with in_flight:
+                try:
+                    return await self._score_batch(transcript, start, batch)
+                except Exception as e:
+                    print(f"[Groq] Confidence batch at chain_{start + 1} failed: {e}")
+                    return {}
+
+        results = await asyncio.gather(*(score(start, batch) for start, batch in batches))
+        merged = {}
+        for result in results:
+            merged.update(result)
+
+        return self._merge_batches(merged, chains)
+
+    async def _score_batch(self, transcript: str, start: int, batch: list) -> dict:
+        return await self._run_step(
+            self._confidence_request("evaluate_causal_confidence_batch", transcript, batch),
+            lambda text: self._rekey_batch(start, batch, text)
+        )
+
+    async def identify_intervention_points(self, chains: list, confidence_data: dict) -> dict:
+        return await self._run_step(self._interventions_request(chains, confidence_data), parse_interventions_response)
+
+    async def analyze_transcript_end_to_end(self, transcript: str) -> dict:
+        return await drive_async(self._end_to_end_flow(transcript))
+
+    async def analyze_session_incremental(self, session_transcript: str, graph: CausalGraph,
+                                          session_number: int = None) -> dict:
+        return await drive_async(self._incremental_flow(session_transcript, graph, session_number))
+
+    async def analyze_transcript_typed(self, transcript: str) -> CausalAnalysis:
+        return CausalAnalysis.from_dict(await self.analyze_transcript_end_to_end(transcript))
+
+
+class AsyncTraumaJourneyAgent(TraumaJourneyAgent):
+    """TraumaJourneyAgent on the AsyncLetta client; every public method is a coroutine."""
+
+    def __init__(self, letta_api_key: str, participant_id: str, client=None):
+        super().__init__(
+            letta_api_key,
+            participant_id,
+            client=client or create_client("letta_async", token=letta_api_key)
+        )
+
+    async def initialize_agent(self, participant_name: str, intake_summary: str):
+        self.agent = await self.client.agents.create(**self._agent_config(participant_name, intake_summary))
+
+        print(f"[Letta] Agent created: {self.agent.id}")
+        return self.agent
+
+    async def _send(self, content: str):
+        return await self.client.agents.messages.create(
+            agent_id=self.agent.id,
+            messages=[{"role": "user", "content": content}]
+        )
+
+    async def run_session(self, session_number: int, session_transcript: str) -> dict:
+        self.session_count = session_number
+        response = await self._send(self._session_prompt(session_number, session_transcript))
+        return parse_session_response(session_number, response)
+
+    async def generate_progress_report(self) -> dict:
+        return parse_progress_report(await self._send(self._progress_prompt()))
+
+    async def trigger_cross_session_learning(self, all_participant_ids: list):
+        return await self._send(CROSS_LEARNING_PROMPT)
+
+
+class AsyncClaudeTherapeuticAgent(ClaudeTherapeuticAgent):
+    """
+    ClaudeTherapeuticAgent on the AsyncAnthropic client; every public method is
+    a coroutine (the *_stream methods return async generators).
+
+    Memory files are read and written in worker threads, so disk I/O never
+    blocks the event loop (the memory cache is thread-safe). Memory updates
+    for one participant are applied one session at a time, under the same
+    per-participant lock the sync agent uses.
+    """
+
+    def __init__(self, claude_api_key: str, participant_id: str, memory_dir: str = "./protocols",
+                 hedger=None, client=None, router=None, memory_cache=None):
+        super().__init__(
+            claude_api_key,
+            participant_id,
+            memory_dir=memory_dir,
+            hedger=hedger,
+            client=client or create_client("anthropic_async", api_key=claude_api_key),
+            router=router,
+            memory_cache=memory_cache
+        )
+
+    def _initialize_memory_files(self):
+        # Called by the base __init__: defer the disk work to the first
+        # coroutine that needs memory, so constructing an agent never blocks
+        self._memory_ready = False
+
+    async def _load_memory(self) -> dict:
+        if not self._memory_ready:
+            await _in_thread(ClaudeTherapeuticAgent._initialize_memory_files, self)
+            self._memory_ready = True
+        return await _in_thread(self._read_all_memory)
+
+    async def _save_memory_updates(self, session_number: int, memory_updates: dict):
+        if memory_updates:
+            await _in_thread(self._persist_memory_updates, session_number, memory_updates)
+
+    async def _send(self, kwargs: dict, hedge_key: str = None):
+        if hedge_key and self.hedger:
+            return await self.hedger.acall(hedge_key, self.client.messages.create, **kwargs)
+        return await self.client.messages.create(**kwargs)
+
+    async def _create(self, step: str, system: str, prompt: str, expected_output_tokens: int,
+                      thinking_budget: int = 0, hedge: bool = False, trimmed: bool = False, model: str = None):
+        return await drive_async(self._create_flow(step, system, prompt, expected_output_tokens,
+                                                   thinking_budget, hedge, trimmed, model))
+
+    async def _run_step(self, step: str, system: str, prompt: str, expected_output_tokens: int, parse,
+                        validate=bool, input_tokens: int = None, thinking_budget: int = 0,
+                        hedge: bool = False, trimmed: bool = False):
+        if not self.router:
+            text, _ = await self._create(step, system, prompt, expected_output_tokens, thinking_budget, hedge, trimmed)
+            return parse(text)
+
+        async def call(route):
+            text, _ = await self._create(step, system, prompt, expected_output_tokens,
+                                         self._route_thinking(route, thinking_budget), hedge, trimmed, route["model"])
+            return text
+
+        prompt_tokens = estimate_tokens(system + prompt)
+        return await self.router.arun(
+            "claude", step, input_tokens if input_tokens is not None else prompt_tokens, self.model,
+            call, parse, validate, prompt_tokens=prompt_tokens
+        )
+
+    async def _stream(self, step: str, system: str, prompt: str, expected_output_tokens: int,
+                      thinking_budget: int = 0, trimmed: bool = False, model: str = None):
+        decision = self._plan(step, system, prompt, expected_output_tokens, thinking_budget, trimmed, model)
+        self.last_stream_decision = decision
+
+        text = ""
+        async with self.client.messages.stream(**self._request(decision, system, prompt, thinking_budget)) as stream:
+            async for delta in stream.text_stream:
+                text += delta
+                yield delta
+            response = await stream.get_final_message()
+
+        continued = await drive_async(
+            self._continuation_flow(decision, system, prompt, expected_output_tokens, text, response)
+        )
+        if decision["continuations"]:
+            # Continued after the streamed text minus its trailing whitespace
+            yield continued[len(text.rstrip()):]
+
+    async def _run_stream(self, events_class, *args):
+        events = events_class(self, *args)
+        async for delta in self._stream(**events.open(await self._load_memory())):
+            for event in events.feed(delta):
+                yield event
+        for event in events.finish():
+            yield event
+
+        if events.memory_updates:
+            await self._save_memory_updates(events.session_number, events.memory_updates)
+        yield events.done()
+
+    async def run_session(self, session_number: int, participant_input: str) -> dict:
+        return await drive_async(self._session_flow(session_number, participant_input))
+
+    async def get_protocol_summary(self) -> dict:
+        return await drive_async(self._summary_flow())
+
+    async def export_therapeutic_journal(self) -> str:
+        return await drive_async(self._journal_flow())
@@ -0,0 +1,189 @@
+# File: causal_graph.py
+# Per-participant causal graph, persisted between sessions for incremental analysis
+
+from collections import defaultdict
+from pathlib import Path
+import json
+import re
+
+from src.evidence_grounding import GROUNDING_KEYS
+
+_NON_WORD = re.compile(r"[^\w\s']+")
+_SPACES = re.compile(r"\s+")
+_ARROW = re.compile(r"\s*(?:→|->)\s*")
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Node identity: case, punctuation and spacing don't create new nodes."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", phrase.lower())).strip()
+
+
+def chain_nodes(chain: str) -> list:
+    """'climate news → anxiety → insomnia' -> normalized node list."""
+    return [normalize_phrase(part) for part in _ARROW.split(chain) if part.strip()]
+
+
+class CausalGraph:
+    """
+    A participant's accumulated causal structure:
+    - edges: normalized (cause, effect) -> pair dict + sessions it was seen in
+    - chains: [{"chain": str, "scored": chain_N dict or None}]
+    - interventions: current highest_roi_interventions list
+
+    Merging a new session only touches the neighbourhood of its new edges
+    (see affected_nodes), so re-analysis cost follows the new session's size,
+    not the participant's history.
+    """
+
+    def __init__(self, participant_id: str):
+        self.participant_id = participant_id
+        self.sessions = 0
+        self.edges = {}
+        self.chains = []
+        self.interventions = []
+        self.transcript_summary = ""
+
+    # ---------- graph structure ----------
+
+    def merge_pairs(self, pairs: list, session_number: int) -> list:
+        """Add pairs from one session; returns the edge keys that are new."""
+        new_edges = []
+        for pair in pairs:
+            cause = normalize_phrase(pair.get("cause", ""))
+            effect = normalize_phrase(pair.get("effect", ""))
+            if not cause or not effect or cause == effect:
+                continue
+            key = (cause, effect)
+            if key in self.edges:
+                if session_number not in self.edges[key]["sessions"]:
+                    self.edges[key]["sessions"].append(session_number)
+                continue
+            self.edges[key] = {"pair": dict(pair), "sessions": [session_number]}
+            new_edges.append(key)
+        self.sessions = max(self.sessions, session_number)
+        return new_edges
+
+    def affected_nodes(self, new_edges: list, hops: int = 1, max_neighbours: int = 8) -> set:
+        """
+        Nodes to re-chain for the new edges: their endpoints plus a bounded
+        neighbourhood, so chains can extend through the new edges. Each hop
+        adds at most max_neighbours per node, preferring edges seen in the
+        most (then the latest) sessions.
+
+        Deliberately not the whole connected component: participant graphs
+        grow hub nodes ("anxiety") that connect everything after a few sessions.
+        """
+        neighbours = defaultdict(list)
+        for (cause, effect), edge in self.edges.items():
+            weight = (len(edge["sessions"]), max(edge["sessions"]))
+            neighbours[cause].append((weight, effect))
+            neighbours[effect].append((weight, cause))
+        affected = {node for edge in new_edges for node in edge}
+        frontier = set(affected)
+        for _ in range(hops):
+            reached = set()
+            for node in frontier:
+                ranked = sorted(neighbours[node], reverse=True)
+                reached.update(other for _, other in ranked[:max_neighbours])
+            frontier = reached - affected
+            affected |= frontier
+        return affected
+
+    def pairs_for(self, nodes: set) -> list:
+        """Original pair dicts for every edge inside the given node set."""
+        return [e["pair"] for (c, f), e in self.edges.items() if c in nodes and f in nodes]
+
+    # ---------- chains & scores ----------
+
+    def split_chains(self, nodes: set) -> tuple:
+        """
+        Partition stored chains into (kept, stale). A chain is stale when all
+        its nodes are inside the re-chained node set, so the new step-2 chains
+        cover it; chains that only pass through the set are kept as they are.
+        """
+        keep, stale = [], []
+        for entry in self.chains:
+            (stale if nodes.issuperset(chain_nodes(entry["chain"])) else keep).append(entry)
+        return keep, stale
+
+    def evidence_for(self, nodes: set, limit: int = 40) -> list:
+        """
+        Previously scored evidence quotes for stored chains inside the node set.
+        Only quotes that were found verbatim in their own session's transcript
+        (grounding_match "exact") are returned: a quote the model invented
+        must not come back as context for later sessions.
+        """
+        return list(self.verified_evidence(nodes, limit))
+
+    def verified_evidence(self, nodes: set, limit: int = 40) -> dict:
+        """evidence_for(), as {quote: the grounding annotation it got in its own session}."""
+        quotes = {}
+        for entry in self.chains:
+            if not entry.get("scored") or not nodes.issuperset(chain_nodes(entry["chain"])):
+                continue
+            for link in entry["scored"].get("links", []):
+                evidence = link.get("evidence")
+                if link.get("grounding_match") != "exact":
+                    continue
+                if evidence and evidence not in quotes and len(quotes) < limit:
+                    quotes[evidence] = {key: link.get(key) for key in GROUNDING_KEYS}
+        return quotes
+
+    def confidence_map(self) -> dict:
+        """Stored scores re-keyed chain_1..N in chain order (same shape as step 3)."""
+        return {
+            f"chain_{i + 1}": entry["scored"]
+            for i, entry in enumerate(self.chains)
+            if entry.get("scored")
+        }
+
+    # ---------- persistence ----------
+
+    def to_dict(self) -> dict:
+        return {
+            "participant_id": self.participant_id,
+            "sessions": self.sessions,
+            "edges": [
+                {"cause": c, "effect": f, "pair": e["pair"], "sessions": e["sessions"]}
+                for (c, f), e in self.edges.items()
+            ],
+            "chains": self.chains,
+            "interventions": self.interventions,
+            "transcript_summary": self.transcript_summary,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CausalGraph":
+        graph = cls(data["participant_id"])
+        graph.sessions = data.get("sessions", 0)
+        graph.edges = {
+            (e["cause"], e["effect"]): {"pair": e["pair"], "sessions": e["sessions"]}
+            for e in data.get("edges", [])
+        }
+        graph.chains = data.get("chains", [])
+        graph.interventions = data.get("interventions", [])
+        graph.transcript_summary = data.get("transcript_summary", "")
+        return graph
+
+
+class CausalGraphStore:
+    """One JSON file per participant, laid out like the Claude protocol memory dirs."""
+
+    def __init__(self, graph_dir: str = "./causal_graphs"):
+        self.graph_dir = Path(graph_dir)
+        self.graph_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, participant_id: str) -> Path:
+        return self.graph_dir / f"participant_{participant_id}.json"
+
+    def load(self, participant_id: str) -> CausalGraph:
+        path = self._path(participant_id)
+        if not path.exists():
+            return CausalGraph(participant_id)
+        return CausalGraph.from_dict(json.loads(path.read_text()))
+
+    def save(self, graph: CausalGraph):
+        path = self._path(graph.participant_id)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(graph.to_dict(), ensure_ascii=False))
+        tmp.replace(path)  # atomic: a crash never leaves half a graph
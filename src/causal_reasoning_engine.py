@@ -1,9 +1,88 @@
 # File: causal_reasoning_engine.py
 # Deep Groq integration for climate anxiety causal analysis
 
-from groq import Groq
+import contextvars
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+from src.causal_graph import CausalGraph, chain_nodes
+from src.evidence_grounding import ground_confidence_analysis, strip_grounding
+from src.flows import drive
+from src.providers import create_client
+from src.results import (
+    CausalAnalysis, parse_pairs, parse_confidence, parse_interventions,
+    confidence_to_dict, interventions_to_dict
+)
+from src.token_budget import TokenBudget, estimate_tokens, is_truncated
+
+# Rough output size per item of each step's JSON/list schema (tokens)
+TOKENS_PER_PAIR = 40
+TOKENS_PER_CHAIN = 60
+TOKENS_PER_LINK = 70
+TOKENS_PER_INTERVENTION = 160
+MAX_CONTINUATIONS = 2
+
+# ============ RESPONSE PARSERS ============
+# Module-level so they can be benchmarked against replayed responses
+# (benchmarks/parse_benchmark.py) without a live client.
+
+_JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+_NUMBERED_ITEM = re.compile(r'\d+\.\s*(.+?)(?=\n|$)')
+_CHAIN_KEY = re.compile(r'chain_(\d+)')
+
+def _compact_json(data) -> str:
+    # Compact separators: this JSON is prompt input, not for humans
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def parse_pairs_response(text: str) -> dict:
+    """Step 1 output -> {"pairs": [...]} (validated, empty on failure)."""
+    return parse_pairs_response_checked(text)[0]
+
+def parse_pairs_response_checked(text: str) -> tuple:
+    """
+    (parse_pairs_response(text), well_formed). An empty "pairs" list is well
+    formed (a transcript without causal statements); unparseable JSON, a
+    missing list, or a list without one valid pair is not.
+    """
+    try:
+        pairs = json.loads(text)
+    except json.JSONDecodeError:
+        # Fallback: extract JSON from messy response
+        json_match = _JSON_OBJECT.search(text)
+        if not json_match:
+            return {"pairs": []}, False
+        try:
+            pairs = json.loads(json_match.group())
+        except json.JSONDecodeError:
+            return {"pairs": []}, False
+    
+    # Drop pairs missing a cause or effect (they would break step 2)
+    valid = [p.to_dict() for p in parse_pairs(pairs)]
+    items = pairs.get("pairs") if isinstance(pairs, dict) else None
+    return {"pairs": valid}, isinstance(items, list) and (bool(valid) or not items)
+
+def parse_chains_response(text: str) -> list:
+    """Step 2 output (numbered list) -> ["A → B → C", ...]."""
+    return _NUMBERED_ITEM.findall(text)
+
+def parse_confidence_response(text: str) -> dict:
+    """Step 3 output -> {"chain_N": {...}} (validated chain by chain, {} on failure)."""
+    try:
+        confidence_data = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    
+    # Validate chain by chain so one malformed chain doesn't drop the rest
+    return confidence_to_dict(parse_confidence(confidence_data))
+
+def parse_interventions_response(text: str) -> dict:
+    """Step 4 output -> {"highest_roi_interventions": [...]} ({} on failure)."""
+    try:
+        return interventions_to_dict(parse_interventions(json.loads(text)))
+    except json.JSONDecodeError:
+        return {}
 
 class CausalReasoningEngine:
     """
@@ -14,15 +93,157 @@ class CausalReasoningEngine:
     Discovery in Climate Discourse" (arXiv:2510.13417)
     """
     
-    def __init__(self, groq_api_key: str):
-        self.client = Groq(api_key=groq_api_key)
+    def __init__(self, groq_api_key: str, client=None, parallel_confidence: bool = False,
+                 confidence_batch_size: int = 1, max_workers: int = 8, hedger=None, router=None):
+        # client: pre-built Groq-compatible client (e.g. a ReplayClient from src.replay)
+        self.client = client or create_client("groq", api_key=groq_api_key)
         self.model = "mixtral-8x7b-32768"  # Fast, reasoning-capable
+        self.budget = TokenBudget(self.model)
         
-    def extract_causal_pairs(self, transcript: str) -> dict:
+        # Step 3 mode: score chains in concurrent small batches instead of one prompt
+        self.parallel_confidence = parallel_confidence
+        self.confidence_batch_size = confidence_batch_size
+        self.max_workers = max_workers
+        
+        # Optional src.hedging.HedgedCaller; all 4 steps are idempotent reads
+        self.hedger = hedger
+        
+        # Optional src.model_routing.ModelRouter; self.model stays the baseline
+        # (used for unrouted stages and as the reference for savings)
+        self.router = router
+    
+    def _complete(self, step: str, prompt: str, expected_output_tokens: int, temperature: float,
+                  trimmed: bool = False, model: str = None) -> str:
         """
-        STEP 1: Identify all cause-effect pairs in the transcript
-        Output: {"pairs": [{"cause": "X", "effect": "Y"}, ...]}
+        Send one prompt with an adaptive max_tokens budget.
+        If the output was cut at max_tokens, ask the model to continue from
+        where it stopped (up to MAX_CONTINUATIONS times) and stitch the text.
+        """
+        return drive(self._complete_flow(step, prompt, expected_output_tokens, temperature, trimmed, model))
+    
+    def _complete_flow(self, step: str, prompt: str, expected_output_tokens: int, temperature: float,
+                       trimmed: bool = False, model: str = None):
+        # _complete as a flow (src.flows), shared with the async engine
+        model = model or self.model
+        decision = self.budget.plan(step, prompt, expected_output_tokens, model=model)
+        decision["trimmed"] = trimmed
+        messages = [{"role": "user", "content": prompt}]
+        max_tokens = decision["max_tokens"]
+        text = ""
+        
+        while True:
+            request = dict(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            response = yield partial(self._send, step, request)
+            text += response.content[0].text
+            if not is_truncated(response) or decision["continuations"] >= MAX_CONTINUATIONS:
+                break
+            # Prefill the partial answer so the model resumes mid-output
+            # (without trailing whitespace, which a final assistant turn can't end in)
+            text = text.rstrip()
+            max_tokens = self.budget.plan_continuation(decision, text, expected_output_tokens)
+            if not max_tokens:
+                break
+            messages = [{"role": "user", "content": prompt}]
+            if text:
+                messages.append({"role": "assistant", "content": text})
+        
+        decision["truncated"] = is_truncated(response)
+        return text
+    
+    def _send(self, step: str, request: dict):
+        """One chat completion request (hedged when a hedger is set)."""
+        if self.hedger:
+            return self.hedger.call(f"groq:{step}:{request['model']}", self.client.messages.create, **request)
+        return self.client.messages.create(**request)
+    
+    def _run_step(self, request: dict, parse, validate=bool):
         """
+        _complete + parse. With a router, the model is chosen per call and an
+        invalid result (validate(result) is False) is retried on a larger model.
+        """
+        if not self.router:
+            return parse(self._complete(**request))
+        return self.router.run(
+            "groq",
+            request["step"],
+            estimate_tokens(request["prompt"]),
+            self.model,
+            call=lambda route: self._complete(**request, model=route["model"]),
+            parse=parse,
+            validate=validate
+        )
+    
+    def _stage_models(self, step: str) -> list:
+        """Models this step's request may be routed to (inputs fit the smallest window)."""
+        if not self.router:
+            return [self.model]
+        return self.router.candidate_models("groq", step, self.model)
+    
+    def _reserved_output(self, expected_output_tokens: int) -> int:
+        """Output tokens plan() will reserve for this expected size."""
+        return max(self.budget.min_output_tokens, min(int(expected_output_tokens * 1.25), self.budget.max_output_tokens))
+    
+    def _fit_transcript(self, step: str, transcript: str, overhead_tokens: int, reserved_output: int) -> tuple:
+        """
+        Trim a transcript that would not fit next to the prompt and output budget.
+        Returns (transcript, was_trimmed).
+        """
+        capacity = self.budget.input_capacity(reserved_output, overhead_tokens, self._stage_models(step))
+        if estimate_tokens(transcript) <= capacity:
+            return transcript, False
+        print(f"[Groq] {step}: transcript exceeds context window, trimming to ~{capacity} tokens")
+        return self.budget.trim(transcript, capacity), True
+    
+    def _fit_pairs(self, pairs: list, capacity: int) -> tuple:
+        """
+        Keep pairs (in extraction order) while their rendered lines fit capacity.
+        Returns (pairs_text, was_trimmed).
+        """
+        lines = []
+        used = 0
+        for pair in pairs:
+            line = f"- {pair['cause']} → {pair['effect']}"
+            used += estimate_tokens(line) + 1
+            if used > capacity:
+                print(f"[Groq] Step 2: keeping {len(lines)}/{len(pairs)} pairs to fit the context window")
+                return "\n".join(lines), True
+            lines.append(line)
+        return "\n".join(lines), False
+    
+    def _fit_confidence(self, chains: list, confidence_data: dict, capacity: int) -> tuple:
+        """
+        Step 4 input that fits capacity: if the full chains + scores JSON is too
+        long, keep the highest-confidence scored chains.
+        Returns (chains, confidence_data, was_trimmed).
+        """
+        def size(chains, confidence_data):
+            return estimate_tokens(_compact_json(chains)) + estimate_tokens(_compact_json(confidence_data))
+        
+        if size(chains, confidence_data) <= capacity:
+            return chains, confidence_data, False
+        ranked = sorted(
+            confidence_data.items(), key=lambda item: item[1].get("overall_confidence") or 0, reverse=True
+        )
+        kept = {}
+        for key, scored in ranked:
+            candidate = {**kept, key: scored}
+            if size([c["chain"] for c in candidate.values()], candidate) > capacity:
+                break
+            kept = candidate
+        print(f"[Groq] Step 4: keeping the {len(kept)}/{len(confidence_data)} most confident chains to fit the context window")
+        return [c["chain"] for c in kept.values()], kept, True
+    
+    # ---------- prompt builders ----------
+    # Each returns the keyword arguments for _complete, so the sync and async
+    # engines (src.async_agents) send byte-identical requests.
+    
+    def _pairs_request(self, transcript: str) -> dict:
+        """Step 1 request for a transcript (or chunk) that already fits the window."""
         
         extraction_prompt = f"""Analyze this climate anxiety interview transcript and extract ALL cause-effect pairs.
 
@@ -40,34 +261,24 @@ Return ONLY valid JSON with this structure:
 Include both explicit causal statements ("because...") and implicit ones (temporal/logical connections).
 Be exhaustive—find 5-10 pairs minimum."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            messages=[{"role": "user", "content": extraction_prompt}],
-            max_tokens=1000,
+        # Scale expected output with transcript length (5-10 pairs minimum)
+        expected_pairs = max(10, estimate_tokens(transcript) // 150)
+        return dict(
+            step="extract_causal_pairs",
+            prompt=extraction_prompt,
+            expected_output_tokens=expected_pairs * TOKENS_PER_PAIR,
             temperature=0.3  # Low temp for precision
         )
-        
-        # Parse JSON from response
-        try:
-            pairs = json.loads(response.content[0].text)
-            return pairs
-        except json.JSONDecodeError:
-            # Fallback: extract JSON from messy response
-            json_match = re.search(r'\{.*\}', response.content[0].text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            return {"pairs": []}
     
-    def generate_implicit_causal_chains(self, pairs: list) -> list:
-        """
-        STEP 2: Connect cause-effect pairs into longer causal chains
-        
-        Input: [{"cause": "climate news", "effect": "anxiety"}, 
-                {"cause": "anxiety", "effect": "insomnia"}]
-        Output: ["climate news → anxiety → insomnia → work performance decline"]
-        """
+    def _chains_request(self, pairs: list) -> dict:
+        """Step 2 request (drops the last pairs if the list would not fit)."""
         
-        pairs_text = "\n".join([f"- {p['cause']} → {p['effect']}" for p in pairs])
+        expected_output = max(5, len(pairs)) * TOKENS_PER_CHAIN
+        pairs_text, trimmed = self._fit_pairs(
+            pairs,
+            self.budget.input_capacity(self._reserved_output(expected_output), 300,
+                                       self._stage_models("generate_implicit_causal_chains"))
+        )
         
         chains_prompt = f"""Given these causal relationships, generate complete implicit causal chains.
         
@@ -91,35 +302,29 @@ CHAINS:
 
 Be specific and use actual phrases from the pairs above."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            messages=[{"role": "user", "content": chains_prompt}],
-            max_tokens=1500,
-            temperature=0.4
+        return dict(
+            step="generate_implicit_causal_chains",
+            prompt=chains_prompt,
+            expected_output_tokens=expected_output,
+            temperature=0.4,
+            trimmed=trimmed
         )
-        
-        # Parse chains from response
-        chains = re.findall(r'\d+\.\s*(.+?)(?=\n|$)', response.content[0].text)
-        return chains
     
-    def evaluate_causal_confidence(self, transcript: str, chains: list) -> dict:
-        """
-        STEP 3: Assign confidence scores to each causal link
-        
-        Returns: {
-            "chain_1": {
-                "chain": "A → B → C",
-                "links": [
-                    {"connection": "A→B", "confidence": 0.95, "evidence": "..."},
-                    {"connection": "B→C", "confidence": 0.78, "evidence": "..."}
-                ],
-                "overall_confidence": 0.86
-            }
-        }
-        """
+    def _confidence_request(self, step: str, transcript: str, chains: list) -> dict:
+        """Step 3 request for these chains (trims the transcript if it would not fit)."""
         
         chains_text = "\n".join([f"- {chain}" for chain in chains])
         
+        # One entry per link plus per-chain framing
+        link_count = sum(max(1, chain.count("→")) for chain in chains)
+        expected_output = link_count * TOKENS_PER_LINK + len(chains) * 40
+        transcript, trimmed = self._fit_transcript(
+            step,
+            transcript,
+            overhead_tokens=estimate_tokens(chains_text) + 500,  # instructions + schema
+            reserved_output=self._reserved_output(expected_output)
+        )
+        
         confidence_prompt = f"""For each causal chain, evaluate confidence in the causal connection.
 
 TRANSCRIPT:
@@ -151,40 +356,28 @@ Return JSON:
   }}
 }}"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            messages=[{"role": "user", "content": confidence_prompt}],
-            max_tokens=2000,
-            temperature=0.3
+        return dict(
+            step=step,
+            prompt=confidence_prompt,
+            expected_output_tokens=expected_output,
+            temperature=0.3,
+            trimmed=trimmed
         )
-        
-        try:
-            confidence_data = json.loads(response.content[0].text)
-            return confidence_data
-        except:
-            return {}
     
-    def identify_intervention_points(self, chains: list, confidence_data: dict) -> dict:
-        """
-        STEP 4: Find the MOST IMPACTFUL points to intervene in causal chain
+    def _interventions_request(self, chains: list, confidence_data: dict) -> dict:
+        """Step 4 request (keeps the most confident chains if the scores would not fit)."""
         
-        Example: In "climate news → anxiety → insomnia → work issues"
-        Intervening at "anxiety → insomnia" is higher ROI than "climate news"
-        (can't stop climate news, but CAN help with anxiety/insomnia)
-        
-        Returns: {
-            "highest_roi_interventions": [
-                {
-                    "link": "anxiety → insomnia",
-                    "roi_score": 0.92,
-                    "reasoning": "High confidence link, modifiable via therapy/sleep hygiene"
-                }
-            ]
-        }
-        """
-        
-        chains_json = json.dumps(chains)
-        confidence_json = json.dumps(confidence_data)
+        expected_output = 3 * TOKENS_PER_INTERVENTION
+        # Grounding annotations are for the result, not the model: step 4 ranks
+        # on the scores and quotes alone, as its criteria describe
+        chains, confidence_data, trimmed = self._fit_confidence(
+            chains,
+            strip_grounding(confidence_data),
+            self.budget.input_capacity(self._reserved_output(expected_output), 400,
+                                       self._stage_models("identify_intervention_points"))
+        )
+        chains_json = _compact_json(chains)
+        confidence_json = _compact_json(confidence_data)
         
         intervention_prompt = f"""Analyze these causal chains and identify high-ROI intervention points.
 
@@ -217,17 +410,260 @@ Return JSON:
   ]
 }}"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            messages=[{"role": "user", "content": intervention_prompt}],
-            max_tokens=1500,
-            temperature=0.3
+        return dict(
+            step="identify_intervention_points",
+            prompt=intervention_prompt,
+            expected_output_tokens=expected_output,
+            temperature=0.3,
+            trimmed=trimmed
         )
+    
+    # ---------- shared pre/post-processing ----------
+    
+    def _pair_chunks(self, transcript: str) -> list:
+        """Split a transcript into step-1 sized chunks ([transcript] if it fits)."""
+        capacity = self.budget.input_capacity(self.budget.max_output_tokens, 200,
+                                              self._stage_models("extract_causal_pairs"))
+        chunks = self.budget.chunk(transcript, capacity)
+        if len(chunks) > 1:
+            print(f"[Groq] Transcript split into {len(chunks)} chunks to fit the context window")
+        return chunks
+    
+    def _merge_chunk_pairs(self, chunk_results: list) -> dict:
+        """Merge per-chunk step-1 results, deduplicated by cause/effect."""
+        merged = []
+        seen = set()
+        for result in chunk_results:
+            for pair in result.get("pairs", []):
+                key = (str(pair.get("cause", "")).lower(), str(pair.get("effect", "")).lower())
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(pair)
+        self.budget.decisions[-1]["chunks"] = len(chunk_results)
+        return {"pairs": merged}
+    
+    def _confidence_batches(self, chains: list, batch_size: int) -> list:
+        return [(start, chains[start:start + batch_size]) for start in range(0, len(chains), batch_size)]
+    
+    def _rekey_batch(self, start: int, batch: list, text: str) -> dict:
+        """
+        Re-key one batch's scored chains from their in-batch chain_k to their
+        global chain_N (N = start + k). Chains dropped by validation stay
+        missing (see _merge_batches) instead of shifting later chains onto their keys.
+        """
+        rekeyed = {}
+        for key, chain in parse_confidence_response(text).items():
+            match = _CHAIN_KEY.fullmatch(key)
+            if match and 1 <= int(match.group(1)) <= len(batch):
+                rekeyed[f"chain_{start + int(match.group(1))}"] = chain
+        return rekeyed
+    
+    def _merge_batches(self, merged: dict, chains: list) -> dict:
+        """
+        Scores for every chain, keyed chain_1..N in chain order. A chain
+        without a valid score (malformed, or its batch failed) keeps its key
+        with no links and overall_confidence None, so both step 3 modes
+        return the same keys and chain_N always names the N-th chain.
+        """
+        failed = [n for n in range(1, len(chains) + 1) if f"chain_{n}" not in merged]
+        if failed:
+            print(f"[Groq] {len(failed)}/{len(chains)} chains could not be scored: {failed}")
+        return {
+            f"chain_{n}": merged.get(f"chain_{n}") or {"chain": chain, "links": [], "overall_confidence": None}
+            for n, chain in enumerate(chains, 1)
+        }
+    
+    def _analysis_result(self, transcript: str, pair_list: list, chains: list, confidence: dict,
+                         grounding: dict, interventions: dict) -> dict:
+        """Assemble comprehensive output"""
+        return {
+            "transcript_summary": transcript[:200] + "...",
+            "causal_pairs_found": len(pair_list),
+            "pairs": pair_list[:5],  # Top 5 for brevity
+            "causal_chains": chains,
+            "confidence_analysis": confidence,
+            "intervention_recommendations": interventions,
+            "processing_model": self.model,
+            "reasoning_depth": "4-step mechanistic causal reasoning",
+            "evidence_grounding": grounding,
+            "token_budget": self.budget.summary()
+        }
+    
+    def _incremental_context(self, session_transcript: str, prior_evidence: dict) -> str:
+        """New session text plus verified prior evidence quotes for the affected nodes."""
+        context = session_transcript
+        if prior_evidence:
+            context += "\n\nEVIDENCE FROM EARLIER SESSIONS:\n" + "\n".join(f'- "{q}"' for q in prior_evidence)
+        return context
+    
+    def _apply_rescored_chains(self, graph: CausalGraph, keep: list, chains: list, scored: dict):
+        graph.chains = keep + [
+            {"chain": chain, "scored": scored.get(f"chain_{i + 1}")}
+            for i, chain in enumerate(chains)
+        ]
+    
+    def _apply_interventions(self, graph: CausalGraph, affected: set, fresh: list):
+        """Re-rank: stored interventions outside the re-chained nodes compete with the fresh ones."""
+        untouched = [
+            i for i in graph.interventions
+            if not affected.issuperset(chain_nodes(i.get("link", "")))
+        ]
+        graph.interventions = sorted(
+            untouched + fresh, key=lambda i: i.get("roi_score") or 0, reverse=True
+        )[:3]
+    
+    def _incremental_result(self, graph: CausalGraph, session_number: int, new_pairs: list,
+                            new_edges: list, affected: set, keep: list, stale: list,
+                            rescored: int, grounding: dict) -> dict:
+        all_pairs = [edge["pair"] for edge in graph.edges.values()]
+        return {
+            "transcript_summary": graph.transcript_summary,
+            "causal_pairs_found": len(all_pairs),
+            "pairs": all_pairs[:5],  # Top 5 for brevity
+            "causal_chains": [entry["chain"] for entry in graph.chains],
+            "confidence_analysis": graph.confidence_map(),
+            "intervention_recommendations": (
+                {"highest_roi_interventions": graph.interventions} if graph.interventions else {}
+            ),
+            "processing_model": self.model,
+            "reasoning_depth": "incremental 4-step mechanistic causal reasoning",
+            "incremental": {
+                "session_number": session_number,
+                "new_pairs": len(new_pairs),
+                "new_edges": len(new_edges),
+                "affected_nodes": len(affected),
+                "chains_rescored": rescored,
+                "chains_replaced": len(stale),
+                "chains_reused": len(keep),
+            },
+            **({"evidence_grounding": grounding} if grounding else {}),
+            "token_budget": self.budget.summary()
+        }
+    
+    # ---------- pipeline steps ----------
         
-        try:
-            return json.loads(response.content[0].text)
-        except:
+    def extract_causal_pairs(self, transcript: str) -> dict:
+        """
+        STEP 1: Identify all cause-effect pairs in the transcript
+        Output: {"pairs": [{"cause": "X", "effect": "Y"}, ...]}
+        
+        Transcripts too long for the model window are chunked and the
+        pairs from each chunk are merged (deduplicated by cause/effect).
+        """
+        
+        chunks = self._pair_chunks(transcript)
+        if len(chunks) > 1:
+            return self._merge_chunk_pairs([self._extract_causal_pairs_chunk(chunk) for chunk in chunks])
+        
+        return self._extract_causal_pairs_chunk(transcript)
+    
+    def _extract_causal_pairs_chunk(self, transcript: str) -> dict:
+        """Single-request pair extraction (transcript already fits the window)."""
+        # Parse JSON from response; a malformed reply counts as a failed response
+        pairs, _ = self._run_step(
+            self._pairs_request(transcript), parse_pairs_response_checked, validate=lambda result: result[1]
+        )
+        return pairs
+    
+    def generate_implicit_causal_chains(self, pairs: list) -> list:
+        """
+        STEP 2: Connect cause-effect pairs into longer causal chains
+        
+        Input: [{"cause": "climate news", "effect": "anxiety"}, 
+                {"cause": "anxiety", "effect": "insomnia"}]
+        Output: ["climate news → anxiety → insomnia → work performance decline"]
+        """
+        # Parse chains from response
+        return self._run_step(self._chains_request(pairs), parse_chains_response)
+    
+    def evaluate_causal_confidence(self, transcript: str, chains: list) -> dict:
+        """
+        STEP 3: Assign confidence scores to each causal link
+        
+        Returns: {
+            "chain_1": {
+                "chain": "A → B → C",
+                "links": [
+                    {"connection": "A→B", "confidence": 0.95, "evidence": "..."},
+                    {"connection": "B→C", "confidence": 0.78, "evidence": "..."}
+                ],
+                "overall_confidence": 0.86
+            }
+        }
+        """
+        
+        if self.parallel_confidence:
+            return self.evaluate_causal_confidence_parallel(transcript, chains)
+        
+        scored = self._run_step(
+            self._confidence_request("evaluate_causal_confidence", transcript, chains),
+            lambda text: self._rekey_batch(0, chains, text)
+        )
+        return self._merge_batches(scored, chains)
+    
+    def evaluate_causal_confidence_parallel(self, transcript: str, chains: list,
+                                            batch_size: int = None, max_workers: int = None) -> dict:
+        """
+        STEP 3 (parallel mode): score each chain (or small batch of chains) in
+        its own concurrent request and merge into the same chain_N structure.
+        
+        - Each batch succeeds or fails on its own: a malformed response or a
+          provider error only drops that batch's chains
+        - Wall time is bounded by the slowest batch, not the sum of all
+        - Trade-off: the transcript is sent once per batch (more input tokens)
+        """
+        batch_size = batch_size or self.confidence_batch_size
+        max_workers = max_workers or self.max_workers
+        if not chains:
             return {}
+        
+        batches = self._confidence_batches(chains, batch_size)
+        merged = {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+            # Each batch runs in a copy of this context, so its requests count
+            # toward this run's token budget
+            futures = {
+                pool.submit(contextvars.copy_context().run, self._score_batch, transcript, start, batch): (start, batch)
+                for start, batch in batches
+            }
+            for future in as_completed(futures):
+                start, batch = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[Groq] Confidence batch at chain_{start + 1} failed: {e}")
+                    result = {}
+                merged.update(result)
+        
+        return self._merge_batches(merged, chains)
+    
+    def _score_batch(self, transcript: str, start: int, batch: list) -> dict:
+        """Score one batch and re-key its chains to their global chain_N positions."""
+        return self._run_step(
+            self._confidence_request("evaluate_causal_confidence_batch", transcript, batch),
+            lambda text: self._rekey_batch(start, batch, text)
+        )
+    
+    def identify_intervention_points(self, chains: list, confidence_data: dict) -> dict:
+        """
+        STEP 4: Find the MOST IMPACTFUL points to intervene in causal chain
+        
+        Example: In "climate news → anxiety → insomnia → work issues"
+        Intervening at "anxiety → insomnia" is higher ROI than "climate news"
+        (can't stop climate news, but CAN help with anxiety/insomnia)
+        
+        Returns: {
+            "highest_roi_interventions": [
+                {
+                    "link": "anxiety → insomnia",
+                    "roi_score": 0.92,
+                    "reasoning": "High confidence link, modifiable via therapy/sleep hygiene"
+                }
+            ]
+        }
+        """
+        return self._run_step(self._interventions_request(chains, confidence_data), parse_interventions_response)
     
     def analyze_transcript_end_to_end(self, transcript: str) -> dict:
         """
@@ -238,10 +674,14 @@ Return JSON:
         - Implicit causal chains
         - Confidence scores
         - Intervention recommendations
+        - Token budget decisions for every request
         """
-        
+        return drive(self._end_to_end_flow(transcript))
+    
+    def _end_to_end_flow(self, transcript: str):
+        self.budget.reset()
         print("[Groq] Step 1/4: Extracting causal pairs...")
-        pairs = self.extract_causal_pairs(transcript)
+        pairs = yield partial(self.extract_causal_pairs, transcript)
         pair_list = pairs.get("pairs", [])
         
         if not pair_list:
@@ -249,26 +689,82 @@ Return JSON:
         
         print(f"[Groq] Found {len(pair_list)} causal pairs")
         print(f"[Groq] Step 2/4: Generating implicit causal chains...")
-        chains = self.generate_implicit_causal_chains(pair_list)
+        chains = yield partial(self.generate_implicit_causal_chains, pair_list)
         
         print(f"[Groq] Found {len(chains)} causal chains")
         print(f"[Groq] Step 3/4: Evaluating causal confidence...")
-        confidence = self.evaluate_causal_confidence(transcript, chains)
+        confidence = yield partial(self.evaluate_causal_confidence, transcript, chains)
+        # Local check that each link's quoted evidence is really in the transcript
+        grounding = ground_confidence_analysis(transcript, confidence)
         
         print(f"[Groq] Step 4/4: Identifying intervention points...")
-        interventions = self.identify_intervention_points(chains, confidence)
+        interventions = yield partial(self.identify_intervention_points, chains, confidence)
         
-        # Assemble comprehensive output
-        return {
-            "transcript_summary": transcript[:200] + "...",
-            "causal_pairs_found": len(pair_list),
-            "pairs": pair_list[:5],  # Top 5 for brevity
-            "causal_chains": chains,
-            "confidence_analysis": confidence,
-            "intervention_recommendations": interventions,
-            "processing_model": self.model,
-            "reasoning_depth": "4-step mechanistic causal reasoning"
-        }
+        return self._analysis_result(transcript, pair_list, chains, confidence, grounding, interventions)
+    
+    def analyze_session_incremental(self, session_transcript: str, graph: CausalGraph,
+                                    session_number: int = None) -> dict:
+        """
+        INCREMENTAL PIPELINE: fold one new session into a participant's stored graph
+        
+        - Step 1 runs on the new session text only
+        - New pairs are merged into the graph; only the neighbourhood of the
+          new edges is re-chained (step 2) and re-scored (step 3), using the
+          new session plus verified prior evidence quotes for it as context
+        - Evidence is grounded against the new session's transcript; a quote
+          of verified prior evidence keeps the grounding from its own session
+        - Interventions are re-ranked only for affected chains (step 4);
+          untouched chains and interventions are reused as-is
+        - A session that adds no new edges costs a single step-1 call
+        
+        The graph is updated in place; persist it with CausalGraphStore.save().
+        Returns the same shape as analyze_transcript_end_to_end plus "incremental".
+        """
+        return drive(self._incremental_flow(session_transcript, graph, session_number))
+    
+    def _incremental_flow(self, session_transcript: str, graph: CausalGraph, session_number: int = None):
+        self.budget.reset()
+        session_number = session_number or graph.sessions + 1
+        
+        print(f"[Groq] Incremental session #{session_number}: extracting pairs from new text...")
+        new_pairs = (yield partial(self.extract_causal_pairs, session_transcript)).get("pairs", [])
+        new_edges = graph.merge_pairs(new_pairs, session_number)
+        if not graph.transcript_summary:
+            graph.transcript_summary = session_transcript[:200] + "..."
+        
+        if not graph.edges:
+            return {"error": "No causal pairs found"}
+        
+        affected = graph.affected_nodes(new_edges)
+        keep, stale = graph.split_chains(affected)
+        rescored = 0
+        grounding = None
+        
+        if new_edges:
+            print(f"[Groq] {len(new_edges)} new edges; re-chaining {len(affected)} affected nodes...")
+            chains = yield partial(self.generate_implicit_causal_chains, graph.pairs_for(affected))
+            
+            prior_evidence = graph.verified_evidence(affected)
+            context = self._incremental_context(session_transcript, prior_evidence)
+            scored = yield partial(self.evaluate_causal_confidence, context, chains)
+            # Not `context` (any quote listed there would match itself): prior
+            # quotes keep the grounding they got in their own session
+            grounding = ground_confidence_analysis(session_transcript, scored, verified=prior_evidence)
+            self._apply_rescored_chains(graph, keep, chains, scored)
+            rescored = len(chains)
+            
+            interventions = yield partial(self.identify_intervention_points, chains, scored)
+            fresh = interventions.get("highest_roi_interventions", [])
+            self._apply_interventions(graph, affected, fresh)
+        else:
+            print("[Groq] No new causal edges; reusing stored chains and interventions")
+        
+        return self._incremental_result(graph, session_number, new_pairs, new_edges, affected,
+                                        keep, stale, rescored, grounding)
+    
+    def analyze_transcript_typed(self, transcript: str) -> CausalAnalysis:
+        """Same as analyze_transcript_end_to_end, returned as a slotted CausalAnalysis."""
+        return CausalAnalysis.from_dict(self.analyze_transcript_end_to_end(transcript))
 
 # ============ USAGE EXAMPLE ============
 
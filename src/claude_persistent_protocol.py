@@ -1,12 +1,253 @@
 # File: claude_persistent_protocol.py
 # Claude with persistent memory for therapeutic protocol evolution
 
-import anthropic
 import json
+import re
+import time
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 import os
 
+from src.flows import drive
+from src.memory_cache import shared_memory_cache
+from src.providers import create_client
+from src.results import SessionResult
+from src.token_budget import TRIM_MARKER, TokenBudget, estimate_tokens, is_truncated
+
+THINKING_BUDGET_TOKENS = 2000
+MAX_CONTINUATIONS = 2
+
+_MEMORY_UPDATES_JSON = re.compile(r'\{[\s\S]*"memory_updates"[\s\S]*\}')
+
+def parse_memory_updates(full_response: str) -> dict:
+    """Pull the trailing {"memory_updates": {...}} JSON out of a session reply."""
+    json_match = _MEMORY_UPDATES_JSON.search(full_response)
+    if not json_match:
+        return {}
+    try:
+        parsed = json.loads(json_match.group())
+    except json.JSONDecodeError:
+        return {}
+    updates = parsed.get("memory_updates", {}) if isinstance(parsed, dict) else {}
+    return updates if isinstance(updates, dict) else {}
+
+MEMORY_UPDATES_MARKER = '"memory_updates"'
+_FENCE_BEFORE = re.compile(r'```(?:json)?\s*$')
+_PARTIAL_FENCE = re.compile(r'`{1,3}(?:j(?:s(?:o(?:n)?)?)?)?\s*$')
+
+JOURNAL_SYSTEM_PROMPT = "You are a compassionate therapist creating a therapeutic narrative."
+SUMMARY_SYSTEM_PROMPT = (
+    "You are a clinical documentation expert. Summarize the therapeutic protocol from persistent memory."
+)
+
+def parse_protocol_summary(text: str) -> dict:
+    """Protocol summary reply -> parsed JSON, or {"raw": text} if it has none."""
+    try:
+        json_match = re.search(r'\{[\s\S]*\}', text)
+        if json_match:
+            return json.loads(json_match.group())
+    except:
+        pass
+    
+    return {"raw": text}
+
+class MemoryUpdateStreamSplitter:
+    """
+    Splits a streamed session reply into therapeutic text (safe to show the
+    participant as it arrives) and the trailing {"memory_updates": ...} JSON.
+    
+    Text that could still turn into the trailer (a "{" followed by nothing but
+    a prefix of "memory_updates", or a partial ```json fence) is held back
+    until it is clear either way. Once the trailer's braces balance,
+    it is parsed immediately (before the stream ends).
+    """
+    
+    def __init__(self):
+        self.visible = ""      # therapeutic text already released
+        self._pending = ""     # text that might be the start of the trailer
+        self._trailer = None   # JSON trailer text once detected
+        self.memory_updates = None
+    
+    def feed(self, chunk: str) -> str:
+        """Add streamed text; return the part that can be shown now."""
+        if self._trailer is not None:
+            self._trailer += chunk
+            self._try_parse()
+            return ""
+        
+        self._pending += chunk
+        marker = self._pending.find(MEMORY_UPDATES_MARKER)
+        if marker != -1:
+            start = self._pending.rfind("{", 0, marker)
+            start = start if start != -1 else marker
+            fence = _FENCE_BEFORE.search(self._pending, 0, start)
+            start = fence.start() if fence else start
+            released, self._trailer = self._pending[:start], self._pending[start:]
+            self._pending = ""
+            self._try_parse()
+            return self._release(released)
+        
+        hold = self._possible_trailer_start(self._pending)
+        if hold == -1:
+            released, self._pending = self._pending, ""
+        else:
+            released, self._pending = self._pending[:hold], self._pending[hold:]
+        return self._release(released)
+    
+    def finish(self) -> str:
+        """End of stream: release held-back text that never became a trailer."""
+        if self._trailer is not None:
+            self._try_parse(final=True)
+            return ""
+        released, self._pending = self._pending, ""
+        return self._release(released)
+    
+    @staticmethod
+    def _possible_trailer_start(text: str) -> int:
+        """Earliest index that might still begin the trailer, or -1."""
+        brace = text.rfind("{")
+        if brace != -1:
+            rest = text[brace + 1:].lstrip()
+            if MEMORY_UPDATES_MARKER.startswith(rest[:len(MEMORY_UPDATES_MARKER)]):
+                fence = _FENCE_BEFORE.search(text, 0, brace)
+                return fence.start() if fence else brace
+        partial = _PARTIAL_FENCE.search(text)
+        return partial.start() if partial else -1
+    
+    def _release(self, text: str) -> str:
+        self.visible += text
+        return text
+    
+    def _try_parse(self, final: bool = False):
+        if self.memory_updates is not None:
+            return
+        body = self._trailer[self._trailer.find("{"):] if "{" in self._trailer else ""
+        if final or (body and body.count("{") == body.count("}")):
+            updates = parse_memory_updates(self._trailer)
+            if updates or final:
+                self.memory_updates = updates
+
+class _StreamEvents:
+    """
+    Timing, routing and event bookkeeping for one *_stream call. Shared by
+    the sync agent and its async subclass, which differ only in how deltas
+    and memory are awaited (see _run_stream).
+    """
+    
+    step = None
+    memory_updates = None
+    
+    def __init__(self, agent):
+        self.agent = agent
+        self.start = time.perf_counter()
+        self.first_token = None
+    
+    def _open(self, system: str, prompt: str, input_tokens: int, thinking_budget: int, **request) -> dict:
+        """_stream kwargs for this call, routed on input_tokens."""
+        self.prompt = system + prompt
+        self.route, model, self.thinking_budget = self.agent._stream_route(self.step, input_tokens, thinking_budget)
+        return dict(step=self.step, system=system, prompt=prompt, thinking_budget=self.thinking_budget,
+                    model=model, **request)
+    
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self.start
+    
+    def _text(self, text: str) -> dict:
+        if self.first_token is None:
+            self.first_token = self._elapsed()
+        return {"type": "text", "text": text}
+    
+    def _record(self, text: str, ok: bool):
+        self.agent._record_stream(self.route, self.step, self.prompt, text, ok, self._elapsed())
+    
+    def _timings(self) -> dict:
+        return {
+            "time_to_first_token_s": round(self.first_token, 3) if self.first_token is not None else None,
+            "total_time_s": round(self._elapsed(), 3)
+        }
+
+class _SessionStream(_StreamEvents):
+    """Events of run_session_stream (see its docstring)."""
+    
+    step = "run_session_stream"
+    
+    def __init__(self, agent, session_number: int, participant_input: str, thinking: bool):
+        super().__init__(agent)
+        self.session_number = session_number
+        self.participant_input = participant_input
+        self.thinking = thinking
+        self.splitter = MemoryUpdateStreamSplitter()
+        self.announced = False
+    
+    def open(self, memory: dict) -> dict:
+        system_prompt, user_message, expected_output, memory_trimmed = self.agent._session_prompts(
+            self.session_number, self.participant_input, memory, self.step
+        )
+        return self._open(
+            system_prompt,
+            user_message,
+            estimate_tokens(self.participant_input),
+            THINKING_BUDGET_TOKENS if self.thinking else 0,
+            expected_output_tokens=expected_output,
+            trimmed=memory_trimmed
+        )
+    
+    def feed(self, delta: str) -> list:
+        events = []
+        visible = self.splitter.feed(delta)
+        if visible:
+            events.append(self._text(visible))
+        if self.splitter.memory_updates is not None and not self.announced:
+            self.announced = True
+            events.append({"type": "memory_updates", "updates": self.splitter.memory_updates})
+        return events
+    
+    def finish(self) -> list:
+        events = []
+        tail = self.splitter.finish()
+        if tail:
+            events.append(self._text(tail))
+        self.memory_updates = self.splitter.memory_updates or {}
+        if self.memory_updates and not self.announced:
+            events.append({"type": "memory_updates", "updates": self.memory_updates})
+        self._record(self.splitter.visible, bool(self.memory_updates))
+        return events
+    
+    def done(self) -> dict:
+        result = self.agent._session_result(
+            self.session_number,
+            self.splitter.visible.strip(),
+            self.memory_updates,
+            **self._timings(),
+            thinking=bool(self.thinking_budget)
+        )
+        return {"type": "done", "result": result}
+
+class _JournalStream(_StreamEvents):
+    """Events of export_therapeutic_journal_stream."""
+    
+    step = "export_therapeutic_journal_stream"
+    
+    def __init__(self, agent):
+        super().__init__(agent)
+        self.journal = ""
+    
+    def open(self, memory: dict) -> dict:
+        prompt = self.agent._journal_prompt(memory, self.step)
+        return self._open(JOURNAL_SYSTEM_PROMPT, prompt, estimate_tokens(prompt), 0, expected_output_tokens=700)
+    
+    def feed(self, delta: str) -> list:
+        self.journal += delta
+        return [self._text(delta)]
+    
+    def finish(self) -> list:
+        self._record(self.journal, bool(self.journal.strip()))
+        return []
+    
+    def done(self) -> dict:
+        return {"type": "done", "journal": self.journal, **self._timings()}
+
 class ClaudeTherapeuticAgent:
     """
     Uses Claude with persistent memory (file-based) to maintain and evolve
@@ -21,18 +262,27 @@ class ClaudeTherapeuticAgent:
     Based on: "Memory-Enhanced AI: Building Features with System Prompts" (LIT.AI)
     """
     
-    def __init__(self, claude_api_key: str, participant_id: str, memory_dir: str = "./protocols"):
-        self.client = anthropic.Anthropic(api_key=claude_api_key)
+    def __init__(self, claude_api_key: str, participant_id: str, memory_dir: str = "./protocols",
+                 hedger=None, client=None, router=None, memory_cache=None):
+        # client: pre-built Anthropic-compatible client (e.g. a ReplayClient from src.replay)
+        self.client = client or create_client("anthropic", api_key=claude_api_key)
         self.model = "claude-3-5-sonnet-20241022"
         self.participant_id = participant_id
         self.memory_dir = Path(memory_dir) / f"participant_{participant_id}"
-        self.memory_dir.mkdir(parents=True, exist_ok=True)
+        self.budget = TokenBudget(self.model, max_output_tokens=8192)
+        # Optional src.hedging.HedgedCaller, used for the read-only summary/journal exports
+        self.hedger = hedger
+        # Optional src.model_routing.ModelRouter; self.model stays the baseline
+        self.router = router
+        # src.memory_cache.MemoryCache; the process-wide cache unless one is given
+        self.memory_cache = memory_cache or shared_memory_cache
         
         # Initialize memory files if they don't exist
         self._initialize_memory_files()
     
     def _initialize_memory_files(self):
         """Create empty memory files for new participants."""
+        self.memory_dir.mkdir(parents=True, exist_ok=True)
         files = {
             "assessment.md": "# Clinical Assessment\n\n(To be populated in first session)",
             "sessions.md": "# Session Notes\n\n",
@@ -44,32 +294,247 @@ class ClaudeTherapeuticAgent:
         for filename, default_content in files.items():
             filepath = self.memory_dir / filename
             if not filepath.exists():
-                filepath.write_text(default_content)
+                self.memory_cache.write_file(filepath, default_content)
     
     def _read_all_memory(self) -> dict:
-        """Read all memory files and return as dict."""
-        memory = {}
-        for file in self.memory_dir.glob("*.md"):
-            memory[file.stem] = file.read_text()
-        return memory
+        """Read all memory files and return as dict (unchanged files come from the cache)."""
+        return self.memory_cache.read_dir(self.memory_dir)
     
     def _write_memory_file(self, filename: str, content: str):
         """Write content to a memory file."""
-        filepath = self.memory_dir / f"{filename}.md"
-        filepath.write_text(content)
+        self.memory_cache.write_file(self.memory_dir / f"{filename}.md", content)
     
-    def run_session(self, session_number: int, participant_input: str) -> dict:
+    # Memory and provider I/O used by the flows (src.flows); the async agent overrides these
+    
+    def _load_memory(self) -> dict:
+        return self._read_all_memory()
+    
+    def _save_memory_updates(self, session_number: int, memory_updates: dict):
+        self._persist_memory_updates(session_number, memory_updates)
+    
+    def _send(self, kwargs: dict, hedge_key: str = None):
+        """One messages.create request (hedged under hedge_key when given and a hedger is set)."""
+        if hedge_key and self.hedger:
+            return self.hedger.call(hedge_key, self.client.messages.create, **kwargs)
+        return self.client.messages.create(**kwargs)
+    
+    def _create(self, step: str, system: str, prompt: str, expected_output_tokens: int,
+                thinking_budget: int = 0, hedge: bool = False, trimmed: bool = False, model: str = None):
         """
-        Run a therapy session where Claude:
-        1. Reads existing memory
-        2. Responds therapeutically
-        3. AUTONOMOUSLY updates memory (decides what's important)
-        4. Evolves protocol based on what's working
+        Call Claude with a max_tokens budget sized from the prompt.
+        Truncated outputs are continued by prefilling the partial text
+        (continuations run without thinking, which cannot be combined with prefill).
+        Returns (text_blocks_joined, decision).
+        """
+        return drive(self._create_flow(step, system, prompt, expected_output_tokens,
+                                       thinking_budget, hedge, trimmed, model))
+    
+    def _create_flow(self, step: str, system: str, prompt: str, expected_output_tokens: int,
+                     thinking_budget: int = 0, hedge: bool = False, trimmed: bool = False, model: str = None):
+        decision = self._plan(step, system, prompt, expected_output_tokens, thinking_budget, trimmed, model)
+        kwargs = self._request(decision, system, prompt, thinking_budget)
+        response = yield partial(self._send, kwargs, f"claude:{step}:{decision['model']}" if hedge else None)
+        text = yield from self._continuation_flow(
+            decision, system, prompt, expected_output_tokens, self._response_text(response), response
+        )
+        return text, decision
+    
+    def _continuation_flow(self, decision: dict, system: str, prompt: str, expected_output_tokens: int,
+                           text: str, response):
+        """Continue a reply cut at max_tokens; returns the stitched text."""
+        while is_truncated(response) and decision["continuations"] < MAX_CONTINUATIONS:
+            # A final assistant turn can't end in whitespace
+            text = text.rstrip()
+            max_tokens = self.budget.plan_continuation(decision, text, expected_output_tokens)
+            if not max_tokens:
+                break
+            response = yield partial(self._send, self._continuation_request(decision, system, prompt, text, max_tokens))
+            text += response.content[0].text
+        
+        decision["truncated"] = is_truncated(response)
+        return text
+    
+    def _plan(self, step: str, system: str, prompt: str, expected_output_tokens: int,
+              thinking_budget: int, trimmed: bool = False, model: str = None) -> dict:
+        # max_tokens covers the thinking budget: the API rejects budget_tokens >= max_tokens
+        decision = self.budget.plan(
+            step, system + prompt, expected_output_tokens + thinking_budget, model=model,
+            min_output_tokens=thinking_budget + self.budget.min_output_tokens if thinking_budget else None
+        )
+        decision["trimmed"] = trimmed
+        return decision
+    
+    def _run_step(self, step: str, system: str, prompt: str, expected_output_tokens: int, parse,
+                  validate=bool, input_tokens: int = None, thinking_budget: int = 0,
+                  hedge: bool = False, trimmed: bool = False):
+        """
+        _create + parse. With a router, the model (and whether to think) is
+        chosen per call from input_tokens (default: the whole prompt), and an
+        invalid result is retried on a larger model.
+        """
+        if not self.router:
+            text, _ = self._create(step, system, prompt, expected_output_tokens, thinking_budget, hedge, trimmed)
+            return parse(text)
+        
+        def call(route):
+            text, _ = self._create(step, system, prompt, expected_output_tokens,
+                                   self._route_thinking(route, thinking_budget), hedge, trimmed, route["model"])
+            return text
+        
+        prompt_tokens = estimate_tokens(system + prompt)
+        return self.router.run(
+            "claude", step, input_tokens if input_tokens is not None else prompt_tokens, self.model,
+            call, parse, validate, prompt_tokens=prompt_tokens
+        )
+    
+    @staticmethod
+    def _route_thinking(route: dict, thinking_budget: int) -> int:
+        """Thinking budget for a routed call (the table can switch thinking on or off)."""
+        if route["thinking"] is None:
+            return thinking_budget
+        return (thinking_budget or THINKING_BUDGET_TOKENS) if route["thinking"] else 0
+    
+    def _stream_route(self, step: str, input_tokens: int, thinking_budget: int) -> tuple:
+        """
+        (route, model, thinking_budget) for a streamed call. Streams are routed
+        but never escalated: text already shown to the participant can't be retried.
+        """
+        if not self.router:
+            return None, self.model, thinking_budget
+        route = self.router.route("claude", step, input_tokens, self.model)
+        return route, route["model"], self._route_thinking(route, thinking_budget)
+    
+    def _record_stream(self, route: dict, step: str, prompt: str, text: str, ok: bool, latency_s: float):
+        if route:
+            self.router.record("claude", step, self.model, route, ok, text, latency_s, estimate_tokens(prompt))
+    
+    def _request(self, decision: dict, system: str, prompt: str, thinking_budget: int = 0) -> dict:
+        """messages.create/stream kwargs for the first request of a step."""
+        kwargs = {}
+        if thinking_budget:
+            kwargs["thinking"] = {"type": "enabled", "budget_tokens": thinking_budget}
+        
+        kwargs.update(
+            model=decision["model"],
+            max_tokens=decision["max_tokens"],
+            system=system,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return kwargs
+    
+    def _continuation_request(self, decision: dict, system: str, prompt: str, text: str,
+                              max_tokens: int) -> dict:
+        """Prefill the partial reply so Claude resumes where it was cut off."""
+        messages = [{"role": "user", "content": prompt}]
+        if text:
+            messages.append({"role": "assistant", "content": text})
+        return dict(
+            model=decision["model"],
+            max_tokens=max_tokens,
+            system=system,
+            messages=messages
+        )
+    
+    @staticmethod
+    def _response_text(response) -> str:
+        """Final text block of a reply (thinking blocks come first)."""
+        text = ""
+        for block in response.content:
+            if block.type == "text":
+                text = block.text
+        return text
+    
+    def _stream(self, step: str, system: str, prompt: str, expected_output_tokens: int,
+                thinking_budget: int = 0, trimmed: bool = False, model: str = None):
+        """
+        Streaming counterpart of _create: yields text deltas as they arrive.
+        A reply cut at max_tokens is continued (non-streamed) and yielded too.
+        Sets self.last_stream_decision when done.
+        """
+        decision = self._plan(step, system, prompt, expected_output_tokens, thinking_budget, trimmed, model)
+        self.last_stream_decision = decision
+        
+        text = ""
+        with self.client.messages.stream(**self._request(decision, system, prompt, thinking_budget)) as stream:
+            for delta in stream.text_stream:
+                text += delta
+                yield delta
+            response = stream.get_final_message()
+        
+        continued = drive(self._continuation_flow(decision, system, prompt, expected_output_tokens, text, response))
+        if decision["continuations"]:
+            # Continued after the streamed text minus its trailing whitespace
+            yield continued[len(text.rstrip()):]
+    
+    def _run_stream(self, events_class, *args):
+        """
+        Drive a *_stream call: stream the reply through an events object
+        (_SessionStream / _JournalStream), then persist any memory updates.
+        """
+        events = events_class(self, *args)
+        for delta in self._stream(**events.open(self._load_memory())):
+            yield from events.feed(delta)
+        yield from events.finish()
+        
+        # PERSIST MEMORY UPDATES once the stream is complete
+        if events.memory_updates:
+            self._save_memory_updates(events.session_number, events.memory_updates)
+        yield events.done()
+    
+    def _stage_models(self, step: str) -> list:
+        """Models this step's request may be routed to (memory fits the smallest window)."""
+        if not self.router:
+            return [self.model]
+        return self.router.candidate_models("claude", step, self.model)
+    
+    def _memory_context(self, step: str, memory: dict, reserved_tokens: int) -> tuple:
+        """
+        Render memory for the prompt, trimming the longest files if the
+        whole history would not fit in the context window.
+        Returns (memory_context, was_trimmed).
+        """
+        return self._fit_memory(
+            memory,
+            self.budget.input_capacity(reserved_tokens, 1500, self._stage_models(step)),
+            lambda memory: "\n\n".join([f"## {name}\n{content}" for name, content in memory.items()])
+        )
+    
+    def _fit_memory(self, memory: dict, capacity: int, render) -> tuple:
+        """
+        render(memory), halving the longest file until it fits capacity tokens.
+        Stops when the longest file is down to the trim marker: whatever still
+        doesn't fit is left to plan(), which refuses to send it.
+        Returns (rendered, was_trimmed).
+        """
+        memory = dict(memory)
+        trimmed = False
+        rendered = render(memory)
+        while estimate_tokens(rendered) > capacity and memory:
+            name = max(memory, key=lambda n: len(memory[n]))
+            shorter = self.budget.trim(memory[name], estimate_tokens(memory[name]) // 2)
+            if len(memory[name]) <= len(TRIM_MARKER) or len(shorter) >= len(memory[name]):
+                break
+            memory[name] = shorter
+            trimmed = True
+            rendered = render(memory)
+        return rendered, trimmed
+    
+    def _session_prompts(self, session_number: int, participant_input: str, memory: dict = None,
+                         step: str = "run_session") -> tuple:
+        """
+        Build the session prompts from current memory (read here unless given).
+        Returns (system_prompt, user_message, expected_output_tokens, memory_trimmed).
         """
         
         # READ MEMORY
-        memory = self._read_all_memory()
-        memory_context = "\n\n".join([f"## {name}\n{content}" for name, content in memory.items()])
+        self.budget.reset()
+        if memory is None:
+            memory = self._read_all_memory()
+        # Therapeutic reply + one memory update per file
+        expected_output = 800 + len(memory) * 150
+        memory_context, memory_trimmed = self._memory_context(
+            step, memory, expected_output + THINKING_BUDGET_TOKENS + estimate_tokens(participant_input)
+        )
         
         # SYSTEM PROMPT WITH MEMORY AUTONOMY
         system_prompt = f"""You are Dr. Empathy, a trauma-informed therapist specializing in climate anxiety.
@@ -129,71 +594,124 @@ Please:
   }}
 }}"""
 
-        # CALL CLAUDE WITH EXTENDED THINKING (FOR DEEP REASONING)
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=3000,
-            thinking={
-                "type": "enabled",
-                "budget_tokens": 2000  # Let Claude reason deeply about memory
-            },
-            system=system_prompt,
-            messages=[{
-                "role": "user",
-                "content": user_message
-            }]
+        return system_prompt, user_message, expected_output, memory_trimmed
+    
+    def _persist_memory_updates(self, session_number: int, memory_updates: dict):
+        """
+        Apply Claude's memory_updates to the memory files (autonomous curation).
+        Runs under the participant's process-wide lock, so concurrent sessions
+        (threads, other agent instances) never lose each other's appends.
+        """
+        with self.memory_cache.lock(self.memory_dir):
+            for filename, content in memory_updates.items():
+                if filename.endswith(".md"):
+                    filename = filename[:-3]  # Remove .md
+                
+                # Append to existing file (except assessment, which is singleton)
+                if filename == "assessment.md":
+                    self._write_memory_file(filename, content)
+                else:
+                    existing = self.memory_cache.read_file(self.memory_dir / f"{filename}.md")
+                    updated = existing + f"\n\n[Session #{session_number}]\n{content}"
+                    self._write_memory_file(filename, updated)
+    
+    def run_session(self, session_number: int, participant_input: str) -> dict:
+        """
+        Run a therapy session where Claude:
+        1. Reads existing memory
+        2. Responds therapeutically
+        3. AUTONOMOUSLY updates memory (decides what's important)
+        4. Evolves protocol based on what's working
+        """
+        return drive(self._session_flow(session_number, participant_input))
+    
+    def _session_flow(self, session_number: int, participant_input: str):
+        memory = yield self._load_memory
+        system_prompt, user_message, expected_output, memory_trimmed = self._session_prompts(
+            session_number, participant_input, memory
         )
         
-        # PARSE RESPONSE
-        full_response = ""
-        memory_updates = {}
+        # CALL CLAUDE WITH EXTENDED THINKING (FOR DEEP REASONING)
+        # EXTRACT MEMORY UPDATES FROM RESPONSE (a reply without them fails validation)
+        full_response, memory_updates = yield partial(
+            self._run_step,
+            "run_session",
+            system_prompt,
+            user_message,
+            expected_output_tokens=expected_output,
+            parse=lambda text: (text, parse_memory_updates(text)),
+            validate=lambda result: result[1],
+            input_tokens=estimate_tokens(participant_input),  # routed on the new message, not memory
+            thinking_budget=THINKING_BUDGET_TOKENS,  # Let Claude reason deeply about memory
+            trimmed=memory_trimmed
+        )
         
-        for block in response.content:
-            if block.type == "text":
-                full_response = block.text
+        # PERSIST MEMORY UPDATES (AUTONOMOUS CURATION)
+        yield partial(self._save_memory_updates, session_number, memory_updates)
         
-        # EXTRACT MEMORY UPDATES FROM RESPONSE
-        try:
-            # Find JSON in response
-            import re
-            json_match = re.search(r'\{[\s\S]*"memory_updates"[\s\S]*\}', full_response)
-            if json_match:
-                parsed = json.loads(json_match.group())
-                memory_updates = parsed.get("memory_updates", {})
-        except json.JSONDecodeError:
-            pass
+        return self._session_result(
+            session_number, full_response.split("memory_updates")[0].strip(), memory_updates
+        )
+    
+    def _session_result(self, session_number: int, therapeutic_response: str, memory_updates: dict,
+                        **metadata) -> dict:
+        return SessionResult(
+            session_number=session_number,
+            therapeutic_response=therapeutic_response,
+            memory_updates_applied=list(memory_updates.keys()),
+            protocol_evolved="protocol_evolution.md" in memory_updates,
+            timestamp=datetime.now().isoformat(),
+            metadata={
+                **metadata,
+                "token_budget": self.budget.summary()
+            }
+        ).to_dict()
+    
+    def run_session_stream(self, session_number: int, participant_input: str, thinking: bool = False):
+        """
+        Streaming variant of run_session for participant-facing UIs.
         
-        # PERSIST MEMORY UPDATES (AUTONOMOUS CURATION)
-        for filename, content in memory_updates.items():
-            if filename.endswith(".md"):
-                filename = filename[:-3]  # Remove .md
-            
-            # Append to existing file (except assessment, which is singleton)
-            if filename == "assessment.md":
-                self._write_memory_file(filename, content)
-            else:
-                existing = (self.memory_dir / f"{filename}.md").read_text()
-                updated = existing + f"\n\n[Session #{session_number}]\n{content}"
-                self._write_memory_file(filename, updated)
+        Extended thinking is off by default: with it on, the first visible
+        token waits for the whole thinking phase (up to THINKING_BUDGET_TOKENS),
+        which defeats streaming. Pass thinking=True to trade time to first
+        token for run_session's deeper reasoning.
         
-        return {
-            "session_number": session_number,
-            "therapeutic_response": full_response.split("memory_updates")[0].strip(),
-            "memory_updates_applied": list(memory_updates.keys()),
-            "protocol_evolved": "protocol_evolution.md" in memory_updates,
-            "timestamp": datetime.now().isoformat()
-        }
+        Yields events:
+        - {"type": "text", "text": "..."}: therapeutic text, as it arrives
+        - {"type": "memory_updates", "updates": {...}}: as soon as the trailing
+          JSON completes (persisted only after the stream ends)
+        - {"type": "done", "result": {...}}: same shape as run_session, plus
+          time_to_first_token_s, total_time_s and thinking
+        """
+        return self._run_stream(_SessionStream, session_number, participant_input, thinking)
     
     def get_protocol_summary(self) -> dict:
         """
         Claude reads its own memory and summarizes the therapeutic protocol
         This shows how protocol has evolved across sessions
         """
+        return drive(self._summary_flow())
+    
+    def _summary_flow(self):
+        memory = yield self._load_memory
+        # Parse JSON from response; an unparseable reply fails validation
+        return (yield partial(
+            self._run_step,
+            "get_protocol_summary",
+            SUMMARY_SYSTEM_PROMPT,
+            self._summary_prompt(memory),
+            expected_output_tokens=1200,
+            parse=parse_protocol_summary,
+            validate=lambda summary: "raw" not in summary,
+            hedge=True
+        ))
+    
+    def _summary_prompt(self, memory: dict = None) -> str:
+        if memory is None:
+            memory = self._read_all_memory()
+        memory_context, _ = self._memory_context("get_protocol_summary", memory, 2000)
         
-        memory = self._read_all_memory()
-        memory_context = "\n\n".join([f"## {name}\n{content}" for name, content in memory.items()])
-        
-        summary_prompt = f"""Based on the persistent memory below, provide a comprehensive therapeutic protocol summary:
+        return f"""Based on the persistent memory below, provide a comprehensive therapeutic protocol summary:
 
 {memory_context}
 
@@ -208,36 +726,48 @@ Generate a JSON summary:
   "breakthrough_moments": ["major shifts in participant's understanding"],
   "protocol_version": "current iteration of therapeutic protocol"
 }}"""
-
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            system="You are a clinical documentation expert. Summarize the therapeutic protocol from persistent memory.",
-            messages=[{"role": "user", "content": summary_prompt}]
-        )
-        
-        # Parse JSON from response
-        try:
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', response.content[0].text)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        return {"raw": response.content[0].text}
     
     def export_therapeutic_journal(self) -> str:
         """
         Export the full therapeutic journey as a readable narrative
         (This is what participants can review themselves)
         """
+        return drive(self._journal_flow())
+    
+    def _journal_flow(self):
+        memory = yield self._load_memory
+        return (yield partial(
+            self._run_step,
+            "export_therapeutic_journal",
+            JOURNAL_SYSTEM_PROMPT,
+            self._journal_prompt(memory),
+            expected_output_tokens=700,  # 2-3 paragraphs
+            parse=lambda text: text,
+            validate=str.strip,
+            hedge=True
+        ))
+    
+    def export_therapeutic_journal_stream(self):
+        """
+        Streaming variant of export_therapeutic_journal.
+        Yields {"type": "text", "text": ...} events, then
+        {"type": "done", "journal": ..., "time_to_first_token_s": ..., "total_time_s": ...}.
+        """
+        return self._run_stream(_JournalStream)
+    
+    def _journal_prompt(self, memory: dict = None, step: str = "export_therapeutic_journal") -> str:
+        if memory is None:
+            memory = self._read_all_memory()
+        # sessions.md only ever grows: fit the JSON like the session prompt's memory
+        journey, _ = self._fit_memory(
+            memory,
+            self.budget.input_capacity(int(700 * 1.25), 300, self._stage_models(step)),
+            lambda memory: json.dumps(memory, indent=2)
+        )
         
-        memory = self._read_all_memory()
-        
-        export_prompt = f"""Based on this participant's therapeutic journey:
+        return f"""Based on this participant's therapeutic journey:
 
-{json.dumps(memory, indent=2)}
+{journey}
 
 Write a compassionate, validating therapeutic journal entry that:
 1. Summarizes their anxiety journey
@@ -248,15 +778,6 @@ Write a compassionate, validating therapeutic journal entry that:
 Make it personal, warm, and something they'd want to read back to themselves.
 Format: A 2-3 paragraph narrative they can print and keep."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            system="You are a compassionate therapist creating a therapeutic narrative.",
-            messages=[{"role": "user", "content": export_prompt}]
-        )
-        
-        return response.content[0].text
-
 # ============ USAGE EXAMPLE ============
 
 if __name__ == "__main__":
@@ -6,53 +6,119 @@ Ties together Groq, Letta, and Claude in a single pipeline.
 from src.causal_reasoning_engine import CausalReasoningEngine
 from src.letta_trauma_agent import TraumaJourneyAgent
 from src.claude_persistent_protocol import ClaudeTherapeuticAgent
+from src.causal_graph import CausalGraphStore
+from src.transcript_corpus import TranscriptCorpus
 import os
 
-def process_listen_labs_transcripts(transcripts: list):
+# Provider SDKs each stage needs (imported lazily via src.providers)
+STAGE_PROVIDERS = {
+    "groq": ["groq"],
+    "letta": ["letta"],
+    "claude": ["anthropic"],
+}
+
+ALL_STAGES = ("groq", "letta", "claude")
+
+def process_listen_labs_transcripts(transcripts: list, stages: tuple = ALL_STAGES, hedger=None, router=None):
     """
     Complete pipeline:
     1. Groq analyzes cause
     2. Letta learns effect
     3. Claude evolves approach
+    
+    Pass a subset of stages (e.g. ("groq",)) for stage-only workers; only
+    the SDKs for those stages are ever imported.
+    
+    hedger: optional src.hedging.HedgedCaller shared across the cohort, so
+    hedge delays are learned from every participant's calls. Its counters are
+    cohort-wide, so they are printed at the end rather than put in results.
+    
+    router: optional src.model_routing.ModelRouter shared across the cohort.
+    Its metrics are reset at the start of the run and printed at the end
+    (per-call decisions: router.decisions()); learned failure rates carry over.
     """
     
+    participants = ((f"P_{i:03d}", transcript) for i, transcript in enumerate(transcripts))
+    return _process_cohort(participants, stages, hedger, router)
+
+def process_corpus(corpus_path: str, shard_index: int = 0, shard_count: int = 1,
+                   stages: tuple = ALL_STAGES, hedger=None, router=None):
+    """
+    Same pipeline over a packed corpus (src/transcript_corpus.py), keyed by
+    the corpus participant ids. Run one process per shard:
+    process_corpus("data/corpus.cctc", shard_index=k, shard_count=n).
+    Transcripts are read from the memory-mapped file one at a time.
+    """
+    
+    with TranscriptCorpus(corpus_path) as corpus:
+        participant_ids = corpus.shard(shard_index, shard_count)
+        print(f"[Corpus] Shard {shard_index + 1}/{shard_count}: {len(participant_ids)} of {len(corpus)} transcripts")
+        return _process_cohort(corpus.items(participant_ids), stages, hedger, router)
+
+def _process_cohort(participants, stages: tuple, hedger, router) -> list:
+    """Run the selected stages for each (participant_id, transcript)."""
+    
+    unknown = set(stages) - set(ALL_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {sorted(unknown)}")
+    
     groq_api_key = os.getenv("GROQ_API_KEY")
     letta_api_key = os.getenv("LETTA_API_KEY")
     claude_api_key = os.getenv("CLAUDE_API_KEY")
     
     results = []
+    if router:
+        router.reset_metrics()
     
-    for i, transcript in enumerate(transcripts):
-        participant_id = f"P_{i:03d}"
-        
+    for participant_id, transcript in participants:
         print(f"\n[{participant_id}] Processing...")
+        result = {"participant_id": participant_id}
         
         # GROQ: Causal analysis
-        print(f"[{participant_id}] Step 1/3: Groq causal reasoning...")
-        groq_engine = CausalReasoningEngine(groq_api_key)
-        causal_analysis = groq_engine.analyze_transcript_end_to_end(transcript)
+        if "groq" in stages:
+            print(f"[{participant_id}] Step 1/3: Groq causal reasoning...")
+            groq_engine = CausalReasoningEngine(groq_api_key, hedger=hedger, router=router)
+            result["groq_analysis"] = groq_engine.analyze_transcript_end_to_end(transcript)
         
         # LETTA: Memory tracking (Session 1)
-        print(f"[{participant_id}] Step 2/3: Letta memory initialization...")
-        letta_agent = TraumaJourneyAgent(letta_api_key, participant_id)
-        letta_agent.initialize_agent(f"Participant {participant_id}", transcript[:100])
-        letta_result = letta_agent.run_session(1, transcript)
+        if "letta" in stages:
+            print(f"[{participant_id}] Step 2/3: Letta memory initialization...")
+            letta_agent = TraumaJourneyAgent(letta_api_key, participant_id)
+            letta_agent.initialize_agent(f"Participant {participant_id}", transcript[:100])
+            result["letta_memory"] = letta_agent.run_session(1, transcript)
         
         # CLAUDE: Therapeutic protocol
-        print(f"[{participant_id}] Step 3/3: Claude protocol evolution...")
-        claude_agent = ClaudeTherapeuticAgent(claude_api_key, participant_id)
-        claude_result = claude_agent.run_session(1, transcript)
+        if "claude" in stages:
+            print(f"[{participant_id}] Step 3/3: Claude protocol evolution...")
+            claude_agent = ClaudeTherapeuticAgent(claude_api_key, participant_id, hedger=hedger, router=router)
+            result["claude_protocol"] = claude_agent.run_session(1, transcript)
         
         # Aggregate results
-        results.append({
-            "participant_id": participant_id,
-            "groq_analysis": causal_analysis,
-            "letta_memory": letta_result,
-            "claude_protocol": claude_result
-        })
+        results.append(result)
+    
+    if hedger:
+        print(f"[Hedging] {hedger.metrics()}")
+    if router:
+        print(f"[Routing] {router.metrics()}")
     
     return results
 
+def process_participant_session(participant_id: str, transcript: str, session_number: int = None,
+                                graph_dir: str = "./causal_graphs", hedger=None, router=None) -> dict:
+    """
+    Incremental Groq analysis for one new session of a returning participant.
+    Only the new session text is analyzed; the stored causal graph is updated.
+    """
+    
+    store = CausalGraphStore(graph_dir)
+    graph = store.load(participant_id)
+    
+    groq_engine = CausalReasoningEngine(os.getenv("GROQ_API_KEY"), hedger=hedger, router=router)
+    analysis = groq_engine.analyze_session_incremental(transcript, graph, session_number)
+    
+    store.save(graph)
+    return analysis
+
 if __name__ == "__main__":
     # Load sample transcripts
     sample_transcripts = [
@@ -0,0 +1,199 @@
+# File: evidence_grounding.py
+# Local verification that quoted evidence actually appears in the transcript
+
+from bisect import bisect_right
+from collections import defaultdict
+import re
+import time
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_ELLIPSIS = re.compile(r"\.{3,}|…")
+
+SHINGLE_SIZE = 3
+MIN_FRAGMENT_TOKENS = 2  # shorter fragments ("I", "sleep") prove nothing
+
+
+class TranscriptIndex:
+    """
+    One-time index over a transcript for evidence lookups.
+
+    - Tokens are lowercased words, so quotes match regardless of case,
+      punctuation and whitespace ("I can't sleep" == "i can't  sleep")
+    - Exact lookup: substring search over the joined token string
+    - Fuzzy lookup: word 3-gram shingles -> positions; an evidence string's
+      shingles vote for an alignment offset, score = fraction that agree
+
+    Build is O(n) in transcript length and each lookup is O(m + hits) in the
+    evidence length, so grounding a whole cohort costs far less than one API call.
+    """
+
+    def __init__(self, transcript: str):
+        self.transcript = transcript
+        self.spans = []  # (start, end) char offsets in the original transcript
+        tokens = []
+        for match in _WORD.finditer(transcript):
+            tokens.append(match.group().lower())
+            self.spans.append(match.span())
+        self.tokens = tokens
+
+        # Joined form for exact search, with each token's start offset in it
+        self.joined = " ".join(tokens)
+        self.joined_starts = []
+        pos = 0
+        for token in tokens:
+            self.joined_starts.append(pos)
+            pos += len(token) + 1
+
+        self.shingles = defaultdict(list)
+        for i in range(len(tokens) - SHINGLE_SIZE + 1):
+            self.shingles[tuple(tokens[i:i + SHINGLE_SIZE])].append(i)
+
+    def _char_span(self, first_token: int, last_token: int) -> tuple:
+        return self.spans[first_token][0], self.spans[last_token][1]
+
+    def find_exact(self, tokens: list):
+        """Token index of an exact (normalized) occurrence, or None."""
+        needle = " ".join(tokens)
+        pos = self.joined.find(needle)
+        while pos != -1:
+            idx = bisect_right(self.joined_starts, pos) - 1
+            end = pos + len(needle)
+            # Must start and end on token boundaries
+            if self.joined_starts[idx] == pos and (end == len(self.joined) or self.joined[end] == " "):
+                return idx
+            pos = self.joined.find(needle, pos + 1)
+        return None
+
+    def find_fuzzy(self, tokens: list) -> tuple:
+        """Best (score, first_token, last_token) alignment by shingle voting."""
+        n_shingles = len(tokens) - SHINGLE_SIZE + 1
+        if n_shingles <= 0:
+            return 0.0, None, None
+        votes = defaultdict(int)
+        for i in range(n_shingles):
+            for pos in self.shingles.get(tuple(tokens[i:i + SHINGLE_SIZE]), ()):
+                votes[pos - i] += 1
+        if not votes:
+            return 0.0, None, None
+        offset, count = max(votes.items(), key=lambda item: (item[1], -item[0]))
+        first = max(0, offset)
+        last = min(len(self.tokens) - 1, offset + len(tokens) - 1)
+        return count / n_shingles, first, last
+
+    def ground(self, evidence: str) -> dict:
+        """
+        Score how well an evidence string is supported by the transcript.
+
+        Evidence with ellipses ("I panic... then I can't sleep") is split and
+        each fragment grounded separately; the score is weighted by fragment length.
+        Returns {"grounding_score", "grounding_match", "evidence_offsets"}.
+        """
+        fragments = []
+        for part in _ELLIPSIS.split(evidence or ""):
+            tokens = [t.lower() for t in _WORD.findall(part)]
+            if len(tokens) >= MIN_FRAGMENT_TOKENS:
+                fragments.append(tokens)
+        if not fragments or not self.tokens:
+            return {"grounding_score": 0.0, "grounding_match": "none", "evidence_offsets": None}
+
+        total = sum(len(f) for f in fragments)
+        score = 0.0
+        exact = True
+        spans = []
+        for tokens in fragments:
+            idx = self.find_exact(tokens)
+            if idx is not None:
+                score += len(tokens)
+                spans.append(self._char_span(idx, idx + len(tokens) - 1))
+                continue
+            exact = False
+            fuzzy, first, last = self.find_fuzzy(tokens)
+            score += fuzzy * len(tokens)
+            if first is not None:
+                spans.append(self._char_span(first, last))
+
+        score = round(score / total, 3)
+        if exact:
+            match = "exact"
+        elif score > 0:
+            match = "fuzzy"
+        else:
+            match = "none"
+        offsets = [min(s for s, _ in spans), max(e for _, e in spans)] if spans else None
+        return {"grounding_score": score, "grounding_match": match, "evidence_offsets": offsets}
+
+
+GROUNDING_KEYS = ("grounding_score", "grounding_match", "evidence_offsets")
+
+
+def strip_grounding(confidence_data: dict) -> dict:
+    """Copy of a {"chain_N": {...}} map without the grounding annotations."""
+    return {
+        key: {
+            **chain,
+            "links": [
+                {k: v for k, v in link.items() if k not in GROUNDING_KEYS}
+                for link in chain.get("links", [])
+            ],
+        }
+        for key, chain in (confidence_data or {}).items()
+    }
+
+
+def _quote_key(evidence: str) -> tuple:
+    return tuple(t.lower() for t in _WORD.findall(evidence or ""))
+
+
+def ground_confidence_analysis(transcript: str, confidence_data: dict, index: TranscriptIndex = None,
+                               verified: dict = None) -> dict:
+    """
+    Annotate every link in a {"chain_N": {...}} map (in place) with
+    grounding_score, grounding_match and evidence_offsets. Returns a summary.
+
+    verified: {quote: grounding annotation} for quotes already grounded
+    against another transcript (evidence from earlier sessions). A link
+    quoting one that isn't an exact match here keeps that annotation.
+    """
+    index = index or TranscriptIndex(transcript)
+    verified = {_quote_key(quote): annotation for quote, annotation in (verified or {}).items()}
+    scores = []
+    for chain in (confidence_data or {}).values():
+        for link in chain.get("links", []):
+            grounding = index.ground(link.get("evidence", ""))
+            if grounding["grounding_match"] != "exact":
+                grounding = verified.get(_quote_key(link.get("evidence")), grounding)
+            link.update(grounding)
+            scores.append(link["grounding_score"])
+    return {
+        "links": len(scores),
+        "grounded": sum(1 for s in scores if s > 0),
+        "ungrounded": sum(1 for s in scores if s == 0),
+        "mean_score": round(sum(scores) / len(scores), 3) if scores else None,
+    }
+
+
+def ground_cohort(items: list) -> dict:
+    """
+    Batch grounding over a cohort.
+
+    items: [(transcript, analysis_dict), ...] where analysis_dict is an
+    analyze_transcript_end_to_end result (annotated in place).
+    """
+    start = time.perf_counter()
+    links = 0
+    ungrounded = 0
+    score_sum = 0.0
+    for transcript, analysis in items:
+        summary = ground_confidence_analysis(transcript, analysis.get("confidence_analysis", {}))
+        analysis["evidence_grounding"] = summary
+        links += summary["links"]
+        ungrounded += summary["ungrounded"]
+        if summary["mean_score"] is not None:
+            score_sum += summary["mean_score"] * summary["links"]
+    return {
+        "participants": len(items),
+        "links": links,
+        "ungrounded": ungrounded,
+        "mean_score": round(score_sum / links, 3) if links else None,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
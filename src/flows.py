@@ -0,0 +1,40 @@
+# File: flows.py
+# Write a multi-step method once, run it blocking or under asyncio
+
+# A flow is a generator that yields a zero-argument callable for every step
+# that does I/O (functools.partial(self.extract_causal_pairs, transcript))
+# and receives that step's result back. The sync classes drive their flows
+# with drive(); the async subclasses (src.async_agents) override the I/O
+# methods as coroutines and drive the same flows with drive_async(), so
+# orchestration, prints and result assembly exist once.
+#
+# An exception raised by a step is thrown back into the flow, so flows can
+# handle per-step failures with an ordinary try/except.
+
+
+def drive(flow):
+    """Run a flow, calling each yielded step; returns the flow's return value."""
+    send, value = flow.send, None
+    while True:
+        try:
+            step = send(value)
+        except StopIteration as done:
+            return done.value
+        try:
+            send, value = flow.send, step()
+        except Exception as e:
+            send, value = flow.throw, e
+
+
+async def drive_async(flow):
+    """drive() for async classes: each yielded step returns an awaitable."""
+    send, value = flow.send, None
+    while True:
+        try:
+            step = send(value)
+        except StopIteration as done:
+            return done.value
+        try:
+            send, value = flow.send, await step()
+        except Exception as e:
+            send, value = flow.throw, e
@@ -0,0 +1,177 @@
+# File: hedging.py
+# Opt-in hedged requests to cut tail latency on idempotent provider calls
+
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+import threading
+import time
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies, per call key (e.g. pipeline step)."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, key: str, latency_s: float):
+        with self._lock:
+            self._samples[key].append(latency_s)
+
+    def percentile(self, key: str, p: float):
+        """p in [0, 1]; None until the key has any samples."""
+        with self._lock:
+            samples = sorted(self._samples[key])
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, int(p * len(samples)))
+        return samples[idx]
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples[key])
+
+
+class HedgedCaller:
+    """
+    Runs a call and, if it hasn't answered by the learned latency percentile,
+    issues one duplicate; the first successful response wins.
+
+    Only use this for idempotent requests (LLM completions whose result is
+    only read, never side effects). The losing request is not cancelled,
+    its result is discarded.
+
+    - percentile: hedge delay = this percentile of recent latencies for the key
+    - min_samples: until then, use default_delay_s
+    - max_extra_load: cap on hedges / calls (0.1 = at most 10% extra requests)
+    """
+
+    def __init__(self, percentile: float = 0.95, max_extra_load: float = 0.1,
+                 min_samples: int = 20, default_delay_s: float = 5.0,
+                 window: int = 200, max_workers: int = 32):
+        self.percentile = percentile
+        self.max_extra_load = max_extra_load
+        self.min_samples = min_samples
+        self.default_delay_s = default_delay_s
+        self.tracker = LatencyTracker(window)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.latency_saved_s = 0.0
+
+    def hedge_delay(self, key: str) -> float:
+        if self.tracker.count(key) < self.min_samples:
+            return self.default_delay_s
+        return self.tracker.percentile(key, self.percentile)
+
+    def _timed(self, key: str, fn, kwargs: dict, started: threading.Event = None):
+        if started:
+            started.set()
+        start = time.perf_counter()
+        result = fn(**kwargs)
+        latency = time.perf_counter() - start
+        self.tracker.record(key, latency)
+        return result, latency
+
+    def _may_hedge(self) -> bool:
+        with self._lock:
+            if (self.hedged + 1) / self.calls > self.max_extra_load:
+                return False
+            self.hedged += 1
+            return True
+
+    def call(self, key: str, fn, **kwargs):
+        """Call fn(**kwargs), hedging it once if it is slower than usual for this key."""
+        with self._lock:
+            self.calls += 1
+        started = threading.Event()
+        primary = self._pool.submit(self._timed, key, fn, kwargs, started)
+        # Time the hedge delay from when the primary runs, not from when it
+        # was queued: a call waiting for a free worker isn't slow yet
+        started.wait()
+        start = time.perf_counter()
+
+        done, _ = wait([primary], timeout=self.hedge_delay(key))
+        if done or not self._may_hedge():
+            return primary.result()[0]
+
+        hedge = self._pool.submit(self._timed, key, fn, kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                result, _ = future.result()
+                if future is hedge:
+                    self._credit_hedge(primary, time.perf_counter() - start)
+                return result
+        raise error
+
+    async def _atimed(self, key: str, fn, kwargs: dict):
+        start = time.perf_counter()
+        result = await fn(**kwargs)
+        latency = time.perf_counter() - start
+        self.tracker.record(key, latency)
+        return result, latency
+
+    async def acall(self, key: str, fn, **kwargs):
+        """asyncio counterpart of call(): fn is a coroutine function (async SDK method)."""
+        with self._lock:
+            self.calls += 1
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(self._atimed(key, fn, kwargs))
+
+        done, _ = await asyncio.wait([primary], timeout=self.hedge_delay(key))
+        if done or not self._may_hedge():
+            return (await primary)[0]
+
+        hedge = asyncio.ensure_future(self._atimed(key, fn, kwargs))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                result, _ = task.result()
+                if task is hedge:
+                    self._credit_hedge(primary, time.perf_counter() - start)
+                for loser in pending:
+                    # Not cancelled (same as call()); just don't leave its error unretrieved
+                    loser.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return result
+        raise error
+
+    def _credit_hedge(self, primary, winner_elapsed: float):
+        """Once the slow primary finishes, count how much waiting the hedge saved."""
+        with self._lock:
+            self.hedge_wins += 1
+
+        def on_primary_done(future):
+            if future.exception() is None:
+                _, primary_latency = future.result()
+                with self._lock:
+                    self.latency_saved_s += max(0.0, primary_latency - winner_elapsed)
+
+        primary.add_done_callback(on_primary_done)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "latency_saved_s": round(self.latency_saved_s, 3),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
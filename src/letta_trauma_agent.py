@@ -1,11 +1,65 @@
 # File: letta_trauma_agent.py
 # Deep Letta integration with agentic self-editing memory
 
-from letta_client import Letta, Agent
 from typing import Optional
 import json
 from datetime import datetime
 
+from src.providers import create_client
+
+def parse_session_response(session_number: int, response) -> dict:
+    """
+    Walk a Letta response and collect the reply plus tool calls.
+    Module-level so replayed responses can be benchmarked without an agent.
+    """
+    
+    # Collect all messages (including tool calls)
+    session_analysis = {
+        "session_number": session_number,
+        "agent_response": response.messages[-1].content if response.messages else "",
+        "memory_updates_triggered": [],
+        "tool_calls": []
+    }
+    
+    # Extract tool calls (where self-editing happens)
+    for msg in response.messages:
+        if hasattr(msg, 'tool_calls'):
+            for tool_call in msg.tool_calls or []:
+                session_analysis["tool_calls"].append({
+                    "tool": tool_call.name,
+                    "input": tool_call.input
+                })
+                
+                # If memory_replace was called, that's self-editing
+                if tool_call.name == "memory_replace":
+                    session_analysis["memory_updates_triggered"].append(
+                        tool_call.input.get("value", "")[:100]  # First 100 chars
+                    )
+    
+    return session_analysis
+
+def parse_progress_report(response) -> dict:
+    """Progress report reply -> parsed JSON, or an error dict with the raw text."""
+    try:
+        report = json.loads(response.messages[-1].content)
+        return report
+    except:
+        return {"error": "Could not parse report", "raw": response.messages[-1].content}
+
+# Community-validated strategies shared with every agent (anonymized)
+CROSS_LEARNING_PROMPT = """You're part of a support community learning system.
+
+Other participants (anonymized) have found these strategies helpful:
+- Nature-based coping (walks, forest bathing, gardening)
+- Local climate action groups
+- Sleep + anxiety management (linked)
+- Reframing: "I can't stop climate change, but I CAN..."
+
+Given what you know about this participant from previous sessions,
+which of these might be most relevant to suggest in future sessions?
+
+Update your coping_inventory to include these community-validated strategies."""
+
 class TraumaJourneyAgent:
     """
     Letta agent that tracks and learns participant's climate anxiety journey.
@@ -23,8 +77,9 @@ class TraumaJourneyAgent:
       * Progress metrics over time
     """
     
-    def __init__(self, letta_api_key: str, participant_id: str):
-        self.client = Letta(token=letta_api_key)
+    def __init__(self, letta_api_key: str, participant_id: str, client=None):
+        # client: pre-built Letta-compatible client (e.g. a ReplayClient from src.replay)
+        self.client = client or create_client("letta", token=letta_api_key)
         self.participant_id = participant_id
         self.agent = None
         self.session_count = 0
@@ -34,7 +89,14 @@ class TraumaJourneyAgent:
         Create Letta agent for this participant with initial memory blocks.
         """
         
-        self.agent = self.client.agents.create(
+        self.agent = self.client.agents.create(**self._agent_config(participant_name, intake_summary))
+        
+        print(f"[Letta] Agent created: {self.agent.id}")
+        return self.agent
+    
+    def _agent_config(self, participant_name: str, intake_summary: str) -> dict:
+        """agents.create kwargs (shared with the async agent in src.async_agents)."""
+        return dict(
             model="openai/gpt-4-turbo",
             embedding="openai/text-embedding-3-small",
             name=f"trauma_agent_{self.participant_id}",
@@ -111,9 +173,6 @@ EXAMPLE ENTRY (after session 1):
                 "send_message"
             ]
         )
-        
-        print(f"[Letta] Agent created: {self.agent.id}")
-        return self.agent
     
     def run_session(self, session_number: int, session_transcript: str) -> dict:
         """
@@ -123,8 +182,21 @@ EXAMPLE ENTRY (after session 1):
         
         self.session_count = session_number
         
+        response = self.client.agents.messages.create(
+            agent_id=self.agent.id,
+            messages=[
+                {
+                    "role": "user",
+                    "content": self._session_prompt(session_number, session_transcript)
+                }
+            ]
+        )
+        
+        return parse_session_response(session_number, response)
+    
+    def _session_prompt(self, session_number: int, session_transcript: str) -> str:
         # Initial prompt telling Letta to self-edit
-        session_prompt = f"""We're starting Session #{session_number}.
+        return f"""We're starting Session #{session_number}.
 
 IMPORTANT: You should proactively UPDATE YOUR OWN MEMORY during this session.
 
@@ -143,41 +215,6 @@ Now, analyze this session and:
 3. Suggest one concrete next-step or resource for this participant
 
 Remember: Your updates to memory are PERMANENT and will guide future sessions."""
-
-        response = self.client.agents.messages.create(
-            agent_id=self.agent.id,
-            messages=[
-                {
-                    "role": "user",
-                    "content": session_prompt
-                }
-            ]
-        )
-        
-        # Collect all messages (including tool calls)
-        session_analysis = {
-            "session_number": session_number,
-            "agent_response": response.messages[-1].content if response.messages else "",
-            "memory_updates_triggered": [],
-            "tool_calls": []
-        }
-        
-        # Extract tool calls (where self-editing happens)
-        for msg in response.messages:
-            if hasattr(msg, 'tool_calls'):
-                for tool_call in msg.tool_calls:
-                    session_analysis["tool_calls"].append({
-                        "tool": tool_call.name,
-                        "input": tool_call.input
-                    })
-                    
-                    # If memory_replace was called, that's self-editing
-                    if tool_call.name == "memory_replace":
-                        session_analysis["memory_updates_triggered"].append(
-                            tool_call.input.get("value", "")[:100]  # First 100 chars
-                        )
-        
-        return session_analysis
     
     def generate_progress_report(self) -> dict:
         """
@@ -187,7 +224,16 @@ Remember: Your updates to memory are PERMANENT and will guide future sessions.""
         and generates summary of progress.
         """
         
-        search_prompt = f"""Search your conversation history and memory for this participant.
+        response = self.client.agents.messages.create(
+            agent_id=self.agent.id,
+            messages=[{"role": "user", "content": self._progress_prompt()}]
+        )
+        
+        # Parse response as JSON
+        return parse_progress_report(response)
+    
+    def _progress_prompt(self) -> str:
+        return f"""Search your conversation history and memory for this participant.
         
 Generate a progress report covering:
 1. TRAUMA TIMELINE: Key moments shared (use conversation_search to find all mentions of anxiety onset)
@@ -210,18 +256,6 @@ Format as JSON:
   "breakthrough_moments": [...],
   "recommended_next_steps": [...]
 }}"""
-
-        response = self.client.agents.messages.create(
-            agent_id=self.agent.id,
-            messages=[{"role": "user", "content": search_prompt}]
-        )
-        
-        # Parse response as JSON
-        try:
-            report = json.loads(response.messages[-1].content)
-            return report
-        except:
-            return {"error": "Could not parse report", "raw": response.messages[-1].content}
     
     def trigger_cross_session_learning(self, all_participant_ids: list):
         """
@@ -235,22 +269,9 @@ Format as JSON:
         # This would trigger Letta agents to communicate shared insights
         # (Building block for future community learning)
         
-        cross_learning_prompt = f"""You're part of a support community learning system.
-
-Other participants (anonymized) have found these strategies helpful:
-- Nature-based coping (walks, forest bathing, gardening)
-- Local climate action groups
-- Sleep + anxiety management (linked)
-- Reframing: "I can't stop climate change, but I CAN..."
-
-Given what you know about this participant from previous sessions,
-which of these might be most relevant to suggest in future sessions?
-
-Update your coping_inventory to include these community-validated strategies."""
-
         response = self.client.agents.messages.create(
             agent_id=self.agent.id,
-            messages=[{"role": "user", "content": cross_learning_prompt}]
+            messages=[{"role": "user", "content": CROSS_LEARNING_PROMPT}]
         )
         
         return response
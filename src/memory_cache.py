@@ -0,0 +1,205 @@
+# File: memory_cache.py
+# In-process cache of participant memory directories (the *.md protocol files)
+
+from collections import OrderedDict
+from pathlib import Path
+import os
+import threading
+import weakref
+
+
+class MemoryCache:
+    """
+    Serves memory-file reads from memory, keyed by participant directory.
+
+    - Every cached file remembers the (mtime_ns, size) it was read at; a read
+      lists the directory and stats each file, and only re-reads files whose
+      stat changed, so edits by another process are picked up without
+      re-reading unchanged files
+    - Writes go through the cache: the file is written, then its new stat and
+      content are cached, so the next read costs no file I/O beyond the stat
+    - Total cached bytes are capped at max_bytes; least recently used
+      directories (participants) are evicted first
+
+    Thread-safe: one instance is shared by every agent in the process
+    (see shared_memory_cache). lock(directory) hands every agent the same
+    lock for a participant, so read-modify-write updates of one participant's
+    files are serialized across agent instances and threads.
+    """
+
+    # directory -> writer lock, shared by every cache instance so agents with
+    # private caches still serialize on the same participant; a lock lives
+    # only while some agent holds it
+    _dir_locks = weakref.WeakValueDictionary()
+    _dir_locks_guard = threading.Lock()
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # directory -> {stem: (mtime_ns, size, text)}, least recently used first
+        self._dirs = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    # ---------- bookkeeping (caller holds the lock) ----------
+
+    @staticmethod
+    def _dir_bytes(files: dict) -> int:
+        return sum(size for _, size, _ in files.values())
+
+    def _put(self, directory: str, stem: str, entry: tuple):
+        files = self._dirs.setdefault(directory, {})
+        previous = files.get(stem)
+        if previous is not None:
+            self._bytes -= previous[1]
+        files[stem] = entry
+        self._bytes += entry[1]
+        self._dirs.move_to_end(directory)
+        self._evict()
+
+    def _drop(self, directory: str, stem: str):
+        files = self._dirs.get(directory)
+        if files and stem in files:
+            self._bytes -= files.pop(stem)[1]
+            self._invalidations += 1
+
+    def _evict(self):
+        # The directory just touched is most recent, so it only goes if it alone exceeds the cap
+        while self._bytes > self.max_bytes and self._dirs:
+            directory, files = self._dirs.popitem(last=False)
+            self._bytes -= self._dir_bytes(files)
+            self._evictions += 1
+
+    def _cached(self, directory: str, stem: str, stat) -> str:
+        files = self._dirs.get(directory)
+        entry = files.get(stem) if files else None
+        if entry is None:
+            return None
+        if entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            return entry[2]
+        self._invalidations += 1  # changed on disk since it was cached
+        return None
+
+    # ---------- reads ----------
+
+    def read_dir(self, directory, suffix: str = ".md") -> dict:
+        """{stem: text} for every *.md file in directory (like glob + read_text)."""
+        directory = str(Path(directory))
+        current = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(suffix) and not entry.name.startswith(".") and entry.is_file():
+                        current[entry.name[:-len(suffix)]] = (entry.path, entry.stat())
+        except FileNotFoundError:
+            current = {}
+
+        memory = {}
+        stale = []
+        with self._lock:
+            for stem in list(self._dirs.get(directory, {})):
+                if stem not in current:
+                    self._drop(directory, stem)  # deleted by another process
+            for stem, (path, stat) in current.items():
+                text = self._cached(directory, stem, stat)
+                if text is None:
+                    stale.append(stem)
+                else:
+                    memory[stem] = text
+                    self._hits += 1
+            if directory in self._dirs:
+                self._dirs.move_to_end(directory)
+
+        for stem in stale:
+            path, _ = current[stem]
+            text = self._load(directory, stem, Path(path))
+            if text is not None:
+                memory[stem] = text
+        return memory
+
+    def read_file(self, path) -> str:
+        """Text of one file, from the cache when its stat is unchanged."""
+        path = Path(path)
+        directory, stem = str(path.parent), path.stem
+        stat = path.stat()
+        with self._lock:
+            text = self._cached(directory, stem, stat)
+            if text is not None:
+                self._hits += 1
+                self._dirs.move_to_end(directory)
+                return text
+        text = self._load(directory, stem, path)
+        if text is None:
+            raise FileNotFoundError(path)
+        return text
+
+    def _load(self, directory: str, stem: str, path: Path):
+        # Stat before reading: if the file changes mid-read, the cached stat
+        # is the older one and the next read picks up the change
+        try:
+            stat = path.stat()
+            text = path.read_text()
+        except FileNotFoundError:
+            with self._lock:
+                self._drop(directory, stem)
+            return None
+        with self._lock:
+            self._misses += 1
+            self._put(directory, stem, (stat.st_mtime_ns, stat.st_size, text))
+        return text
+
+    # ---------- writes ----------
+
+    def lock(self, directory) -> threading.Lock:
+        """The process-wide lock for one memory directory (one participant)."""
+        directory = str(Path(directory).resolve())
+        with self._dir_locks_guard:
+            lock = self._dir_locks.get(directory)
+            if lock is None:
+                lock = self._dir_locks[directory] = threading.Lock()
+            return lock
+
+    def write_file(self, path, content: str):
+        """Write content to path and cache it (write-through)."""
+        path = Path(path)
+        path.write_text(content)
+        stat = path.stat()
+        with self._lock:
+            self._writes += 1
+            self._put(str(path.parent), path.stem, (stat.st_mtime_ns, stat.st_size, content))
+
+    def invalidate(self, directory=None):
+        """Forget one directory (or everything); the next read goes to disk."""
+        with self._lock:
+            if directory is None:
+                self._dirs.clear()
+                self._bytes = 0
+            else:
+                files = self._dirs.pop(str(Path(directory)), None)
+                if files:
+                    self._bytes -= self._dir_bytes(files)
+
+    # ---------- metrics ----------
+
+    def reset_metrics(self):
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "writes": self._writes,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+                "cached_dirs": len(self._dirs),
+                "cached_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+shared_memory_cache = MemoryCache()
@@ -0,0 +1,307 @@
+# File: model_routing.py
+# Opt-in per-call model routing by stage, input size and observed parse failures
+
+from collections import defaultdict, deque
+import threading
+import time
+
+from src.token_budget import estimate_tokens
+
+# USD per 1M tokens (input, output), for cost accounting only
+MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "mixtral-8x7b-32768": (0.24, 0.24),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+}
+
+# Typical output throughput (tokens/s), used to estimate what the baseline
+# model would have taken for a call that was routed elsewhere
+MODEL_OUTPUT_TPS = {
+    "llama-3.1-8b-instant": 750,
+    "mixtral-8x7b-32768": 575,
+    "llama-3.3-70b-versatile": 275,
+    "claude-3-5-haiku-20241022": 110,
+    "claude-3-5-sonnet-20241022": 55,
+}
+
+# Models per provider from smallest to largest; a failed validation moves one rung up
+ESCALATION_LADDERS = {
+    "groq": ["llama-3.1-8b-instant", "mixtral-8x7b-32768", "llama-3.3-70b-versatile"],
+    "claude": ["claude-3-5-haiku-20241022", "claude-3-5-sonnet-20241022"],
+}
+
+# provider -> stage -> rules; the first rule whose max_input_tokens covers
+# the call's input wins (a rule without max_input_tokens matches anything).
+# Stages not listed use the agent's own model.
+DEFAULT_ROUTING_TABLE = {
+    "groq": {
+        "extract_causal_pairs": [
+            {"max_input_tokens": 1500, "model": "llama-3.1-8b-instant"},
+            {"model": "mixtral-8x7b-32768"},
+        ],
+        # Reformats step-1 pairs into a numbered list
+        "generate_implicit_causal_chains": [
+            {"max_input_tokens": 2000, "model": "llama-3.1-8b-instant"},
+            {"model": "mixtral-8x7b-32768"},
+        ],
+        "evaluate_causal_confidence": [{"model": "mixtral-8x7b-32768"}],
+        "evaluate_causal_confidence_batch": [
+            {"max_input_tokens": 2500, "model": "llama-3.1-8b-instant"},
+            {"model": "mixtral-8x7b-32768"},
+        ],
+        "identify_intervention_points": [{"model": "mixtral-8x7b-32768"}],
+    },
+    "claude": {
+        # input = the participant's new message; short check-ins skip thinking
+        "run_session": [
+            {"max_input_tokens": 150, "model": "claude-3-5-haiku-20241022", "thinking": False},
+            {"model": "claude-3-5-sonnet-20241022", "thinking": True},
+        ],
+        # Streams leave thinking to the caller (off by default, for time to first token)
+        "run_session_stream": [
+            {"max_input_tokens": 150, "model": "claude-3-5-haiku-20241022"},
+            {"model": "claude-3-5-sonnet-20241022"},
+        ],
+        # Memory -> fixed JSON schema
+        "get_protocol_summary": [{"model": "claude-3-5-haiku-20241022"}],
+        "export_therapeutic_journal": [{"model": "claude-3-5-sonnet-20241022"}],
+        "export_therapeutic_journal_stream": [{"model": "claude-3-5-sonnet-20241022"}],
+    },
+}
+
+
+def call_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of one call (0 for models without a price)."""
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+class ModelRouter:
+    """
+    Chooses a model per call from a routing table, escalates to the next
+    larger model when a response fails validation, and keeps cohort-level
+    accounting of the decisions.
+
+    - routing_table: provider -> stage -> rules (see DEFAULT_ROUTING_TABLE)
+    - max_failure_rate: once a (stage, model) has min_samples outcomes and
+      fails validation more often than this, calls skip straight past it
+      (except one in probe_every, so a recovered model gets traffic back)
+    - max_escalations: extra attempts per call after a validation failure
+
+    Savings compare each call against its agent's pinned baseline model:
+    cost from MODEL_PRICES, latency scaled by MODEL_OUTPUT_TPS.
+    Share one router across a cohort so failure rates are learned from every call.
+    """
+
+    def __init__(self, routing_table: dict = None, escalation_ladders: dict = None,
+                 max_failure_rate: float = 0.2, min_samples: int = 10, window: int = 100,
+                 max_escalations: int = 1, probe_every: int = 20, max_log: int = 10000):
+        self.routing_table = routing_table if routing_table is not None else DEFAULT_ROUTING_TABLE
+        self.escalation_ladders = escalation_ladders if escalation_ladders is not None else ESCALATION_LADDERS
+        self.max_failure_rate = max_failure_rate
+        self.min_samples = min_samples
+        self.max_escalations = max_escalations
+        self.probe_every = probe_every
+        self._skipped = defaultdict(int)
+        self._outcomes = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self.log = deque(maxlen=max_log)
+        self.reset_metrics()
+
+    # ---------- routing ----------
+
+    def _rule_route(self, provider: str, stage: str, input_tokens: int, default_model: str) -> dict:
+        for rule in self.routing_table.get(provider, {}).get(stage, []):
+            limit = rule.get("max_input_tokens")
+            if limit is None or input_tokens <= limit:
+                return {"model": rule["model"], "thinking": rule.get("thinking")}
+        return {"model": default_model, "thinking": None}
+
+    def _stage_thinking(self, provider: str, stage: str, model: str):
+        for rule in self.routing_table.get(provider, {}).get(stage, []):
+            if rule["model"] == model:
+                return rule.get("thinking")
+        return None
+
+    def next_model(self, provider: str, model: str):
+        """One rung up the provider's ladder, or None at the top (or off the ladder)."""
+        ladder = self.escalation_ladders.get(provider, [])
+        if model not in ladder or ladder.index(model) + 1 >= len(ladder):
+            return None
+        return ladder[ladder.index(model) + 1]
+
+    def candidate_models(self, provider: str, stage: str, baseline_model: str) -> list:
+        """
+        Every model a call of this stage may be sent to, whatever its input
+        size: the stage's rule models (plus the baseline when no rule matches
+        everything) and the ladder rungs above them, which failure-rate skips
+        and escalations move to. Callers fit inputs to the smallest window.
+        """
+        rules = self.routing_table.get(provider, {}).get(stage, [])
+        models = [rule["model"] for rule in rules]
+        if not any(rule.get("max_input_tokens") is None for rule in rules):
+            models.append(baseline_model)
+        candidates = []
+        for model in models:
+            while model is not None and model not in candidates:
+                candidates.append(model)
+                model = self.next_model(provider, model)
+        return candidates
+
+    def failure_rate(self, provider: str, stage: str, model: str):
+        """Recent validation failure rate, None until min_samples outcomes."""
+        with self._lock:
+            outcomes = list(self._outcomes[(provider, stage, model)])
+        if len(outcomes) < self.min_samples:
+            return None
+        return outcomes.count(False) / len(outcomes)
+
+    def route(self, provider: str, stage: str, input_tokens: int, default_model: str) -> dict:
+        """
+        Pick {"model", "thinking", "reason"} for one call. thinking is None
+        when the table doesn't say (the caller keeps its own default).
+        """
+        route = self._rule_route(provider, stage, input_tokens, default_model)
+        route["reason"] = "table"
+        while True:
+            rate = self.failure_rate(provider, stage, route["model"])
+            bigger = self.next_model(provider, route["model"])
+            if rate is None or rate <= self.max_failure_rate or bigger is None:
+                return route
+            with self._lock:
+                key = (provider, stage, route["model"])
+                self._skipped[key] += 1
+                if self.probe_every and self._skipped[key] % self.probe_every == 0:
+                    route["reason"] = "probe"
+                    return route
+            route = {
+                "model": bigger,
+                "thinking": self._stage_thinking(provider, stage, bigger),
+                "reason": f"failure_rate>{self.max_failure_rate}",
+            }
+
+    def _escalated(self, provider: str, stage: str, model: str):
+        bigger = self.next_model(provider, model)
+        if bigger is None:
+            return None
+        return {"model": bigger, "thinking": self._stage_thinking(provider, stage, bigger), "reason": "escalated"}
+
+    # ---------- running a call ----------
+
+    def run(self, provider: str, stage: str, input_tokens: int, baseline_model: str,
+            call, parse, validate=bool, prompt_tokens: int = None):
+        """
+        call(route) -> raw text; parse(text) -> result; validate(result) -> bool.
+        Retries one rung up on validation failure (max_escalations times) and
+        returns the last parsed result either way.
+
+        input_tokens drives the routing rules; prompt_tokens (default: the
+        same) is the full request size used for cost accounting.
+        """
+        route = self.route(provider, stage, input_tokens, baseline_model)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            text = call(route)
+            latency = time.perf_counter() - start
+            result = parse(text)
+            ok = bool(validate(result))
+            self.record(provider, stage, baseline_model, route, ok, text, latency,
+                        prompt_tokens or input_tokens, attempt)
+            route = None if ok or attempt >= self.max_escalations else self._escalated(provider, stage, route["model"])
+            if route is None:
+                return result
+            attempt += 1
+
+    async def arun(self, provider: str, stage: str, input_tokens: int, baseline_model: str,
+                   call, parse, validate=bool, prompt_tokens: int = None):
+        """asyncio counterpart of run(): call(route) is a coroutine function."""
+        route = self.route(provider, stage, input_tokens, baseline_model)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            text = await call(route)
+            latency = time.perf_counter() - start
+            result = parse(text)
+            ok = bool(validate(result))
+            self.record(provider, stage, baseline_model, route, ok, text, latency,
+                        prompt_tokens or input_tokens, attempt)
+            route = None if ok or attempt >= self.max_escalations else self._escalated(provider, stage, route["model"])
+            if route is None:
+                return result
+            attempt += 1
+
+    # ---------- accounting ----------
+
+    def record(self, provider: str, stage: str, baseline_model: str, route: dict, ok: bool,
+               text: str, latency_s: float, prompt_tokens: int, attempt: int = 0):
+        """Account for one routed call (run() does this; streaming callers call it directly)."""
+        model = route["model"]
+        output_tokens = estimate_tokens(text)
+        cost = call_cost(model, prompt_tokens, output_tokens)
+        baseline_cost = call_cost(baseline_model, prompt_tokens, output_tokens)
+        speedup = MODEL_OUTPUT_TPS.get(model, 1) / MODEL_OUTPUT_TPS.get(baseline_model, 1)
+        entry = {
+            "provider": provider,
+            "stage": stage,
+            "model": model,
+            "baseline_model": baseline_model,
+            "reason": route["reason"],
+            "attempt": attempt,
+            "valid": ok,
+            "input_tokens_est": prompt_tokens,
+            "output_tokens_est": output_tokens,
+            "latency_s": round(latency_s, 4),
+            "cost_usd": round(cost, 6),
+        }
+        with self._lock:
+            self._outcomes[(provider, stage, model)].append(ok)
+            self.log.append(entry)
+            self.calls += 1
+            self.escalations += attempt > 0
+            self.invalid += not ok
+            self.by_model[model] += 1
+            self.cost_usd += cost
+            self.latency_s += latency_s
+            # A retry is pure overhead compared with a first-try baseline call
+            self.baseline_cost_usd += baseline_cost if attempt == 0 else 0.0
+            self.baseline_latency_s += latency_s * speedup if attempt == 0 else 0.0
+
+    def reset_metrics(self):
+        """Start a new cohort run (learned failure rates are kept)."""
+        with self._lock:
+            self.calls = 0
+            self.escalations = 0
+            self.invalid = 0
+            self.by_model = defaultdict(int)
+            self.cost_usd = 0.0
+            self.baseline_cost_usd = 0.0
+            self.latency_s = 0.0
+            self.baseline_latency_s = 0.0
+            self.log.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            by_stage = defaultdict(lambda: defaultdict(int))
+            for entry in self.log:
+                by_stage[entry["stage"]][entry["model"]] += 1
+            return {
+                "calls": self.calls,
+                "escalations": self.escalations,
+                "invalid_responses": self.invalid,
+                "calls_by_model": dict(self.by_model),
+                "calls_by_stage": {stage: dict(models) for stage, models in by_stage.items()},
+                "cost_usd": round(self.cost_usd, 6),
+                "baseline_cost_usd": round(self.baseline_cost_usd, 6),
+                "cost_saved_usd": round(self.baseline_cost_usd - self.cost_usd, 6),
+                "latency_s": round(self.latency_s, 3),
+                "est_baseline_latency_s": round(self.baseline_latency_s, 3),
+                "est_latency_saved_s": round(self.baseline_latency_s - self.latency_s, 3),
+            }
+
+    def decisions(self) -> list:
+        """Per-call routing log for this cohort run (most recent max_log calls)."""
+        with self._lock:
+            return list(self.log)
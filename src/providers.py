@@ -0,0 +1,57 @@
+# File: providers.py
+# Lazy provider registry: SDKs are imported on first use, not at module load
+
+import importlib
+
+# name -> (module to import, client class inside it)
+PROVIDERS = {
+    "groq": ("groq", "Groq"),
+    "anthropic": ("anthropic", "Anthropic"),
+    "letta": ("letta_client", "Letta"),
+    # asyncio clients, used by src.async_agents
+    "groq_async": ("groq", "AsyncGroq"),
+    "anthropic_async": ("anthropic", "AsyncAnthropic"),
+    "letta_async": ("letta_client", "AsyncLetta"),
+}
+
+_loaded = {}
+
+
+def load_provider(name: str):
+    """
+    Import a provider SDK on demand and return its client class.
+
+    A worker that only runs the Groq stage never imports anthropic or
+    letta_client, so it skips their import time and memory.
+    """
+    if name in _loaded:
+        return _loaded[name]
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown provider '{name}'. Known: {sorted(PROVIDERS)}")
+
+    module_name, class_name = PROVIDERS[name]
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(
+            f"Provider '{name}' needs the '{module_name}' package (pip install -r requirements.txt)"
+        ) from e
+
+    _loaded[name] = getattr(module, class_name)
+    return _loaded[name]
+
+
+def create_client(name: str, **kwargs):
+    """Instantiate a provider client, importing its SDK if needed."""
+    return load_provider(name)(**kwargs)
+
+
+def register_provider(name: str, module_name: str, class_name: str):
+    """Add (or override) a provider backend without importing it."""
+    PROVIDERS[name] = (module_name, class_name)
+    _loaded.pop(name, None)
+
+
+def loaded_providers() -> list:
+    """Names of providers whose SDK has been imported in this process."""
+    return sorted(_loaded)
@@ -0,0 +1,374 @@
+# File: replay.py
+# Record/replay harness for provider traffic (Groq, Anthropic, Letta)
+
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+
+class ReplayMissError(LookupError):
+    """No recorded response matches this request."""
+
+
+class AttrDict(dict):
+    """
+    Dict that also answers attribute access, so replayed responses look like
+    SDK objects (response.content[0].text) while tool inputs keep .get().
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def to_plain(obj):
+    """Convert SDK response objects (pydantic models, namespaces) to JSON-able data."""
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, dict):
+        return {str(k): to_plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_plain(v) for v in obj]
+    if hasattr(obj, "model_dump"):
+        return to_plain(obj.model_dump())
+    if hasattr(obj, "__dict__"):
+        return {k: to_plain(v) for k, v in vars(obj).items() if not k.startswith("_")}
+    return str(obj)
+
+
+def to_attr(data):
+    """Inverse of to_plain: nested dicts become AttrDicts."""
+    if isinstance(data, dict):
+        return AttrDict({k: to_attr(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [to_attr(v) for v in data]
+    return data
+
+
+def request_key(endpoint: str, kwargs: dict) -> str:
+    """Stable hash of an endpoint + request body."""
+    body = json.dumps(to_plain(kwargs), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{endpoint}\n{body}".encode("utf-8")).hexdigest()[:24]
+
+
+# Endpoints each provider client exposes, as attribute paths
+ENDPOINTS = ("messages.create", "messages.stream", "agents.create", "agents.messages.create")
+
+# Endpoints that return a stream context manager instead of a response
+STREAM_ENDPOINTS = ("messages.stream",)
+
+
+class _Endpoint:
+    """Proxy for one attribute path (e.g. client.agents.messages) of a client."""
+
+    def __init__(self, owner, path: str):
+        self._owner = owner
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        path = f"{self._path}.{name}" if self._path else name
+        if path in ENDPOINTS:
+            return lambda **kwargs: self._owner._call(path, kwargs)
+        if any(e.startswith(path + ".") for e in ENDPOINTS):
+            return _Endpoint(self._owner, path)
+        return self._owner._passthrough(path)
+
+
+class RecordingClient(_Endpoint):
+    """
+    Wraps a real provider client and appends every request/response pair to a
+    JSONL fixture file:
+        {"endpoint", "key", "request", "response", "latency_s", "recorded_at"}
+
+    Usage:
+        engine.client = RecordingClient(engine.client, "fixtures/groq.jsonl")
+
+    Async clients work too: their endpoints return a coroutine, which is
+    awaited before the response is recorded.
+
+    messages.stream() is passed through as it streams; its text deltas are
+    recorded ("text_stream") with the final message when the block exits.
+    """
+
+    def __init__(self, client, fixture_path: str):
+        super().__init__(self, "")
+        self._client = client
+        self._fixture_path = Path(fixture_path)
+        self._fixture_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _passthrough(self, path: str):
+        target = self._client
+        for part in path.split("."):
+            target = getattr(target, part)
+        return target
+
+    def _call(self, endpoint: str, kwargs: dict):
+        start = time.perf_counter()
+        response = self._passthrough(endpoint)(**kwargs)
+        if endpoint in STREAM_ENDPOINTS:
+            return _RecordingStream(self, endpoint, kwargs, response)
+        if inspect.isawaitable(response):
+            return self._record_async(endpoint, kwargs, response, start)
+        self._record(endpoint, kwargs, response, time.perf_counter() - start)
+        return response
+
+    async def _record_async(self, endpoint: str, kwargs: dict, pending, start: float):
+        response = await pending
+        self._record(endpoint, kwargs, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, endpoint: str, kwargs: dict, response, latency: float, text_stream: list = None):
+        record = {
+            "endpoint": endpoint,
+            "key": request_key(endpoint, kwargs),
+            "request": to_plain(kwargs),
+            "response": to_plain(response),
+            "latency_s": round(latency, 4),
+            "recorded_at": time.time(),
+        }
+        if text_stream is not None:
+            record["text_stream"] = text_stream
+        with self._lock, self._fixture_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class _RecordingStream:
+    """
+    Stands in for a messages.stream() context manager (sync or async):
+    passes the stream through and records it when the block exits cleanly.
+    """
+
+    def __init__(self, recorder: RecordingClient, endpoint: str, kwargs: dict, manager):
+        self._recorder = recorder
+        self._endpoint = endpoint
+        self._kwargs = kwargs
+        self._manager = manager
+        self._stream = None
+        self._final = None
+        self._deltas = []
+        self._async = False
+        self._start = time.perf_counter()
+
+    def __enter__(self):
+        self._stream = self._manager.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self._record(self.get_final_message())
+        return self._manager.__exit__(*exc)
+
+    async def __aenter__(self):
+        self._async = True
+        self._stream = await self._manager.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        if exc[0] is None:
+            self._record(await self.get_final_message())
+        return await self._manager.__aexit__(*exc)
+
+    def __getattr__(self, name):
+        # anything else the agent reads off the live stream
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._stream, name)
+
+    @property
+    def text_stream(self):
+        return self._atext_stream() if self._async else self._text_stream()
+
+    def _text_stream(self):
+        for delta in self._stream.text_stream:
+            self._deltas.append(delta)
+            yield delta
+
+    async def _atext_stream(self):
+        async for delta in self._stream.text_stream:
+            self._deltas.append(delta)
+            yield delta
+
+    def get_final_message(self):
+        if self._async:
+            return self._aget_final_message()
+        if self._final is None:
+            self._final = self._stream.get_final_message()
+        return self._final
+
+    async def _aget_final_message(self):
+        if self._final is None:
+            self._final = await self._stream.get_final_message()
+        return self._final
+
+    def _record(self, final):
+        self._recorder._record(self._endpoint, self._kwargs, final,
+                               time.perf_counter() - self._start, list(self._deltas))
+
+
+def load_fixtures(*paths) -> list:
+    """Read recorded traffic from one or more JSONL fixture files."""
+    records = []
+    for path in paths:
+        with Path(path).open(encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+class ReplayClient(_Endpoint):
+    """
+    Serves recorded responses offline, shaped like the SDK client it replaces.
+
+    - match="key": exact request match (repeated identical requests replay in
+      recorded order); match="sequence": ignore the request, replay in order
+    - speed: 1.0 replays recorded latency, 10.0 is ten times faster,
+      0 (default) returns immediately
+    - loop: start over when a sequence is exhausted (for long benchmarks)
+    - asynchronous: endpoints return coroutines, standing in for AsyncGroq,
+      AsyncAnthropic or AsyncLetta (the async_agents classes)
+
+    messages.stream() replays the recorded text deltas through text_stream
+    and the final message through get_final_message(), in a with (or, when
+    asynchronous, async with) block.
+    """
+
+    def __init__(self, records, speed: float = 0, match: str = "key", loop: bool = False,
+                 asynchronous: bool = False):
+        super().__init__(self, "")
+        if isinstance(records, (str, Path)):
+            records = load_fixtures(records)
+        self._records = list(records)
+        self.speed = speed
+        self.match = match
+        self.loop = loop
+        self.asynchronous = asynchronous
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._by_key = defaultdict(deque)
+        self._sequence = deque(self._records)
+        for record in self._records:
+            self._by_key[record["key"]].append(record)
+
+    def _passthrough(self, path: str):
+        raise AttributeError(f"ReplayClient has no recorded endpoint '{path}'")
+
+    def _next(self, endpoint: str, kwargs: dict) -> dict:
+        with self._lock:
+            self.calls += 1
+            if self.match == "sequence":
+                if not self._sequence and self.loop:
+                    self._sequence.extend(self._records)
+                if not self._sequence:
+                    raise ReplayMissError("Replay sequence exhausted")
+                return self._sequence.popleft()
+
+            key = request_key(endpoint, kwargs)
+            queue = self._by_key.get(key)
+            if not queue:
+                raise ReplayMissError(f"No recording for {endpoint} request {key}")
+            record = queue.popleft()
+            if self.loop:
+                queue.append(record)
+            return record
+
+    def _call(self, endpoint: str, kwargs: dict):
+        if endpoint in STREAM_ENDPOINTS:
+            return _ReplayStream(self._next(endpoint, kwargs), self.speed, self.asynchronous)
+        if self.asynchronous:
+            return self._acall(endpoint, kwargs)
+        record = self._next(endpoint, kwargs)
+        if self.speed:
+            time.sleep(record.get("latency_s", 0) / self.speed)
+        return to_attr(record["response"])
+
+    async def _acall(self, endpoint: str, kwargs: dict):
+        record = self._next(endpoint, kwargs)
+        if self.speed:
+            await asyncio.sleep(record.get("latency_s", 0) / self.speed)
+        return to_attr(record["response"])
+
+
+class _ReplayStream:
+    """A recorded messages.stream() reply, behind the same context-manager interface."""
+
+    def __init__(self, record: dict, speed: float, asynchronous: bool):
+        self._record = record
+        self._async = asynchronous
+        # recorded latency, spread evenly over the deltas
+        self._deltas = record.get("text_stream") or []
+        self._delay = record.get("latency_s", 0) / speed / max(1, len(self._deltas)) if speed else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        return self._atext_stream() if self._async else self._text_stream()
+
+    def _text_stream(self):
+        for delta in self._deltas:
+            if self._delay:
+                time.sleep(self._delay)
+            yield delta
+
+    async def _atext_stream(self):
+        for delta in self._deltas:
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            yield delta
+
+    def get_final_message(self):
+        if self._async:
+            return self._aget_final_message()
+        return to_attr(self._record["response"])
+
+    async def _aget_final_message(self):
+        return to_attr(self._record["response"])
+
+
+def _is_async_client(client) -> bool:
+    """True for AsyncGroq/AsyncAnthropic/AsyncLetta-style clients (endpoints are coroutines)."""
+    if isinstance(client, ReplayClient):
+        return client.asynchronous
+    if isinstance(client, RecordingClient):
+        client = client._client
+    for endpoint in ENDPOINTS:
+        target = client
+        try:
+            for part in endpoint.split("."):
+                target = getattr(target, part)
+        except AttributeError:
+            continue
+        return inspect.iscoroutinefunction(target)
+    return False
+
+
+def install_recorder(agent, fixture_path: str):
+    """Start recording an agent's provider traffic (engine or agent with .client)."""
+    agent.client = RecordingClient(agent.client, fixture_path)
+    return agent.client
+
+
+def install_replayer(agent, fixture_path: str, **kwargs):
+    """Point an agent at recorded traffic instead of the live provider (async agents replay async)."""
+    kwargs.setdefault("asynchronous", _is_async_client(agent.client))
+    agent.client = ReplayClient(fixture_path, **kwargs)
+    return agent.client
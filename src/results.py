@@ -0,0 +1,565 @@
+# File: results.py
+# Typed, compact result objects + columnar bulk serialization
+
+from dataclasses import dataclass, field, fields
+from typing import Optional
+from array import array
+import json
+import math
+import struct
+import sys
+import zlib
+
+
+class ResultValidationError(ValueError):
+    """Provider output does not match the expected result schema."""
+
+
+def _require_text(data: dict, key: str) -> str:
+    value = data.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise ResultValidationError(f"'{key}' must be a non-empty string, got {value!r}")
+    return value.strip()
+
+
+def _as_confidence(value, key: str = "confidence") -> Optional[float]:
+    """Coerce a 0-1 score; clamp small overshoots, reject non-numbers."""
+    if value is None:
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        raise ResultValidationError(f"'{key}' must be numeric, got {value!r}")
+    if math.isnan(score):
+        raise ResultValidationError(f"'{key}' is NaN")
+    return min(1.0, max(0.0, score))
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+# Largest value of the int32 columns in pack_analyses
+_INT32_MAX = 2 ** 31 - 1
+
+
+def _as_count(value) -> Optional[int]:
+    """Non-negative int that fits the packed int32 columns, else None."""
+    value = _as_int(value)
+    return value if value is not None and 0 <= value <= _INT32_MAX else None
+
+
+def _as_offsets(value) -> tuple:
+    """(start, end) from grounding's [start, end]; (None, None) unless well-formed."""
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        start, end = _as_count(value[0]), _as_count(value[1])
+        if start is not None and end is not None and start <= end:
+            return start, end
+    return None, None
+
+
+def _slotted_dataclass(cls):
+    """
+    @dataclass(slots=True), which needs Python 3.10, for 3.8+ as well:
+    build the dataclass, then recreate the class with __slots__ and without
+    the per-field class attributes (defaults live on the generated __init__).
+    """
+    if sys.version_info >= (3, 10):
+        return dataclass(slots=True)(cls)
+    cls = dataclass(cls)
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+# ============ RESULT TYPES ============
+
+@_slotted_dataclass
+class CausalPair:
+    cause: str
+    effect: str
+    explicit: Optional[bool] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CausalPair":
+        if not isinstance(data, dict):
+            raise ResultValidationError(f"pair must be an object, got {type(data).__name__}")
+        explicit = data.get("explicit")
+        return cls(
+            cause=_require_text(data, "cause"),
+            effect=_require_text(data, "effect"),
+            explicit=explicit if isinstance(explicit, bool) else None,
+        )
+
+    def to_dict(self) -> dict:
+        d = {"cause": self.cause, "effect": self.effect}
+        if self.explicit is not None:
+            d["explicit"] = self.explicit
+        return d
+
+
+@_slotted_dataclass
+class CausalLink:
+    connection: str
+    confidence: Optional[float]
+    evidence: str = ""
+    # Set by src.evidence_grounding (None until grounded)
+    grounding_score: Optional[float] = None
+    grounding_match: str = ""
+    evidence_start: Optional[int] = None
+    evidence_end: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CausalLink":
+        if not isinstance(data, dict):
+            raise ResultValidationError(f"link must be an object, got {type(data).__name__}")
+        start, end = _as_offsets(data.get("evidence_offsets"))
+        return cls(
+            connection=_require_text(data, "connection"),
+            confidence=_as_confidence(data.get("confidence")),
+            evidence=str(data.get("evidence") or ""),
+            grounding_score=_as_confidence(data.get("grounding_score"), "grounding_score"),
+            grounding_match=str(data.get("grounding_match") or ""),
+            evidence_start=start,
+            evidence_end=end,
+        )
+
+    def to_dict(self) -> dict:
+        d = {"connection": self.connection, "confidence": self.confidence, "evidence": self.evidence}
+        if self.grounding_score is not None:
+            d["grounding_score"] = self.grounding_score
+            d["grounding_match"] = self.grounding_match
+            d["evidence_offsets"] = (
+                None if self.evidence_start is None else [self.evidence_start, self.evidence_end]
+            )
+        return d
+
+
+@_slotted_dataclass
+class CausalChain:
+    key: str  # "chain_1", "chain_2", ...
+    chain: str
+    links: list = field(default_factory=list)
+    overall_confidence: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, key: str, data: dict) -> "CausalChain":
+        if not isinstance(data, dict):
+            raise ResultValidationError(f"{key} must be an object, got {type(data).__name__}")
+        links = data.get("links") or []
+        if not isinstance(links, list):
+            raise ResultValidationError(f"{key}.links must be a list")
+        return cls(
+            key=key,
+            chain=_require_text(data, "chain"),
+            links=[CausalLink.from_dict(link) for link in links],
+            overall_confidence=_as_confidence(data.get("overall_confidence"), "overall_confidence"),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "chain": self.chain,
+            "links": [link.to_dict() for link in self.links],
+            "overall_confidence": self.overall_confidence,
+        }
+
+
+@_slotted_dataclass
+class Intervention:
+    link: str
+    confidence: Optional[float] = None
+    roi_score: Optional[float] = None
+    modifiability: str = ""
+    leverage_blocked_effects: Optional[int] = None
+    suggested_interventions: list = field(default_factory=list)
+    reasoning: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Intervention":
+        if not isinstance(data, dict):
+            raise ResultValidationError(f"intervention must be an object, got {type(data).__name__}")
+        suggestions = data.get("suggested_interventions") or []
+        if isinstance(suggestions, str):
+            suggestions = [suggestions]
+        return cls(
+            link=_require_text(data, "link"),
+            confidence=_as_confidence(data.get("confidence")),
+            roi_score=_as_confidence(data.get("roi_score"), "roi_score"),
+            modifiability=str(data.get("modifiability") or ""),
+            leverage_blocked_effects=_as_count(data.get("leverage_blocked_effects")),
+            suggested_interventions=[str(s) for s in suggestions],
+            reasoning=str(data.get("reasoning") or ""),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "link": self.link,
+            "confidence": self.confidence,
+            "roi_score": self.roi_score,
+            "modifiability": self.modifiability,
+            "leverage_blocked_effects": self.leverage_blocked_effects,
+            "suggested_interventions": list(self.suggested_interventions),
+            "reasoning": self.reasoning,
+        }
+
+
+def parse_pairs(data) -> list:
+    """Validated pairs from provider JSON; malformed entries are dropped."""
+    pairs = []
+    for item in (data or {}).get("pairs", []) if isinstance(data, dict) else []:
+        try:
+            pairs.append(CausalPair.from_dict(item))
+        except ResultValidationError:
+            continue
+    return pairs
+
+
+def parse_confidence(data) -> list:
+    """
+    Validated chains from a {"chain_N": {...}} map.
+    Each chain is validated independently so one bad chain doesn't sink the rest.
+    """
+    chains = []
+    if not isinstance(data, dict):
+        return chains
+    for key, value in data.items():
+        try:
+            chains.append(CausalChain.from_dict(key, value))
+        except ResultValidationError:
+            continue
+    return chains
+
+
+def parse_interventions(data) -> list:
+    """Validated interventions from {"highest_roi_interventions": [...]}."""
+    interventions = []
+    items = data.get("highest_roi_interventions", []) if isinstance(data, dict) else []
+    for item in items if isinstance(items, list) else []:
+        try:
+            interventions.append(Intervention.from_dict(item))
+        except ResultValidationError:
+            continue
+    return interventions
+
+
+def confidence_to_dict(chains: list) -> dict:
+    return {chain.key: chain.to_dict() for chain in chains}
+
+
+def interventions_to_dict(interventions: list) -> dict:
+    if not interventions:
+        return {}
+    return {"highest_roi_interventions": [i.to_dict() for i in interventions]}
+
+
+@_slotted_dataclass
+class CausalAnalysis:
+    """Typed form of CausalReasoningEngine.analyze_transcript_end_to_end output."""
+    transcript_summary: str = ""
+    causal_pairs_found: int = 0
+    pairs: list = field(default_factory=list)
+    causal_chains: list = field(default_factory=list)
+    confidence: list = field(default_factory=list)
+    interventions: list = field(default_factory=list)
+    processing_model: str = ""
+    reasoning_depth: str = ""
+    error: Optional[str] = None
+    metadata: dict = field(default_factory=dict)  # token_budget and any extra keys
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CausalAnalysis":
+        extras = {k: v for k, v in data.items() if k not in _ANALYSIS_KEYS}
+        return cls(
+            transcript_summary=data.get("transcript_summary", ""),
+            causal_pairs_found=data.get("causal_pairs_found", 0),
+            pairs=parse_pairs({"pairs": data.get("pairs", [])}),
+            causal_chains=[str(c) for c in data.get("causal_chains", [])],
+            confidence=parse_confidence(data.get("confidence_analysis", {})),
+            interventions=parse_interventions(data.get("intervention_recommendations", {})),
+            processing_model=data.get("processing_model", ""),
+            reasoning_depth=data.get("reasoning_depth", ""),
+            error=data.get("error"),
+            metadata=extras,
+        )
+
+    def to_dict(self) -> dict:
+        if self.error is not None:
+            return {"error": self.error, **self.metadata}
+        return {
+            "transcript_summary": self.transcript_summary,
+            "causal_pairs_found": self.causal_pairs_found,
+            "pairs": [p.to_dict() for p in self.pairs],
+            "causal_chains": list(self.causal_chains),
+            "confidence_analysis": confidence_to_dict(self.confidence),
+            "intervention_recommendations": interventions_to_dict(self.interventions),
+            "processing_model": self.processing_model,
+            "reasoning_depth": self.reasoning_depth,
+            **self.metadata,
+        }
+
+
+_ANALYSIS_KEYS = {
+    "transcript_summary", "causal_pairs_found", "pairs", "causal_chains",
+    "confidence_analysis", "intervention_recommendations", "processing_model",
+    "reasoning_depth", "error",
+}
+
+
+@_slotted_dataclass
+class SessionResult:
+    """Typed form of ClaudeTherapeuticAgent.run_session output."""
+    session_number: int
+    therapeutic_response: str
+    memory_updates_applied: list = field(default_factory=list)
+    protocol_evolved: bool = False
+    timestamp: str = ""
+    metadata: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionResult":
+        known = {"session_number", "therapeutic_response", "memory_updates_applied", "protocol_evolved", "timestamp"}
+        return cls(
+            session_number=int(data["session_number"]),
+            therapeutic_response=str(data.get("therapeutic_response", "")),
+            memory_updates_applied=list(data.get("memory_updates_applied", [])),
+            protocol_evolved=bool(data.get("protocol_evolved", False)),
+            timestamp=str(data.get("timestamp", "")),
+            metadata={k: v for k, v in data.items() if k not in known},
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "session_number": self.session_number,
+            "therapeutic_response": self.therapeutic_response,
+            "memory_updates_applied": list(self.memory_updates_applied),
+            "protocol_evolved": self.protocol_evolved,
+            "timestamp": self.timestamp,
+            **self.metadata,
+        }
+
+
+# ============ COLUMNAR BULK SERIALIZATION ============
+#
+# Layout: MAGIC | zlib( string table | columns ).
+# Strings are interned once into a table and referenced by index, numbers are
+# packed into typed arrays, and nested lists (pairs, chains, links, ...) are
+# flattened with per-parent offset columns, so a cohort of thousands of
+# analyses stores each repeated phrase/model name once.
+
+MAGIC = b"CCRA2"  # v2: link grounding columns
+MAGIC_V1 = b"CCRA1"
+_NONE = -1
+
+# (column name, array typecode)
+_COLUMNS = [
+    ("a_summary", "i"), ("a_pairs_found", "i"), ("a_model", "i"), ("a_depth", "i"),
+    ("a_error", "i"), ("a_meta", "i"),
+    ("a_pair_off", "I"), ("p_cause", "i"), ("p_effect", "i"), ("p_explicit", "b"),
+    ("a_chain_off", "I"), ("c_text", "i"),
+    ("a_cc_off", "I"), ("cc_key", "i"), ("cc_chain", "i"), ("cc_overall", "d"),
+    ("cc_link_off", "I"), ("l_conn", "i"), ("l_conf", "d"), ("l_evidence", "i"),
+    ("l_ground", "d"), ("l_gmatch", "i"), ("l_start", "i"), ("l_end", "i"),
+    ("a_iv_off", "I"), ("iv_link", "i"), ("iv_conf", "d"), ("iv_roi", "d"), ("iv_mod", "i"),
+    ("iv_leverage", "i"), ("iv_reason", "i"), ("iv_sugg_off", "I"), ("sugg", "i"),
+]
+
+# v2 added these per-link columns; v1 files decode with them empty (ungrounded)
+_GROUNDING_COLUMNS = ("l_ground", "l_gmatch", "l_start", "l_end")
+_COLUMNS_V1 = [column for column in _COLUMNS if column[0] not in _GROUNDING_COLUMNS]
+
+
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, value) -> int:
+        if value is None:
+            return _NONE
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+
+def _opt_float(value) -> float:
+    return math.nan if value is None else value
+
+
+def _from_opt_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def _le_bytes(arr: array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def pack_analyses(analyses: list) -> bytes:
+    """Serialize CausalAnalysis objects (or their dicts) into the columnar format."""
+    strings = _StringTable()
+    cols = {name: array(code) for name, code in _COLUMNS}
+    for name in ("a_pair_off", "a_chain_off", "a_cc_off", "cc_link_off", "a_iv_off", "iv_sugg_off"):
+        cols[name].append(0)
+
+    for analysis in analyses:
+        if isinstance(analysis, dict):
+            analysis = CausalAnalysis.from_dict(analysis)
+        cols["a_summary"].append(strings.add(analysis.transcript_summary))
+        cols["a_pairs_found"].append(int(analysis.causal_pairs_found))
+        cols["a_model"].append(strings.add(analysis.processing_model))
+        cols["a_depth"].append(strings.add(analysis.reasoning_depth))
+        cols["a_error"].append(strings.add(analysis.error))
+        cols["a_meta"].append(strings.add(json.dumps(analysis.metadata, separators=(",", ":"))) if analysis.metadata else _NONE)
+
+        for pair in analysis.pairs:
+            cols["p_cause"].append(strings.add(pair.cause))
+            cols["p_effect"].append(strings.add(pair.effect))
+            cols["p_explicit"].append(_NONE if pair.explicit is None else int(pair.explicit))
+        cols["a_pair_off"].append(len(cols["p_cause"]))
+
+        for text in analysis.causal_chains:
+            cols["c_text"].append(strings.add(text))
+        cols["a_chain_off"].append(len(cols["c_text"]))
+
+        for chain in analysis.confidence:
+            cols["cc_key"].append(strings.add(chain.key))
+            cols["cc_chain"].append(strings.add(chain.chain))
+            cols["cc_overall"].append(_opt_float(chain.overall_confidence))
+            for link in chain.links:
+                cols["l_conn"].append(strings.add(link.connection))
+                cols["l_conf"].append(_opt_float(link.confidence))
+                cols["l_evidence"].append(strings.add(link.evidence))
+                cols["l_ground"].append(_opt_float(link.grounding_score))
+                cols["l_gmatch"].append(strings.add(link.grounding_match))
+                cols["l_start"].append(_NONE if link.evidence_start is None else link.evidence_start)
+                cols["l_end"].append(_NONE if link.evidence_end is None else link.evidence_end)
+            cols["cc_link_off"].append(len(cols["l_conn"]))
+        cols["a_cc_off"].append(len(cols["cc_key"]))
+
+        for iv in analysis.interventions:
+            cols["iv_link"].append(strings.add(iv.link))
+            cols["iv_conf"].append(_opt_float(iv.confidence))
+            cols["iv_roi"].append(_opt_float(iv.roi_score))
+            cols["iv_mod"].append(strings.add(iv.modifiability))
+            cols["iv_leverage"].append(_NONE if iv.leverage_blocked_effects is None else iv.leverage_blocked_effects)
+            cols["iv_reason"].append(strings.add(iv.reasoning))
+            for s in iv.suggested_interventions:
+                cols["sugg"].append(strings.add(s))
+            cols["iv_sugg_off"].append(len(cols["sugg"]))
+        cols["a_iv_off"].append(len(cols["iv_link"]))
+
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    lengths = array("I", [len(b) for b in encoded])
+    parts = [struct.pack("<I", len(encoded)), _le_bytes(lengths), b"".join(encoded)]
+    for name, _ in _COLUMNS:
+        data = _le_bytes(cols[name])
+        parts.append(struct.pack("<I", len(data)))
+        parts.append(data)
+    return MAGIC + zlib.compress(b"".join(parts), 6)
+
+
+def unpack_analyses(blob: bytes, as_dicts: bool = True) -> list:
+    """
+    Inverse of pack_analyses. Returns today's dict shape by default,
+    or CausalAnalysis objects with as_dicts=False. Reads v1 (pre-grounding)
+    files too.
+    """
+    if blob.startswith(MAGIC):
+        columns = _COLUMNS
+    elif blob.startswith(MAGIC_V1):
+        columns = _COLUMNS_V1
+    else:
+        raise ValueError("Not a ClimateCircle columnar result file")
+    raw = memoryview(zlib.decompress(blob[len(MAGIC):]))
+    pos = 0
+
+    (n_strings,) = struct.unpack_from("<I", raw, pos)
+    pos += 4
+    lengths = array("I")
+    lengths.frombytes(raw[pos:pos + n_strings * lengths.itemsize])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    pos += n_strings * lengths.itemsize
+    strings = []
+    for length in lengths:
+        strings.append(bytes(raw[pos:pos + length]).decode("utf-8"))
+        pos += length
+
+    cols = {}
+    for name, code in columns:
+        (size,) = struct.unpack_from("<I", raw, pos)
+        pos += 4
+        arr = array(code)
+        arr.frombytes(raw[pos:pos + size])
+        if sys.byteorder == "big":
+            arr.byteswap()
+        cols[name] = arr
+        pos += size
+    if columns is _COLUMNS_V1:
+        links = len(cols["l_conn"])
+        cols["l_ground"] = array("d", [math.nan]) * links
+        for name in ("l_gmatch", "l_start", "l_end"):
+            cols[name] = array("i", [_NONE]) * links
+
+    def s(idx):
+        return None if idx == _NONE else strings[idx]
+
+    results = []
+    for a in range(len(cols["a_summary"])):
+        pairs = [
+            CausalPair(s(cols["p_cause"][i]), s(cols["p_effect"][i]),
+                       None if cols["p_explicit"][i] == _NONE else bool(cols["p_explicit"][i]))
+            for i in range(cols["a_pair_off"][a], cols["a_pair_off"][a + 1])
+        ]
+        chains_text = [s(cols["c_text"][i]) for i in range(cols["a_chain_off"][a], cols["a_chain_off"][a + 1])]
+        confidence = []
+        for c in range(cols["a_cc_off"][a], cols["a_cc_off"][a + 1]):
+            links = [
+                CausalLink(
+                    s(cols["l_conn"][i]), _from_opt_float(cols["l_conf"][i]), s(cols["l_evidence"][i]),
+                    grounding_score=_from_opt_float(cols["l_ground"][i]),
+                    grounding_match=s(cols["l_gmatch"][i]) or "",
+                    evidence_start=None if cols["l_start"][i] == _NONE else cols["l_start"][i],
+                    evidence_end=None if cols["l_end"][i] == _NONE else cols["l_end"][i],
+                )
+                for i in range(cols["cc_link_off"][c], cols["cc_link_off"][c + 1])
+            ]
+            confidence.append(CausalChain(s(cols["cc_key"][c]), s(cols["cc_chain"][c]), links,
+                                          _from_opt_float(cols["cc_overall"][c])))
+        interventions = []
+        for v in range(cols["a_iv_off"][a], cols["a_iv_off"][a + 1]):
+            interventions.append(Intervention(
+                link=s(cols["iv_link"][v]),
+                confidence=_from_opt_float(cols["iv_conf"][v]),
+                roi_score=_from_opt_float(cols["iv_roi"][v]),
+                modifiability=s(cols["iv_mod"][v]),
+                leverage_blocked_effects=None if cols["iv_leverage"][v] == _NONE else cols["iv_leverage"][v],
+                suggested_interventions=[s(cols["sugg"][i]) for i in range(cols["iv_sugg_off"][v], cols["iv_sugg_off"][v + 1])],
+                reasoning=s(cols["iv_reason"][v]),
+            ))
+        meta = s(cols["a_meta"][a])
+        analysis = CausalAnalysis(
+            transcript_summary=s(cols["a_summary"][a]),
+            causal_pairs_found=cols["a_pairs_found"][a],
+            pairs=pairs,
+            causal_chains=chains_text,
+            confidence=confidence,
+            interventions=interventions,
+            processing_model=s(cols["a_model"][a]),
+            reasoning_depth=s(cols["a_depth"][a]),
+            error=s(cols["a_error"][a]),
+            metadata=json.loads(meta) if meta else {},
+        )
+        results.append(analysis.to_dict() if as_dicts else analysis)
+    return results
@@ -0,0 +1,272 @@
+# File: token_budget.py
+# Local token estimation and adaptive max_tokens sizing for every prompt
+
+import contextvars
+import re
+
+# Context windows (tokens) for the models used across the pipeline
+MODEL_CONTEXT_WINDOWS = {
+    "mixtral-8x7b-32768": 32768,
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "claude-3-5-sonnet-20241022": 200000,
+    "claude-3-5-haiku-20241022": 200000,
+}
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Stop reasons that mean the provider cut the output at max_tokens
+TRUNCATION_STOP_REASONS = ("max_tokens", "length")
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+TRIM_MARKER = "\n[... transcript trimmed to fit model context ...]\n"
+
+# (budget, decisions) of the run in progress in this thread or asyncio task
+_RUN_DECISIONS = contextvars.ContextVar("token_budget_run", default=(None, None))
+
+
+class ContextWindowExceeded(ValueError):
+    """A prompt leaves no room for output in the model window (not sent)."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (no tokenizer download needed).
+
+    BPE tokenizers average ~4 characters per token on English prose, but
+    punctuation-heavy text (JSON, arrows, quotes) splits into more tokens.
+    Taking the larger of the two estimates keeps us on the safe side.
+    """
+    if not text:
+        return 0
+    by_chars = len(text) / 4
+    by_pieces = len(_TOKEN_PATTERN.findall(text)) * 1.1
+    return int(max(by_chars, by_pieces)) + 1
+
+
+def is_truncated(response) -> bool:
+    """True if the provider stopped because it ran out of max_tokens."""
+    stop_reason = getattr(response, "stop_reason", None)
+    if stop_reason is None and getattr(response, "choices", None):
+        stop_reason = getattr(response.choices[0], "finish_reason", None)
+    return stop_reason in TRUNCATION_STOP_REASONS
+
+
+def _longest_prefix(text: str, max_tokens: int) -> str:
+    """Longest prefix of text whose estimate is at most max_tokens."""
+    # estimate_tokens never shrinks as text grows, and is above len / 4
+    low, high = 0, min(len(text), max(0, max_tokens) * 4)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+class TokenBudget:
+    """
+    Sizes each request's input and output budget against the model window.
+
+    - plan(): picks max_tokens from the expected output size, clamped to
+      what is left in the window after the prompt (of the model the request
+      is sent to, when a router picked another one)
+    - trim() / chunk(): shrink inputs that would not fit
+    - every decision is recorded so it can be surfaced in result metadata;
+      reset() starts a run's own record, so one instance can serve
+      concurrent runs (threads or asyncio tasks)
+    """
+
+    def __init__(self, model: str, context_window: int = None,
+                 min_output_tokens: int = 256, max_output_tokens: int = 4096,
+                 safety_margin: float = 0.1):
+        self.model = model
+        self.context_window = context_window or MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+        self.min_output_tokens = min_output_tokens
+        self.max_output_tokens = max_output_tokens
+        self.safety_margin = safety_margin
+        self._decisions = []  # outside any run started with reset()
+
+    @property
+    def decisions(self) -> list:
+        """Decisions of the run in progress in this context (see reset())."""
+        budget, decisions = _RUN_DECISIONS.get()
+        return decisions if budget is self else self._decisions
+
+    def window_for(self, model: str = None) -> int:
+        """Context window of model (this budget's own model by default)."""
+        if model is None or model == self.model:
+            return self.context_window
+        return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+    def usable_window_for(self, model: str = None) -> int:
+        return int(self.window_for(model) * (1 - self.safety_margin))
+
+    @property
+    def usable_window(self) -> int:
+        return self.usable_window_for()
+
+    def input_capacity(self, reserved_output: int, overhead_tokens: int = 0, models: list = None) -> int:
+        """
+        Tokens left for variable input once the output and fixed prompt are
+        reserved, in the smallest window among models (default: this budget's model).
+        """
+        window = min(self.usable_window_for(model) for model in (models or [self.model]))
+        return max(0, window - reserved_output - overhead_tokens)
+
+    def plan(self, step: str, prompt: str, expected_output_tokens: int, extra_input: str = "",
+             model: str = None, min_output_tokens: int = None) -> dict:
+        """
+        Decide max_tokens for one request sent to model (default: this budget's model).
+
+        The output budget is the expected size plus 25% headroom, bounded by
+        [min_output_tokens, max_output_tokens] and by the space the prompt leaves.
+        min_output_tokens overrides the budget's floor for this request (a
+        Claude request with extended thinking needs room for the thinking
+        budget plus the answer).
+        Raises ContextWindowExceeded (after recording the decision) when the
+        prompt leaves less than that floor: callers fit their inputs first,
+        so sending it anyway would only get a 400 from the provider.
+        """
+        model = model or self.model
+        floor = self.min_output_tokens if min_output_tokens is None else min_output_tokens
+        input_tokens = estimate_tokens(prompt) + estimate_tokens(extra_input)
+        max_tokens, available = self._size_output(input_tokens, expected_output_tokens, model, floor)
+
+        decision = {
+            "step": step,
+            "model": model,
+            "input_tokens_est": input_tokens,
+            "expected_output_tokens": expected_output_tokens,
+            "max_tokens": max_tokens,
+            "fits": available >= floor,
+            "trimmed": False,
+            "chunks": 1,
+            "continuations": 0,
+        }
+        self.decisions.append(decision)
+        if not decision["fits"]:
+            raise ContextWindowExceeded(
+                f"{step}: ~{input_tokens} prompt tokens leave {max(0, available)} of "
+                f"{self.window_for(model)} in the {model} window"
+            )
+        return decision
+
+    def plan_continuation(self, decision: dict, partial_output: str, expected_output_tokens: int) -> int:
+        """
+        max_tokens for continuing a reply that was cut at max_tokens.
+
+        Planned like the original request, for the output still expected and
+        with the partial reply (sent back as prefill) counted as input.
+        Returns 0 when that leaves less than min_output_tokens in the window:
+        the reply can't be continued. Counted in decision["continuations"].
+        """
+        output_so_far = estimate_tokens(partial_output)
+        max_tokens, available = self._size_output(
+            decision["input_tokens_est"] + output_so_far,
+            max(0, expected_output_tokens - output_so_far),
+            decision["model"],
+            self.min_output_tokens
+        )
+        if available < self.min_output_tokens:
+            return 0
+        decision["continuations"] += 1
+        return max_tokens
+
+    def _size_output(self, input_tokens: int, expected_output_tokens: int, model: str, floor: int) -> tuple:
+        """(max_tokens, tokens the input leaves in model's window) for one request."""
+        wanted = int(expected_output_tokens * 1.25)
+        wanted = max(floor, min(wanted, self.max_output_tokens))
+        available = self.usable_window_for(model) - input_tokens
+        return max(0, min(wanted, available)), available
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        """
+        Shrink text to roughly max_tokens, keeping the beginning and end.
+
+        Interview transcripts front-load context and end with the most recent
+        reflections, so the middle is the cheapest part to drop.
+        """
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        ratio = max_tokens / estimate_tokens(text)
+        keep = int(len(text) * ratio * 0.95)
+        head = keep * 2 // 3
+        tail = keep - head
+        if keep + len(TRIM_MARKER) >= len(text):
+            # Too short for the marker to pay for itself: a plain cut always shrinks
+            return text[:keep]
+        return text[:head] + TRIM_MARKER + (text[-tail:] if tail else "")
+
+    def chunk(self, text: str, max_tokens: int, overlap_tokens: int = 100) -> list:
+        """
+        Split text into pieces of at most max_tokens, breaking on line
+        boundaries and overlapping slightly so causal statements that span
+        a boundary still appear whole in one chunk. A line too long for one
+        chunk is cut mid-line, after the text that precedes it.
+        """
+        if estimate_tokens(text) <= max_tokens:
+            return [text]
+
+        chunks = []
+        current = []
+        current_tokens = 0  # upper bound: joining lines never adds tokens
+        carried_lines = 0   # lines at the start of current already sent as overlap
+        for line in text.splitlines(keepends=True):
+            line_tokens = estimate_tokens(line)
+            if current and current_tokens + line_tokens > max_tokens >= line_tokens:
+                chunks.append("".join(current))
+                # carry a short tail forward as overlap
+                carried = []
+                carried_tokens = 0
+                for prev in reversed(current):
+                    carried_tokens += estimate_tokens(prev)
+                    if carried_tokens > overlap_tokens:
+                        break
+                    carried.insert(0, prev)
+                current = carried
+                current_tokens = sum(estimate_tokens(c) for c in current)
+                carried_lines = len(carried)
+            while current_tokens + line_tokens > max_tokens:
+                # a line longer than a chunk: top up the chunk in progress
+                # (lines before it, or the overlap) and cut the rest mid-line
+                piece = _longest_prefix(line, max_tokens - current_tokens)
+                if current and not piece:
+                    # no room left: send what is new, drop a bare overlap
+                    if len(current) > carried_lines:
+                        chunks.append("".join(current))
+                else:
+                    piece = piece or line[0]  # max_tokens below one character's estimate
+                    chunks.append("".join(current) + piece)
+                    line = line[len(piece):]
+                    line_tokens = estimate_tokens(line)
+                current, current_tokens, carried_lines = [], 0, 0
+            if line:
+                current.append(line)
+                current_tokens += line_tokens
+        if len(current) > carried_lines:
+            chunks.append("".join(current))
+        return chunks
+
+    def summary(self) -> dict:
+        """Budget metadata for a whole run (attached to pipeline results)."""
+        return {
+            "model": self.model,
+            "context_window": self.context_window,
+            "requests": len(self.decisions),
+            "input_tokens_est": sum(d["input_tokens_est"] for d in self.decisions),
+            "max_tokens_reserved": sum(d["max_tokens"] for d in self.decisions),
+            "trimmed_inputs": sum(1 for d in self.decisions if d["trimmed"]),
+            "continuations": sum(d["continuations"] for d in self.decisions),
+            "decisions": list(self.decisions),
+        }
+
+    def reset(self):
+        """
+        Start a new run: decisions from here on are recorded for this thread
+        or asyncio task only (and for work it hands off with a copy of its
+        context, such as tasks it gathers).
+        """
+        _RUN_DECISIONS.set((self, []))
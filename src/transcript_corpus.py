@@ -0,0 +1,288 @@
+# File: transcript_corpus.py
+# Packed, memory-mapped transcript corpus: one file instead of thousands of .txt files
+
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import struct
+
+MAGIC = b"CCTCORP1"
+
+# magic, entry count, reserved, ids blob offset, index offset
+_HEADER = struct.Struct("<8sIIQQ")
+# id offset in ids blob, id length, transcript offset, transcript length, sha256
+_ENTRY = struct.Struct("<IHQQ32s")
+MAX_ID_BYTES = 0xFFFF  # id length is an unsigned short
+
+
+class CorpusFormatError(ValueError):
+    """File is not a packed transcript corpus (or is truncated)."""
+
+
+def participant_id_from_path(path: Path) -> str:
+    """data/sample_transcripts/participant_001.txt -> '001'"""
+    stem = path.stem
+    return stem[len("participant_"):] if stem.startswith("participant_") else stem
+
+
+def iter_transcript_dir(directory, pattern: str = "*.txt"):
+    """(participant_id, utf-8 bytes) for each transcript file, in name order."""
+    for path in sorted(Path(directory).glob(pattern)):
+        yield participant_id_from_path(path), path.read_bytes()
+
+
+def iter_transcript_jsonl(path, id_key: str = "participant_id", text_key: str = "transcript"):
+    """(participant_id, utf-8 bytes) for each line of a JSONL export."""
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield str(record[id_key]), record[text_key].encode("utf-8")
+
+
+def build_corpus(source, out_path, pattern: str = "*.txt",
+                 id_key: str = "participant_id", text_key: str = "transcript") -> dict:
+    """
+    Pack a directory of transcripts (or a JSONL export) into one corpus file.
+
+    Layout: header | transcripts back to back | ids blob | fixed-size index.
+    Transcripts are streamed to disk as they are read, so building needs
+    memory for the index only. The file is written atomically.
+    Returns {"path", "transcripts", "bytes"}.
+    """
+    source = Path(source)
+    if source.is_dir():
+        records = iter_transcript_dir(source, pattern)
+    else:
+        records = iter_transcript_jsonl(source, id_key, text_key)
+
+    out_path = Path(out_path)
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    entries = []
+    seen = set()
+    try:
+        with tmp.open("wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            offset = _HEADER.size
+            for participant_id, data in records:
+                if participant_id in seen:
+                    raise ValueError(f"Duplicate participant id '{participant_id}' in {source}")
+                if len(participant_id.encode("utf-8")) > MAX_ID_BYTES:
+                    raise ValueError(
+                        f"Participant id '{participant_id[:40]}...' in {source} is longer than {MAX_ID_BYTES} bytes"
+                    )
+                seen.add(participant_id)
+                f.write(data)
+                entries.append((participant_id, offset, len(data), hashlib.sha256(data).digest()))
+                offset += len(data)
+
+            ids_offset = offset
+            ids = [participant_id.encode("utf-8") for participant_id, _, _, _ in entries]
+            f.write(b"".join(ids))
+            index_offset = ids_offset + sum(len(i) for i in ids)
+
+            id_offset = 0
+            for encoded, (_, start, length, digest) in zip(ids, entries):
+                f.write(_ENTRY.pack(id_offset, len(encoded), start, length, digest))
+                id_offset += len(encoded)
+
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, len(entries), 0, ids_offset, index_offset))
+    except BaseException:
+        tmp.unlink(missing_ok=True)  # no half-written corpus left behind
+        raise
+    tmp.replace(out_path)  # atomic: readers never see half a corpus
+
+    return {"path": str(out_path), "transcripts": len(entries), "bytes": out_path.stat().st_size}
+
+
+class TranscriptCorpus:
+    """
+    Read-only, memory-mapped view of a packed corpus.
+
+    - Opening maps the file and reads the header; nothing else is copied
+    - corpus["001"] decodes one transcript on demand (O(1) after the first
+      lookup builds an id -> position dict from the index)
+    - shard(k, n) gives worker k of n a contiguous, byte-balanced slice of ids,
+      so workers only fault in their own pages
+    - raw() views point into the mapping: release them (view.release() or
+      drop them) before close(). close() always closes the file; a mapping
+      with views still alive is unmapped when the last view is released
+
+    Usage:
+        with TranscriptCorpus("corpus.cctc") as corpus:
+            for participant_id in corpus.shard(worker, workers):
+                transcript = corpus[participant_id]
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise CorpusFormatError(f"{self.path} is empty")
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise CorpusFormatError(f"{self.path} is too short for a corpus header")
+
+        magic, self._count, _, self._ids_offset, self._index_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or self._index_offset + self._count * _ENTRY.size > len(self._map):
+            self.close()
+            raise CorpusFormatError(f"{self.path} is not a packed transcript corpus")
+        self._positions = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        try:
+            if getattr(self, "_map", None) is not None and not self._map.closed:
+                self._map.close()
+        except BufferError:
+            # raw() views still exported: they keep the mapping alive until released
+            self._map = None
+        finally:
+            self._file.close()
+
+    # ---------- index ----------
+
+    def _entry(self, position: int) -> tuple:
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        return _ENTRY.unpack_from(self._map, self._index_offset + position * _ENTRY.size)
+
+    def _id_at(self, position: int) -> str:
+        id_offset, id_length, _, _, _ = self._entry(position)
+        start = self._ids_offset + id_offset
+        return self._map[start:start + id_length].decode("utf-8")
+
+    def _position(self, participant_id: str) -> int:
+        if self._positions is None:
+            self._positions = {self._id_at(i): i for i in range(self._count)}
+        try:
+            return self._positions[participant_id]
+        except KeyError:
+            raise KeyError(participant_id) from None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, participant_id) -> bool:
+        try:
+            self._position(participant_id)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def ids(self) -> list:
+        """Participant ids in corpus order."""
+        return [self._id_at(i) for i in range(self._count)]
+
+    def entry(self, participant_id: str) -> dict:
+        """Index entry: {"participant_id", "offset", "length", "sha256"}."""
+        _, _, offset, length, digest = self._entry(self._position(participant_id))
+        return {"participant_id": participant_id, "offset": offset, "length": length, "sha256": digest.hex()}
+
+    # ---------- transcripts ----------
+
+    def raw(self, participant_id: str) -> memoryview:
+        """
+        Zero-copy view of one transcript's UTF-8 bytes. Release it before
+        close() to unmap the file then (see the class docstring).
+        """
+        _, _, offset, length, _ = self._entry(self._position(participant_id))
+        return memoryview(self._map)[offset:offset + length]
+
+    def __getitem__(self, participant_id: str) -> str:
+        _, _, offset, length, _ = self._entry(self._position(participant_id))
+        return self._map[offset:offset + length].decode("utf-8")
+
+    def get(self, participant_id: str, default=None):
+        try:
+            return self[participant_id]
+        except KeyError:
+            return default
+
+    def items(self, participant_ids=None):
+        """Lazily yield (participant_id, transcript), in corpus order by default."""
+        for participant_id in (self.ids() if participant_ids is None else participant_ids):
+            yield participant_id, self[participant_id]
+
+    def verify(self, participant_ids=None) -> list:
+        """Ids whose bytes no longer match their stored sha256 (empty = intact)."""
+        bad = []
+        for participant_id in (self.ids() if participant_ids is None else participant_ids):
+            _, _, offset, length, digest = self._entry(self._position(participant_id))
+            if hashlib.sha256(self._map[offset:offset + length]).digest() != digest:
+                bad.append(participant_id)
+        return bad
+
+    # ---------- sharding ----------
+
+    def shard(self, index: int, count: int) -> list:
+        """
+        Ids for worker `index` of `count`: a contiguous run of the corpus with
+        roughly 1/count of its transcript bytes. Shards are disjoint and cover
+        every id.
+        """
+        if not 0 <= index < count:
+            raise ValueError(f"shard index {index} out of range for {count} shards")
+        lengths = [self._entry(i)[3] for i in range(self._count)]
+        total = sum(lengths)
+        low, high = total * index / count, total * (index + 1) / count
+        ids = []
+        position = 0
+        for i, length in enumerate(lengths):
+            # A transcript belongs to the shard that contains its midpoint
+            midpoint = position + length / 2
+            if low <= midpoint < high or (index == count - 1 and midpoint >= high):
+                ids.append(self._id_at(i))
+            position += length
+        return ids
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "transcripts": self._count,
+            "bytes": len(self._map),
+            "transcript_bytes": sum(self._entry(i)[3] for i in range(self._count)),
+        }
+
+
+# ============ CLI ============
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or inspect a packed transcript corpus")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="pack a transcript directory or JSONL export")
+    build.add_argument("source", help="directory of participant_*.txt files, or a .jsonl export")
+    build.add_argument("out", help="corpus file to write (e.g. data/corpus.cctc)")
+    build.add_argument("--pattern", default="*.txt", help="file glob when source is a directory")
+    build.add_argument("--id-key", default="participant_id", help="JSONL participant id field")
+    build.add_argument("--text-key", default="transcript", help="JSONL transcript field")
+
+    info = sub.add_parser("info", help="print corpus stats (and verify hashes)")
+    info.add_argument("corpus")
+    info.add_argument("--verify", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        print(json.dumps(build_corpus(args.source, args.out, args.pattern, args.id_key, args.text_key)))
+    else:
+        with TranscriptCorpus(args.corpus) as corpus:
+            stats = corpus.stats()
+            if args.verify:
+                stats["corrupt"] = corpus.verify()
+            print(json.dumps(stats))
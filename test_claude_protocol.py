@@ -0,0 +1,203 @@
+# Tests for the Claude agent's streaming helpers (src/claude_persistent_protocol.py)
+# and the memory cache behind its protocol files (src/memory_cache.py)
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.claude_persistent_protocol import ClaudeTherapeuticAgent, MemoryUpdateStreamSplitter
+from src.memory_cache import MemoryCache
+
+THERAPY = "I hear you. Try {box breathing} tonight, and notice what shifts.\n\n"
+TRAILER = '```json\n{\n  "memory_updates": {"sessions.md": "box breathing suggested"}\n}\n```'
+REPLY = THERAPY + TRAILER
+
+
+def _split(text: str, size: int):
+    splitter = MemoryUpdateStreamSplitter()
+    shown = [splitter.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    shown.append(splitter.finish())
+    return splitter, "".join(shown)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13, 64, len(REPLY)])
+def test_splitter_hides_the_trailer_at_any_chunk_size(size):
+    splitter, shown = _split(REPLY, size)
+    assert shown == splitter.visible == THERAPY
+    assert splitter.memory_updates == {"sessions.md": "box breathing suggested"}
+
+
+@pytest.mark.parametrize("size", [1, 4, 16])
+def test_splitter_parses_updates_before_the_stream_ends(size):
+    splitter = MemoryUpdateStreamSplitter()
+    body = REPLY[:-len("\n```")]
+    for i in range(0, len(body), size):
+        splitter.feed(body[i:i + size])
+    assert splitter.memory_updates == {"sessions.md": "box breathing suggested"}
+
+
+@pytest.mark.parametrize("size", [1, 3, 7])
+def test_splitter_releases_braces_that_are_not_the_trailer(size):
+    text = 'Write {"feelings": "worry"} down, then ``` close the journal.'
+    splitter, shown = _split(text, size)
+    assert shown == text
+    assert splitter.memory_updates is None
+
+
+def test_splitter_without_trailer():
+    splitter, shown = _split(THERAPY, 4)
+    assert shown == THERAPY
+    assert splitter.memory_updates is None
+
+
+class _StubStream:
+    def __init__(self, text):
+        self.text_stream = [text[i:i + 10] for i in range(0, len(text), 10)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get_final_message(self):
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=REPLY)], stop_reason="end_turn")
+
+
+class _StubMessages:
+    def __init__(self):
+        self.requests = []
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        return _StubStream(REPLY)
+
+
+@pytest.mark.parametrize("thinking", [False, True])
+def test_run_session_stream_thinks_only_when_asked(tmp_path, thinking):
+    messages = _StubMessages()
+    agent = ClaudeTherapeuticAgent("key", "P_test", memory_dir=str(tmp_path),
+                                   client=SimpleNamespace(messages=messages))
+    events = list(agent.run_session_stream(1, "I can't sleep", thinking=thinking))
+
+    assert ("thinking" in messages.requests[0]) is thinking
+    assert "".join(e["text"] for e in events if e["type"] == "text") == THERAPY
+    assert [e["type"] for e in events if e["type"] != "text"] == ["memory_updates", "done"]
+    result = events[-1]["result"]
+    assert result["memory_updates_applied"] == ["sessions.md"]
+    assert result["thinking"] is thinking
+    assert "box breathing suggested" in (tmp_path / "participant_P_test" / "sessions.md").read_text()
+
+
+class _CreateMessages:
+    """messages.create stub: serves (text, stop_reason) replies in order."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        text, stop_reason = self.replies.pop(0)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason=stop_reason)
+
+
+def test_truncated_session_is_continued_without_trailing_whitespace(tmp_path):
+    reply = REPLY.replace("{box breathing}", "box breathing")
+    cut = reply.index("\n\n") + 1  # inside the blank line before the trailer
+    messages = _CreateMessages((reply[:cut], "max_tokens"), (reply[cut:], "end_turn"))
+    agent = ClaudeTherapeuticAgent("key", "P_test", memory_dir=str(tmp_path),
+                                   client=SimpleNamespace(messages=messages))
+    result = agent.run_session(1, "I can't sleep")
+
+    first, continuation = messages.requests
+    assert continuation["messages"][-1] == {"role": "assistant", "content": reply[:cut].rstrip()}
+    assert "thinking" not in continuation
+    assert continuation["max_tokens"] < first["max_tokens"]
+    assert result["memory_updates_applied"] == ["sessions.md"]
+    assert result["token_budget"]["continuations"] == 1
+
+
+def test_thinking_requests_leave_room_above_the_thinking_budget(tmp_path):
+    messages = _CreateMessages((REPLY, "end_turn"))
+    agent = ClaudeTherapeuticAgent("key", "P_test", memory_dir=str(tmp_path),
+                                   client=SimpleNamespace(messages=messages))
+    agent.budget.max_output_tokens = 1000  # below the thinking budget
+    agent.run_session(1, "I can't sleep")
+    request = messages.requests[0]
+    assert request["max_tokens"] > request["thinking"]["budget_tokens"]
+
+
+# ---------- memory cache (src/memory_cache.py) ----------
+
+
+def _participant(tmp_path, name: str, files: dict):
+    directory = tmp_path / name
+    directory.mkdir()
+    for stem, text in files.items():
+        (directory / f"{stem}.md").write_text(text)
+    return directory
+
+
+def test_cache_serves_unchanged_files_from_memory(tmp_path):
+    cache = MemoryCache()
+    directory = _participant(tmp_path, "p1", {"sessions": "# Sessions", "assessment": "# Assessment"})
+    assert cache.read_dir(directory) == {"sessions": "# Sessions", "assessment": "# Assessment"}
+    assert cache.read_dir(directory) == {"sessions": "# Sessions", "assessment": "# Assessment"}
+    metrics = cache.metrics()
+    assert (metrics["misses"], metrics["hits"]) == (2, 2)
+
+
+def test_cache_rereads_files_changed_or_deleted_on_disk(tmp_path):
+    cache = MemoryCache()
+    directory = _participant(tmp_path, "p1", {"sessions": "# Sessions", "assessment": "# Assessment"})
+    cache.read_dir(directory)
+    (directory / "sessions.md").write_text("# Sessions\n\n[Session #1]\nedited elsewhere")
+    (directory / "assessment.md").unlink()
+    assert cache.read_dir(directory) == {"sessions": "# Sessions\n\n[Session #1]\nedited elsewhere"}
+    assert cache.metrics()["invalidations"] == 2
+
+
+def test_cache_writes_through(tmp_path):
+    cache = MemoryCache()
+    directory = _participant(tmp_path, "p1", {"sessions": "# Sessions"})
+    cache.write_file(directory / "sessions.md", "# Sessions\n\nnew note")
+    assert (directory / "sessions.md").read_text() == "# Sessions\n\nnew note"
+    assert cache.read_file(directory / "sessions.md") == "# Sessions\n\nnew note"
+    assert cache.metrics()["misses"] == 0
+
+
+def test_cache_evicts_least_recently_used_participants(tmp_path):
+    cache = MemoryCache(max_bytes=250)
+    first = _participant(tmp_path, "p1", {"sessions": "a" * 100})
+    second = _participant(tmp_path, "p2", {"sessions": "b" * 100})
+    third = _participant(tmp_path, "p3", {"sessions": "c" * 100})
+    cache.read_dir(first)
+    cache.read_dir(second)
+    cache.read_dir(first)  # p2 is now the least recently used
+    cache.read_dir(third)
+    metrics = cache.metrics()
+    assert (metrics["evictions"], metrics["cached_dirs"], metrics["cached_bytes"]) == (1, 2, 200)
+    cache.reset_metrics()
+    cache.read_dir(first)
+    cache.read_dir(second)
+    assert (cache.metrics()["hits"], cache.metrics()["misses"]) == (1, 1)
+
+
+def test_cache_invalidate(tmp_path):
+    cache = MemoryCache()
+    first = _participant(tmp_path, "p1", {"sessions": "a"})
+    second = _participant(tmp_path, "p2", {"sessions": "b"})
+    cache.read_dir(first)
+    cache.read_dir(second)
+    cache.invalidate(first)
+    assert cache.metrics()["cached_dirs"] == 1
+    cache.invalidate()
+    assert (cache.metrics()["cached_dirs"], cache.metrics()["cached_bytes"]) == (0, 0)
+
+
+def test_one_lock_per_participant_across_caches(tmp_path):
+    directory = _participant(tmp_path, "p1", {})
+    lock = MemoryCache().lock(directory)
+    assert MemoryCache().lock(tmp_path / "p1" / ".." / "p1") is lock
+    assert MemoryCache().lock(tmp_path / "p2") is not lock
@@ -0,0 +1,134 @@
+# Tests for local evidence grounding (src/evidence_grounding.py)
+
+import copy
+
+import pytest
+
+from src.evidence_grounding import (
+    GROUNDING_KEYS, TranscriptIndex, ground_cohort, ground_confidence_analysis, strip_grounding
+)
+
+TRANSCRIPT = (
+    "I've been really anxious lately. Every time I see climate news, I get this knot in my "
+    "stomach. Then I can't sleep at night because I keep thinking about wildfires."
+)
+
+
+def _quoted(result: dict) -> str:
+    start, end = result["evidence_offsets"]
+    return TRANSCRIPT[start:end]
+
+
+@pytest.mark.parametrize("evidence, quoted", [
+    ("I get this knot in my stomach", "I get this knot in my stomach"),
+    ("every time i see CLIMATE news", "Every time I see climate news"),
+    ("I  can't sleep!", "I can't sleep"),
+])
+def test_exact_match_ignores_case_punctuation_and_whitespace(evidence, quoted):
+    result = TranscriptIndex(TRANSCRIPT).ground(evidence)
+    assert (result["grounding_score"], result["grounding_match"]) == (1.0, "exact")
+    assert _quoted(result) == quoted
+
+
+def test_a_paraphrase_matches_on_shingles_only():
+    result = TranscriptIndex(TRANSCRIPT).ground("I can't sleep at night because I keep worrying about wildfires")
+    assert result["grounding_match"] == "fuzzy"
+    assert 0 < result["grounding_score"] < 1
+    assert _quoted(result) == "I can't sleep at night because I keep thinking about wildfires"
+
+
+@pytest.mark.parametrize("evidence", [
+    "the participant reports insomnia",
+    "knot stomach",  # no shared 3-word shingle
+    "sleep",         # too short to prove anything
+    "",
+])
+def test_unsupported_evidence_has_no_match(evidence):
+    assert TranscriptIndex(TRANSCRIPT).ground(evidence) == {
+        "grounding_score": 0.0, "grounding_match": "none", "evidence_offsets": None
+    }
+
+
+def test_exact_match_only_on_token_boundaries():
+    index = TranscriptIndex(TRANSCRIPT)
+    assert index.find_exact(["sleep", "at"]) is not None
+    assert index.find_exact(["leep", "at"]) is None
+    assert index.find_exact(["climate", "new"]) is None
+
+
+def test_ellipsis_fragments_are_grounded_separately():
+    result = TranscriptIndex(TRANSCRIPT).ground("anxious lately ... can't sleep at night")
+    assert result["grounding_match"] == "exact"
+    # offsets span from the first fragment to the last
+    assert _quoted(result).startswith("anxious lately.") and _quoted(result).endswith("can't sleep at night")
+
+
+def test_an_empty_transcript_grounds_nothing():
+    assert TranscriptIndex("").ground("I can't sleep")["grounding_match"] == "none"
+
+
+def _confidence():
+    return {
+        "chain_1": {
+            "chain": "climate news → anxiety",
+            "links": [
+                {"connection": "climate news→anxiety", "confidence": 0.9,
+                 "evidence": "Every time I see climate news, I get this knot"},
+                {"connection": "anxiety→insomnia", "confidence": 0.6, "evidence": "the participant reports insomnia"},
+            ],
+            "overall_confidence": 0.75,
+        },
+        "chain_2": {"chain": "wildfires → insomnia", "links": [], "overall_confidence": None},
+    }
+
+
+def test_ground_confidence_analysis_annotates_links_in_place():
+    confidence = _confidence()
+    summary = ground_confidence_analysis(TRANSCRIPT, confidence)
+    assert summary == {"links": 2, "grounded": 1, "ungrounded": 1, "mean_score": 0.5}
+    grounded, invented = confidence["chain_1"]["links"]
+    assert grounded["grounding_match"] == "exact"
+    assert _quoted(grounded) == "Every time I see climate news, I get this knot"
+    assert invented["grounding_match"] == "none"
+
+
+def test_verified_quotes_keep_their_grounding():
+    verified = {"I read about the floods every night": {
+        "grounding_score": 1.0, "grounding_match": "exact", "evidence_offsets": [10, 45]
+    }}
+    confidence = {"chain_1": {"chain": "floods → anxiety", "links": [
+        {"connection": "floods→anxiety", "confidence": 0.7, "evidence": "I read about the FLOODS every night."},
+        {"connection": "news→anxiety", "confidence": 0.9, "evidence": "Every time I see climate news"},
+        {"connection": "news→insomnia", "confidence": 0.5, "evidence": "I read about the floods"},
+    ]}}
+    summary = ground_confidence_analysis(TRANSCRIPT, confidence, verified=verified)
+    carried, here, partial = confidence["chain_1"]["links"]
+    assert carried["evidence_offsets"] == [10, 45] and carried["grounding_match"] == "exact"
+    # found in this transcript: annotated against it
+    assert _quoted(here) == "Every time I see climate news"
+    # only whole verified quotes are carried over
+    assert partial["grounding_match"] == "none"
+    assert summary["ungrounded"] == 1
+
+
+def test_ground_confidence_analysis_without_links():
+    assert ground_confidence_analysis(TRANSCRIPT, {})["mean_score"] is None
+
+
+def test_strip_grounding_returns_an_unannotated_copy():
+    confidence = _confidence()
+    ground_confidence_analysis(TRANSCRIPT, confidence)
+    annotated = copy.deepcopy(confidence)
+    assert strip_grounding(confidence) == _confidence()
+    assert confidence == annotated
+    assert not any(key in link for link in strip_grounding(confidence)["chain_1"]["links"] for key in GROUNDING_KEYS)
+
+
+def test_ground_cohort_weights_scores_by_link_count():
+    analyses = [{"confidence_analysis": _confidence()}, {"confidence_analysis": _confidence()}, {}]
+    other = "Every time I see climate news, I get this knot. Later, the participant reports insomnia."
+    cohort = ground_cohort([(TRANSCRIPT, analyses[0]), (other, analyses[1]), (other, analyses[2])])
+    # (0.5 * 2 links + 1.0 * 2 links) / 4 links; the participant without links doesn't count
+    assert (cohort["participants"], cohort["links"], cohort["ungrounded"], cohort["mean_score"]) == (3, 4, 1, 0.75)
+    assert analyses[1]["evidence_grounding"]["grounded"] == 2
+    assert analyses[2]["evidence_grounding"]["links"] == 0
@@ -0,0 +1,225 @@
+# Tests for the Groq engine (src/causal_reasoning_engine.py)
+
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from src.async_agents import AsyncCausalReasoningEngine
+from src.causal_graph import CausalGraph
+from src.causal_reasoning_engine import MAX_CONTINUATIONS, CausalReasoningEngine
+from src.evidence_grounding import GROUNDING_KEYS
+
+
+# ---------- continuation of truncated replies ----------
+
+
+class _Messages:
+    """messages.create stub: serves replies in order, recording each request."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        text, stop_reason = self.replies.pop(0)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason=stop_reason)
+
+
+def test_truncated_reply_is_continued_from_a_stripped_prefill():
+    reply = '{"pairs": [{"cause": "climate news", "effect": "anxiety"}]}'
+    messages = _Messages((reply[:12] + "\n  ", "length"), (reply[12:], "stop"))
+    engine = CausalReasoningEngine("key", client=SimpleNamespace(messages=messages))
+
+    assert engine.extract_causal_pairs("Climate news makes me anxious.")["pairs"] == [
+        {"cause": "climate news", "effect": "anxiety"}
+    ]
+    first, continuation = messages.requests
+    assert continuation["messages"][-1] == {"role": "assistant", "content": reply[:12]}
+    # re-planned for the rest of the output, not the first request's max_tokens
+    decision = engine.budget.decisions[-1]
+    assert continuation["max_tokens"] == engine.budget.plan_continuation(dict(decision), reply[:12],
+                                                                          decision["expected_output_tokens"])
+    assert continuation["max_tokens"] < first["max_tokens"]
+    assert (decision["continuations"], decision["truncated"]) == (1, False)
+
+
+def test_continuations_stop_at_the_limit():
+    messages = _Messages(*[('{"pairs": [', "length")] * (MAX_CONTINUATIONS + 1))
+    engine = CausalReasoningEngine("key", client=SimpleNamespace(messages=messages))
+    assert engine.extract_causal_pairs("text") == {"pairs": []}
+    assert len(messages.requests) == MAX_CONTINUATIONS + 1
+    assert engine.budget.decisions[-1]["truncated"] is True
+
+
+# ---------- step 3 scoring modes ----------
+
+
+CHAINS = ["climate news → anxiety", "anxiety → insomnia", "climate news → anxiety → insomnia"]
+
+
+class _Scorer:
+    """messages.create stub for step 3: scores every chain in the prompt, except malformed ones."""
+
+    def __init__(self, malformed=()):
+        self.malformed = set(malformed)
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        listed = prompt.split("CAUSAL CHAINS:\n")[1].split("\n\n")[0].splitlines()
+        scores = {}
+        for k, line in enumerate(listed, 1):
+            chain = line[2:]  # "- A → B"
+            links = "n/a" if chain in self.malformed else [
+                {"connection": chain, "confidence": 0.8, "evidence": "I read the news"}
+            ]
+            scores[f"chain_{k}"] = {"chain": chain, "links": links, "overall_confidence": 0.8}
+        text = json.dumps(scores, ensure_ascii=False)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason="stop")
+
+
+def _score(malformed=(), **options):
+    engine = CausalReasoningEngine("key", client=SimpleNamespace(messages=_Scorer(malformed)), **options)
+    return engine.evaluate_causal_confidence("I read the news and can't sleep.", CHAINS)
+
+
+@pytest.mark.parametrize("malformed", [(), ("anxiety → insomnia",)], ids=["valid", "malformed"])
+@pytest.mark.parametrize("batch_size", [1, 2])
+def test_parallel_and_sequential_scoring_return_the_same_keys(malformed, batch_size):
+    sequential = _score(malformed)
+    parallel = _score(malformed, parallel_confidence=True, confidence_batch_size=batch_size)
+    assert list(sequential) == list(parallel) == ["chain_1", "chain_2", "chain_3"]
+    assert [c["chain"] for c in parallel.values()] == CHAINS
+    assert parallel == sequential
+
+
+def test_an_unscored_chain_keeps_its_key():
+    scored = _score(["anxiety → insomnia"], parallel_confidence=True)
+    assert scored["chain_2"] == {"chain": "anxiety → insomnia", "links": [], "overall_confidence": None}
+    assert scored["chain_3"]["overall_confidence"] == 0.8
+
+
+# ---------- incremental sessions ----------
+
+
+SESSIONS = ["Every time I see climate news I feel anxious.", "Lately the anxiety keeps me up at night."]
+
+
+class _Sessions:
+    """messages.create stub for the incremental flow; session 2 re-quotes session 1's evidence."""
+
+    def __init__(self):
+        self.session = 1
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        if "extract ALL" in prompt:
+            pair = ["climate news", "anxiety"] if self.session == 1 else ["anxiety", "insomnia"]
+            reply = {"pairs": [{"cause": pair[0], "effect": pair[1]}]}
+        elif "generate complete" in prompt:
+            return _reply("1. climate news → anxiety" + (" → insomnia" if self.session == 2 else ""))
+        elif "evaluate confidence" in prompt:
+            chain = prompt.split("CAUSAL CHAINS:\n")[1].splitlines()[0][2:]
+            links = [{"connection": "climate news→anxiety", "confidence": 0.95,
+                      "evidence": "Every time I see climate news I feel anxious"}]
+            if self.session == 2:
+                links.append({"connection": "anxiety→insomnia", "confidence": 0.8,
+                              "evidence": "the anxiety keeps me up at night"})
+            reply = {"chain_1": {"chain": chain, "links": links, "overall_confidence": 0.9}}
+        else:
+            reply = {"highest_roi_interventions": [{"link": "anxiety → insomnia", "roi_score": 0.9}]}
+        return _reply(json.dumps(reply, ensure_ascii=False))
+
+
+def _reply(text):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason="stop")
+
+
+def test_prior_session_evidence_stays_grounded():
+    messages = _Sessions()
+    engine = CausalReasoningEngine("key", client=SimpleNamespace(messages=messages))
+    graph = CausalGraph("p1")
+    first = engine.analyze_session_incremental(SESSIONS[0], graph, 1)
+    prior = first["confidence_analysis"]["chain_1"]["links"][0]
+    assert prior["grounding_match"] == "exact"
+
+    messages.session = 2
+    second = engine.analyze_session_incremental(SESSIONS[1], graph, 2)
+    carried, new = second["confidence_analysis"]["chain_1"]["links"]
+    # session 1's quote isn't in session 2's text: it keeps its session 1 grounding
+    assert {key: carried[key] for key in GROUNDING_KEYS} == {key: prior[key] for key in GROUNDING_KEYS}
+    assert new["grounding_match"] == "exact"
+    assert second["evidence_grounding"]["ungrounded"] == 0
+    assert graph.evidence_for({"climate news", "anxiety", "insomnia"}) == [
+        "Every time I see climate news I feel anxious", "the anxiety keeps me up at night"
+    ]
+
+
+# ---------- token budget per run ----------
+
+
+def _pipeline_reply(prompt: str) -> str:
+    """Replies for all four steps (three chains, every one scored)."""
+    if "extract ALL" in prompt:
+        reply = {"pairs": [{"cause": "climate news", "effect": "anxiety"}, {"cause": "anxiety", "effect": "insomnia"}]}
+    elif "generate complete" in prompt:
+        return "\n".join(f"{n}. {chain}" for n, chain in enumerate(CHAINS, 1))
+    elif "evaluate confidence" in prompt:
+        listed = prompt.split("CAUSAL CHAINS:\n")[1].split("\n\n")[0].splitlines()
+        reply = {f"chain_{k}": {"chain": line[2:], "links": [], "overall_confidence": 0.8}
+                 for k, line in enumerate(listed, 1)}
+    else:
+        reply = {"highest_roi_interventions": [{"link": "anxiety → insomnia", "roi_score": 0.9}]}
+    return json.dumps(reply, ensure_ascii=False)
+
+
+def _pipeline_client(asynchronous: bool = False):
+    def create(**kwargs):
+        time.sleep(random.random() * 0.01)
+        return _reply(_pipeline_reply(kwargs["messages"][0]["content"]))
+
+    async def acreate(**kwargs):
+        await asyncio.sleep(random.random() * 0.01)
+        return _reply(_pipeline_reply(kwargs["messages"][0]["content"]))
+
+    return SimpleNamespace(messages=SimpleNamespace(create=acreate if asynchronous else create))
+
+
+STEPS = ["extract_causal_pairs", "generate_implicit_causal_chains"] + ["evaluate_causal_confidence_batch"] * 3 + [
+    "identify_intervention_points"
+]
+
+
+def test_concurrent_async_runs_count_their_own_requests():
+    engine = AsyncCausalReasoningEngine("key", client=_pipeline_client(asynchronous=True), parallel_confidence=True)
+
+    async def run():
+        return await asyncio.gather(*(engine.analyze_transcript_end_to_end(f"transcript {i} " * 5) for i in range(20)))
+
+    for result in asyncio.run(run()):
+        assert result["token_budget"]["requests"] == 6
+        assert sorted(d["step"] for d in result["token_budget"]["decisions"]) == sorted(STEPS)
+
+
+def test_concurrent_threads_count_their_own_requests():
+    engine = CausalReasoningEngine("key", client=_pipeline_client(), parallel_confidence=True)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(engine.analyze_transcript_end_to_end, [f"transcript {i} " * 5 for i in range(16)]))
+    for result in results:
+        # the three confidence batches run in worker threads of their own
+        assert result["token_budget"]["requests"] == 6
+        assert sorted(d["step"] for d in result["token_budget"]["decisions"]) == sorted(STEPS)
+
+
+def test_sync_and_async_runs_plan_the_same_requests():
+    transcript = "Climate news makes me anxious, and the anxiety keeps me up at night."
+    sync = CausalReasoningEngine("key", client=_pipeline_client()).analyze_transcript_end_to_end(transcript)
+    engine = AsyncCausalReasoningEngine("key", client=_pipeline_client(asynchronous=True))
+    async_ = asyncio.run(engine.analyze_transcript_end_to_end(transcript))
+    assert sync["token_budget"] == async_["token_budget"]
+    assert sync["token_budget"]["requests"] == 4
@@ -0,0 +1,132 @@
+# Tests for hedged provider calls (src/hedging.py)
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.hedging import HedgedCaller, LatencyTracker
+
+
+class _Client:
+    """Fake provider endpoint: the n-th request takes delays[n] seconds (the last delay repeats)."""
+
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            n = self.requests
+            self.requests += 1
+        return n, self.delays[min(n, len(self.delays) - 1)]
+
+    def create(self, **kwargs):
+        n, delay = self._next()
+        time.sleep(delay)
+        return f"reply {n}"
+
+    async def acreate(self, **kwargs):
+        n, delay = self._next()
+        await asyncio.sleep(delay)
+        return f"reply {n}"
+
+
+@pytest.fixture
+def hedger():
+    caller = HedgedCaller(percentile=0.9, max_extra_load=1.0, min_samples=5, default_delay_s=0.05, max_workers=4)
+    yield caller
+    caller.shutdown()
+
+
+def test_percentile_of_recent_latencies():
+    tracker = LatencyTracker(window=10)
+    assert tracker.percentile("step", 0.9) is None
+    for latency in range(20):
+        tracker.record("step", latency)
+    # only the last 10 samples (10..19) are kept
+    assert tracker.count("step") == 10
+    assert tracker.percentile("step", 0.9) == 19
+    assert tracker.percentile("step", 0.5) == 15
+
+
+def test_hedge_delay_is_the_default_until_enough_samples(hedger):
+    for _ in range(4):
+        hedger.tracker.record("step", 1.0)
+    assert hedger.hedge_delay("step") == 0.05
+    for latency in (0.1, 0.2, 0.3, 0.4, 0.5, 0.6):
+        hedger.tracker.record("step", latency)
+    assert hedger.hedge_delay("step") == 1.0
+    assert hedger.hedge_delay("other step") == 0.05
+
+
+def test_a_fast_call_is_not_hedged(hedger):
+    client = _Client(0)
+    assert hedger.call("step", client.create, prompt="p") == "reply 0"
+    assert client.requests == 1
+    assert hedger.metrics()["hedged"] == 0
+    assert hedger.tracker.count("step") == 1
+
+
+def test_the_first_result_wins(hedger):
+    client = _Client(0.5, 0)
+    start = time.perf_counter()
+    assert hedger.call("step", client.create, prompt="p") == "reply 1"
+    assert time.perf_counter() - start < 0.4
+    time.sleep(0.6)  # the slow primary still finishes; its result is discarded
+    metrics = hedger.metrics()
+    assert (metrics["calls"], metrics["hedged"], metrics["hedge_wins"]) == (1, 1, 1)
+    assert 0.3 < metrics["latency_saved_s"] < 0.5
+
+
+def test_the_primary_wins_if_it_answers_before_the_hedge(hedger):
+    client = _Client(0.1, 0.5)
+    assert hedger.call("step", client.create, prompt="p") == "reply 0"
+    assert (hedger.metrics()["hedged"], hedger.metrics()["hedge_wins"]) == (1, 0)
+
+
+def test_hedges_are_capped_by_max_extra_load():
+    hedger = HedgedCaller(max_extra_load=0.25, default_delay_s=0.01, max_workers=4)
+    client = _Client(0.05)
+    for _ in range(8):
+        hedger.call("step", client.create, prompt="p")
+    hedger.shutdown()
+    assert hedger.metrics()["hedged"] == 2
+    assert client.requests == 10
+
+
+def test_hedge_delay_starts_when_the_primary_runs():
+    hedger = HedgedCaller(default_delay_s=0.2, max_extra_load=1.0, max_workers=1)
+    hedger._pool.submit(time.sleep, 0.3)  # the only worker is busy: the call queues behind it
+    client = _Client(0.1)
+    assert hedger.call("step", client.create, prompt="p") == "reply 0"
+    hedger.shutdown()
+    # queued 0.3s + ran 0.1s is past the delay, but the call itself wasn't slow
+    assert hedger.metrics()["hedged"] == 0
+    assert client.requests == 1
+
+
+def test_an_error_is_raised_when_no_request_succeeds(hedger):
+    def failing(**kwargs):
+        time.sleep(0.1)
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        hedger.call("step", failing, prompt="p")
+    assert hedger.metrics()["hedged"] == 1
+
+
+def test_async_first_result_wins(hedger):
+    client = _Client(0.5, 0)
+
+    async def run():
+        result = await hedger.acall("step", client.acreate, prompt="p")
+        await asyncio.sleep(0.6)
+        return result
+
+    assert asyncio.run(run()) == "reply 1"
+    metrics = hedger.metrics()
+    assert (metrics["hedged"], metrics["hedge_wins"]) == (1, 1)
+    assert metrics["latency_saved_s"] > 0.3
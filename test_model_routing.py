@@ -0,0 +1,185 @@
+# Tests for per-call model routing (src/model_routing.py)
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.causal_reasoning_engine import CausalReasoningEngine, parse_pairs_response_checked
+from src.model_routing import ModelRouter, call_cost
+
+SMALL, MEDIUM, LARGE = "llama-3.1-8b-instant", "mixtral-8x7b-32768", "llama-3.3-70b-versatile"
+
+
+def _run(router, replies, stage="extract_causal_pairs", input_tokens=100, validate=bool):
+    """router.run() with a fake call answering replies[model]; returns (result, models called)."""
+    called = []
+
+    def call(route):
+        called.append(route["model"])
+        return replies[route["model"]]
+
+    result = router.run("groq", stage, input_tokens, MEDIUM, call=call, parse=str.strip, validate=validate)
+    return result, called
+
+
+def _fail(router, model, times, stage="extract_causal_pairs"):
+    for _ in range(times):
+        router.record("groq", stage, MEDIUM, {"model": model, "reason": "table"}, False, "", 0.1, 100)
+
+
+# ---------- routing table ----------
+
+
+@pytest.mark.parametrize("provider, stage, input_tokens, model, thinking", [
+    ("groq", "extract_causal_pairs", 1500, SMALL, None),
+    ("groq", "extract_causal_pairs", 1501, MEDIUM, None),
+    ("groq", "identify_intervention_points", 10, MEDIUM, None),
+    ("groq", "unlisted_stage", 10, "baseline", None),
+    ("claude", "run_session", 100, "claude-3-5-haiku-20241022", False),
+    ("claude", "run_session", 1000, "claude-3-5-sonnet-20241022", True),
+])
+def test_the_first_matching_rule_picks_the_model(provider, stage, input_tokens, model, thinking):
+    route = ModelRouter().route(provider, stage, input_tokens, "baseline")
+    assert route == {"model": model, "thinking": thinking, "reason": "table"}
+
+
+def test_candidate_models_include_the_ladder_above_every_rule():
+    router = ModelRouter()
+    assert router.candidate_models("groq", "extract_causal_pairs", MEDIUM) == [SMALL, MEDIUM, LARGE]
+    assert router.candidate_models("groq", "unlisted_stage", MEDIUM) == [MEDIUM, LARGE]
+    assert router.next_model("groq", LARGE) is None
+    assert router.next_model("groq", "not-on-the-ladder") is None
+
+
+# ---------- escalation ----------
+
+
+def test_an_invalid_response_is_retried_one_rung_up():
+    router = ModelRouter()
+    result, called = _run(router, {SMALL: " ", MEDIUM: "pairs"})
+    assert (result, called) == ("pairs", [SMALL, MEDIUM])
+    assert [(d["model"], d["reason"], d["attempt"], d["valid"]) for d in router.decisions()] == [
+        (SMALL, "table", 0, False), (MEDIUM, "escalated", 1, True)
+    ]
+
+
+def test_escalation_stops_at_max_escalations():
+    router = ModelRouter(max_escalations=1)
+    result, called = _run(router, {SMALL: "", MEDIUM: "", LARGE: "pairs"})
+    # the last parsed result is returned even though it failed validation
+    assert (result, called) == ("", [SMALL, MEDIUM])
+
+
+def test_escalation_stops_at_the_top_of_the_ladder():
+    router = ModelRouter(max_escalations=5)
+    result, called = _run(router, {MEDIUM: "", LARGE: ""}, stage="unlisted_stage")
+    assert (result, called) == ("", [MEDIUM, LARGE])
+
+
+def test_async_run_escalates_the_same_way():
+    router = ModelRouter()
+    called = []
+
+    async def call(route):
+        called.append(route["model"])
+        return {SMALL: "", MEDIUM: "pairs"}[route["model"]]
+
+    result = asyncio.run(router.arun("groq", "extract_causal_pairs", 100, MEDIUM, call=call, parse=str.strip))
+    assert (result, called) == ("pairs", [SMALL, MEDIUM])
+    assert router.metrics()["escalations"] == 1
+
+
+# ---------- failure-rate skipping ----------
+
+
+def test_a_model_that_fails_too_often_is_skipped():
+    router = ModelRouter(max_failure_rate=0.2, min_samples=10, probe_every=0)
+    _fail(router, SMALL, 9)
+    assert router.failure_rate("groq", "extract_causal_pairs", SMALL) is None
+    assert router.route("groq", "extract_causal_pairs", 100, MEDIUM)["model"] == SMALL
+
+    _fail(router, SMALL, 1)
+    assert router.failure_rate("groq", "extract_causal_pairs", SMALL) == 1.0
+    assert router.route("groq", "extract_causal_pairs", 100, MEDIUM) == {
+        "model": MEDIUM, "thinking": None, "reason": "failure_rate>0.2"
+    }
+    # learned per stage
+    assert router.route("groq", "generate_implicit_causal_chains", 100, MEDIUM)["model"] == SMALL
+
+
+def test_a_skipped_model_is_probed_now_and_then():
+    router = ModelRouter(min_samples=1, probe_every=3)
+    _fail(router, SMALL, 1)
+    reasons = [router.route("groq", "extract_causal_pairs", 100, MEDIUM)["reason"] for _ in range(6)]
+    assert reasons == ["failure_rate>0.2", "failure_rate>0.2", "probe"] * 2
+
+
+def test_the_top_rung_is_used_even_when_it_fails():
+    router = ModelRouter(min_samples=1)
+    _fail(router, LARGE, 1, stage="unlisted_stage")
+    assert router.route("groq", "unlisted_stage", 100, LARGE)["model"] == LARGE
+
+
+# ---------- metrics ----------
+
+
+def test_metrics_account_for_cost_and_retries():
+    router = ModelRouter()
+    _run(router, {SMALL: "", MEDIUM: "pairs"})
+    _run(router, {SMALL: "pairs"})
+    metrics = router.metrics()
+    assert (metrics["calls"], metrics["escalations"], metrics["invalid_responses"]) == (3, 1, 1)
+    assert metrics["calls_by_model"] == {SMALL: 2, MEDIUM: 1}
+    assert metrics["calls_by_stage"] == {"extract_causal_pairs": {SMALL: 2, MEDIUM: 1}}
+
+    cost = sum(call_cost(d["model"], 100, d["output_tokens_est"]) for d in router.decisions())
+    # the retry has no baseline counterpart: only first attempts are compared
+    baseline = sum(call_cost(MEDIUM, 100, d["output_tokens_est"]) for d in router.decisions() if d["attempt"] == 0)
+    assert metrics["cost_usd"] == round(cost, 6)
+    assert metrics["baseline_cost_usd"] == round(baseline, 6)
+    assert metrics["cost_saved_usd"] == round(baseline - cost, 6)
+
+
+def test_reset_metrics_keeps_learned_failure_rates():
+    router = ModelRouter(min_samples=1)
+    _fail(router, SMALL, 1)
+    router.reset_metrics()
+    assert router.metrics()["calls"] == 0 and router.decisions() == []
+    assert router.failure_rate("groq", "extract_causal_pairs", SMALL) == 1.0
+
+
+# ---------- step 1 validation ----------
+
+
+@pytest.mark.parametrize("text, well_formed", [
+    ('{"pairs": [{"cause": "climate news", "effect": "anxiety"}]}', True),
+    ('{"pairs": []}', True),
+    ('Here you go: {"pairs": []}', True),
+    ('{"pairs": [{"cause": "climate news"}]}', False),  # no valid pair
+    ('{"cause": "climate news", "effect": "anxiety"}', False),
+    ("I couldn't find any.", False),
+])
+def test_pairs_response_is_well_formed(text, well_formed):
+    assert parse_pairs_response_checked(text)[1] is well_formed
+
+
+@pytest.mark.parametrize("first_reply, models", [
+    ('{"pairs": []}', [SMALL]),
+    ("no JSON here", [SMALL, MEDIUM]),
+])
+def test_only_malformed_pair_replies_escalate(first_reply, models):
+    replies = [first_reply, '{"pairs": []}']
+    sent = []
+
+    def create(**kwargs):
+        sent.append(kwargs["model"])
+        text = replies[len(sent) - 1]
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason="stop")
+
+    router = ModelRouter()
+    engine = CausalReasoningEngine("key", client=SimpleNamespace(messages=SimpleNamespace(create=create)),
+                                   router=router)
+    assert engine.extract_causal_pairs("We talked about the weather.") == {"pairs": []}
+    assert sent == models
+    assert router.metrics()["invalid_responses"] == len(models) - 1
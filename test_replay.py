@@ -0,0 +1,145 @@
+# Tests for the provider record/replay harness (src/replay.py)
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.async_agents import AsyncCausalReasoningEngine, AsyncClaudeTherapeuticAgent
+from src.causal_reasoning_engine import CausalReasoningEngine
+from src.claude_persistent_protocol import ClaudeTherapeuticAgent
+from src.replay import ReplayClient, ReplayMissError, install_recorder, install_replayer, load_fixtures
+
+TRANSCRIPT = "Every time I see climate news I feel anxious. Then the anxiety keeps me up at night."
+
+
+def _groq_reply(prompt: str) -> str:
+    if "extract ALL" in prompt:
+        return json.dumps({"pairs": [{"cause": "climate news", "effect": "anxiety"},
+                                     {"cause": "anxiety", "effect": "insomnia"}]})
+    if "generate complete" in prompt:
+        return "CHAINS:\n1. climate news → anxiety → insomnia"
+    if "evaluate confidence" in prompt:
+        return json.dumps({"chain_1": {
+            "chain": "climate news → anxiety → insomnia",
+            "links": [{"connection": "climate news→anxiety", "confidence": 0.9,
+                       "evidence": "Every time I see climate news I feel anxious"}],
+            "overall_confidence": 0.9,
+        }})
+    return json.dumps({"highest_roi_interventions": [{"link": "anxiety → insomnia", "roi_score": 0.9}]})
+
+
+def _response(text: str):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason="end_turn")
+
+
+def _groq_client():
+    return SimpleNamespace(messages=SimpleNamespace(
+        create=lambda **kwargs: _response(_groq_reply(kwargs["messages"][0]["content"]))
+    ))
+
+
+def _async_groq_client():
+    async def create(**kwargs):
+        await asyncio.sleep(0)
+        return _response(_groq_reply(kwargs["messages"][0]["content"]))
+    return SimpleNamespace(messages=SimpleNamespace(create=create))
+
+
+REPLY = 'Breathe with me.\n\n{"memory_updates": {"sessions.md": "box breathing"}}'
+
+
+class _Stream:
+    def __init__(self):
+        self.text_stream = [REPLY[i:i + 7] for i in range(0, len(REPLY), 7)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get_final_message(self):
+        return _response(REPLY)
+
+
+def _without_timestamps(result: dict) -> dict:
+    return {k: v for k, v in result.items() if k not in ("timestamp", "time_to_first_token_s", "total_time_s")}
+
+
+def test_engine_round_trip(tmp_path):
+    fixture = tmp_path / "groq.jsonl"
+    engine = CausalReasoningEngine("key", client=_groq_client())
+    install_recorder(engine, fixture)
+    live = engine.analyze_transcript_end_to_end(TRANSCRIPT)
+
+    assert [r["endpoint"] for r in load_fixtures(fixture)] == ["messages.create"] * 4
+    replayer = install_replayer(engine, fixture)
+    assert engine.analyze_transcript_end_to_end(TRANSCRIPT) == live
+    assert replayer.calls == 4
+
+
+def test_async_engine_round_trip(tmp_path):
+    fixture = tmp_path / "groq.jsonl"
+    engine = AsyncCausalReasoningEngine("key", client=_async_groq_client())
+    install_recorder(engine, fixture)
+    live = asyncio.run(engine.analyze_transcript_end_to_end(TRANSCRIPT))
+
+    assert install_replayer(engine, fixture).asynchronous
+    assert asyncio.run(engine.analyze_transcript_end_to_end(TRANSCRIPT)) == live
+
+
+def test_stream_round_trip(tmp_path):
+    fixture = tmp_path / "claude.jsonl"
+    agent = ClaudeTherapeuticAgent("key", "P1", memory_dir=str(tmp_path / "live"),
+                                   client=SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: _Stream())))
+    install_recorder(agent, fixture)
+    live = list(agent.run_session_stream(1, "I can't sleep"))
+    (record,) = load_fixtures(fixture)
+    assert record["endpoint"] == "messages.stream"
+    assert "".join(record["text_stream"]) == REPLY
+
+    replay = ClaudeTherapeuticAgent("key", "P1", memory_dir=str(tmp_path / "replay"),
+                                    client=ReplayClient(fixture))
+    replayed = list(replay.run_session_stream(1, "I can't sleep"))
+    assert [e for e in replayed if e["type"] != "done"] == [e for e in live if e["type"] != "done"]
+    assert _without_timestamps(replayed[-1]["result"]) == _without_timestamps(live[-1]["result"])
+
+
+def test_async_stream_replay(tmp_path):
+    fixture = tmp_path / "claude.jsonl"
+    agent = ClaudeTherapeuticAgent("key", "P1", memory_dir=str(tmp_path / "live"),
+                                   client=SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: _Stream())))
+    install_recorder(agent, fixture)
+    live = list(agent.run_session_stream(1, "I can't sleep"))
+
+    async def replay():
+        agent = AsyncClaudeTherapeuticAgent("key", "P1", memory_dir=str(tmp_path / "replay"),
+                                            client=ReplayClient(fixture, asynchronous=True))
+        return [event async for event in agent.run_session_stream(1, "I can't sleep")]
+
+    replayed = asyncio.run(replay())
+    assert [e for e in replayed if e["type"] != "done"] == [e for e in live if e["type"] != "done"]
+
+
+def test_unrecorded_request_misses(tmp_path):
+    fixture = tmp_path / "groq.jsonl"
+    engine = CausalReasoningEngine("key", client=_groq_client())
+    install_recorder(engine, fixture)
+    engine.extract_causal_pairs(TRANSCRIPT)
+
+    install_replayer(engine, fixture)
+    with pytest.raises(ReplayMissError):
+        engine.extract_causal_pairs("A different transcript.")
+
+
+def test_sequence_replay_loops(tmp_path):
+    fixture = tmp_path / "groq.jsonl"
+    engine = CausalReasoningEngine("key", client=_groq_client())
+    install_recorder(engine, fixture)
+    engine.extract_causal_pairs(TRANSCRIPT)
+
+    install_replayer(engine, fixture, match="sequence", loop=True)
+    pairs = [engine.extract_causal_pairs(f"transcript {i}") for i in range(3)]
+    assert pairs == [pairs[0]] * 3 and pairs[0]["pairs"]
@@ -0,0 +1,129 @@
+# Tests for the slotted result types and their columnar storage (src/results.py)
+
+import struct
+import zlib
+
+import pytest
+
+from src.results import (
+    MAGIC, MAGIC_V1, CausalAnalysis, CausalLink, Intervention, _COLUMNS, _GROUNDING_COLUMNS,
+    pack_analyses, unpack_analyses
+)
+
+ANALYSIS = {
+    "transcript_summary": "Climate news makes me anxious...",
+    "causal_pairs_found": 2,
+    "pairs": [
+        {"cause": "climate news", "effect": "anxiety", "explicit": True},
+        {"cause": "anxiety", "effect": "insomnia"},
+    ],
+    "causal_chains": ["climate news → anxiety → insomnia"],
+    "confidence_analysis": {
+        "chain_1": {
+            "chain": "climate news → anxiety → insomnia",
+            "links": [
+                {"connection": "climate news→anxiety", "confidence": 0.95, "evidence": "news makes me anxious",
+                 "grounding_score": 1.0, "grounding_match": "exact", "evidence_offsets": [8, 29]},
+                {"connection": "anxiety→insomnia", "confidence": None, "evidence": ""},
+            ],
+            "overall_confidence": 0.86,
+        }
+    },
+    "intervention_recommendations": {
+        "highest_roi_interventions": [
+            {"link": "anxiety → insomnia", "confidence": 0.9, "roi_score": 0.92, "modifiability": "high",
+             "leverage_blocked_effects": 3, "suggested_interventions": ["CBT for sleep", "peer support"],
+             "reasoning": "High confidence and modifiable"}
+        ]
+    },
+    "processing_model": "mixtral-8x7b-32768",
+    "reasoning_depth": "4-step mechanistic causal reasoning",
+    "token_budget": {"requests": 4, "decisions": []},
+}
+
+ERROR = {"error": "No causal pairs found"}
+
+
+def _normalized(analysis: dict) -> dict:
+    return CausalAnalysis.from_dict(analysis).to_dict()
+
+
+def _as_v1(blob: bytes) -> bytes:
+    """Rewrite a v2 blob in the v1 layout (no link grounding columns)."""
+    raw = zlib.decompress(blob[len(MAGIC):])
+    (n_strings,) = struct.unpack_from("<I", raw, 0)
+    lengths = struct.unpack_from(f"<{n_strings}I", raw, 4)
+    pos = 4 + 4 * n_strings + sum(lengths)
+    parts = [raw[:pos]]
+    for name, _ in _COLUMNS:
+        (size,) = struct.unpack_from("<I", raw, pos)
+        if name not in _GROUNDING_COLUMNS:
+            parts.append(raw[pos:pos + 4 + size])
+        pos += 4 + size
+    return MAGIC_V1 + zlib.compress(b"".join(parts))
+
+
+def test_round_trip_returns_the_dict_shape():
+    blob = pack_analyses([ANALYSIS, ERROR, ANALYSIS])
+    assert blob.startswith(MAGIC)
+    assert unpack_analyses(blob) == [_normalized(ANALYSIS), ERROR, _normalized(ANALYSIS)]
+
+
+def test_round_trip_keeps_grounding_and_missing_values():
+    link, ungrounded = unpack_analyses(pack_analyses([ANALYSIS]))[0]["confidence_analysis"]["chain_1"]["links"]
+    assert link["grounding_match"] == "exact"
+    assert link["evidence_offsets"] == [8, 29]
+    assert ungrounded == {"connection": "anxiety→insomnia", "confidence": None, "evidence": ""}
+
+
+def test_round_trip_typed():
+    objects = [CausalAnalysis.from_dict(ANALYSIS), CausalAnalysis.from_dict(ERROR)]
+    assert unpack_analyses(pack_analyses(objects), as_dicts=False) == objects
+
+
+def test_repeated_strings_are_stored_once():
+    one = len(pack_analyses([ANALYSIS]))
+    assert len(pack_analyses([ANALYSIS] * 100)) < 3 * one
+
+
+def test_empty_cohort():
+    assert unpack_analyses(pack_analyses([])) == []
+
+
+def test_reads_v1_files_as_ungrounded():
+    unpacked = unpack_analyses(_as_v1(pack_analyses([ANALYSIS])))[0]
+    links = unpacked["confidence_analysis"]["chain_1"]["links"]
+    assert all("grounding_score" not in link for link in links)
+    assert links[0]["evidence"] == "news makes me anxious"
+    assert unpacked["pairs"] == _normalized(ANALYSIS)["pairs"]
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        unpack_analyses(b"not a result file")
+
+
+
+@pytest.mark.parametrize("offsets", [[8], [8, 29, 40], "8-29", 5, [None, 29], ["a", 29], [29, 8], [-1, 4],
+                                     [0, 2 ** 40]])
+def test_malformed_evidence_offsets_are_dropped(offsets):
+    link = CausalLink.from_dict({"connection": "a→b", "confidence": 0.5, "evidence": "quote",
+                                 "grounding_score": 1.0, "grounding_match": "exact", "evidence_offsets": offsets})
+    assert (link.evidence_start, link.evidence_end) == (None, None)
+    assert link.to_dict()["evidence_offsets"] is None
+
+
+@pytest.mark.parametrize("leverage", [2 ** 31, -1, -5, "many", float("inf")])
+def test_out_of_range_leverage_is_dropped(leverage):
+    intervention = Intervention.from_dict({"link": "a → b", "leverage_blocked_effects": leverage})
+    assert intervention.leverage_blocked_effects is None
+
+
+def test_malformed_numbers_still_pack():
+    analysis = dict(ANALYSIS)
+    analysis["intervention_recommendations"] = {"highest_roi_interventions": [
+        {"link": "a → b", "leverage_blocked_effects": 10 ** 12},
+        {"link": "b → c", "leverage_blocked_effects": "2"},
+    ]}
+    ivs = unpack_analyses(pack_analyses([analysis]))[0]["intervention_recommendations"]["highest_roi_interventions"]
+    assert [iv["leverage_blocked_effects"] for iv in ivs] == [None, 2]
@@ -0,0 +1,115 @@
+# Tests for token estimation, max_tokens planning, trimming and chunking (src/token_budget.py)
+
+import contextvars
+
+import pytest
+
+from src.token_budget import TRIM_MARKER, ContextWindowExceeded, TokenBudget, estimate_tokens
+
+MODEL = "mixtral-8x7b-32768"
+
+
+def test_plan_sizes_output_from_the_expected_size():
+    budget = TokenBudget(MODEL)
+    assert budget.plan("small", "prompt", 40)["max_tokens"] == budget.min_output_tokens
+    assert budget.plan("medium", "prompt", 1000)["max_tokens"] == 1250
+    assert budget.plan("large", "prompt", 100000)["max_tokens"] == budget.max_output_tokens
+    assert [d["step"] for d in budget.summary()["decisions"]] == ["small", "medium", "large"]
+
+
+def test_plan_clamps_to_the_room_the_prompt_leaves():
+    budget = TokenBudget(MODEL, context_window=2000)
+    prompt = "word " * 1000
+    decision = budget.plan("step", prompt, 1000)
+    assert decision["max_tokens"] == budget.usable_window - estimate_tokens(prompt)
+    assert decision["fits"]
+
+
+def test_plan_refuses_a_prompt_that_leaves_no_room():
+    budget = TokenBudget(MODEL, context_window=2000)
+    with pytest.raises(ContextWindowExceeded):
+        budget.plan("step", "word " * 1700, 100)
+    assert budget.decisions[-1]["fits"] is False
+
+
+def test_plan_against_another_models_window():
+    budget = TokenBudget(MODEL)
+    prompt = "word " * 30000
+    with pytest.raises(ContextWindowExceeded):
+        budget.plan("step", prompt, 100)
+    assert budget.plan("step", prompt, 100, model="llama-3.3-70b-versatile")["model"] == "llama-3.3-70b-versatile"
+
+
+def test_plan_with_a_higher_floor():
+    budget = TokenBudget(MODEL, context_window=4000)
+    assert budget.plan("step", "prompt", 100, min_output_tokens=2256)["max_tokens"] == 2256
+    with pytest.raises(ContextWindowExceeded):
+        budget.plan("step", "word " * 1500, 100, min_output_tokens=2256)
+
+
+def test_plan_continuation_plans_the_rest_of_the_output():
+    budget = TokenBudget(MODEL, context_window=2000)
+    decision = budget.plan("step", "prompt", 800)
+    partial = "word " * 400
+    assert budget.plan_continuation(decision, partial, 800) == int((800 - estimate_tokens(partial)) * 1.25)
+    assert decision["continuations"] == 1
+    # prompt + partial reply leave less than min_output_tokens: can't continue
+    assert budget.plan_continuation(decision, "word " * 1500, 800) == 0
+    assert decision["continuations"] == 1
+
+
+def test_trim_keeps_the_beginning_and_end():
+    budget = TokenBudget(MODEL)
+    text = "BEGIN " + "middle " * 2000 + "END"
+    trimmed = budget.trim(text, 500)
+    assert estimate_tokens(trimmed) <= 500
+    assert trimmed.startswith("BEGIN") and trimmed.endswith("END") and TRIM_MARKER in trimmed
+    assert budget.trim("short", 500) == "short"
+
+
+@pytest.mark.parametrize("text", [
+    "".join(f"{i}: I can't sleep since the floods.\n" for i in range(300)),
+    "".join(f"line {i}\n" for i in range(10)) + "X" * 5000 + "\n" + "".join(f"tail {i}\n" for i in range(5)),
+    "".join(f"no newlines, only: punctuation #{i}! " for i in range(400)),
+], ids=["lines", "long-line", "one-line"])
+@pytest.mark.parametrize("max_tokens", [3, 50, 200])
+def test_chunks_fit_and_cover_the_text_in_order(text, max_tokens):
+    chunks = TokenBudget(MODEL).chunk(text, max_tokens, overlap_tokens=20)
+    assert all(estimate_tokens(chunk) <= max_tokens for chunk in chunks)
+    # Each chunk starts at or before the end of the previous one (overlap) and moves forward
+    end = 0
+    for chunk in chunks:
+        start = next(s for s in range(end, -1, -1) if text.startswith(chunk, s))
+        assert start + len(chunk) > end
+        end = start + len(chunk)
+    assert end == len(text)
+
+
+def test_a_long_line_is_cut_after_the_text_before_it():
+    lines = "".join(f"line {i}\n" for i in range(10))
+    text = lines + "X" * 5000 + "\n" + "tail\n"
+    chunks = TokenBudget(MODEL).chunk(text, 200)
+    assert chunks[0].startswith(lines) and chunks[0].endswith("X")
+    assert all(chunk in text for chunk in chunks)
+    assert "".join(chunks).count("line 0") == 1
+
+
+def test_short_text_is_one_chunk():
+    assert TokenBudget(MODEL).chunk("short", 100) == ["short"]
+
+
+def test_each_run_records_its_own_decisions():
+    budget = TokenBudget(MODEL)
+    budget.plan("outside a run", "prompt", 40)
+
+    def run(steps):
+        budget.reset()
+        for step in steps:
+            budget.plan(step, "prompt", 40)
+        return [d["step"] for d in budget.decisions]
+
+    # a run in another context (thread or task) doesn't see or touch this one's
+    assert contextvars.copy_context().run(run, ["a", "b"]) == ["a", "b"]
+    assert [d["step"] for d in budget.decisions] == ["outside a run"]
+    assert run(["c"]) == ["c"]
+    assert budget.summary()["requests"] == 1
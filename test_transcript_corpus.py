@@ -0,0 +1,103 @@
+# Tests for the packed transcript corpus (src/transcript_corpus.py)
+
+import json
+
+import pytest
+
+from src.transcript_corpus import CorpusFormatError, TranscriptCorpus, build_corpus
+
+TRANSCRIPTS = {
+    "001": "Climate news makes me anxious. I can't sleep.",
+    "002": "Wildfire smoke kept me inside all week. " * 40,
+    "003": "Je m'inquiète pour l'avenir — über alles. 🌍",
+    "004": "",
+    "005": "I joined a local action group and feel less alone. " * 10,
+}
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    source = tmp_path / "transcripts"
+    source.mkdir()
+    for participant_id, text in TRANSCRIPTS.items():
+        (source / f"participant_{participant_id}.txt").write_text(text, encoding="utf-8")
+    path = tmp_path / "corpus.cctc"
+    built = build_corpus(source, path)
+    assert built["transcripts"] == len(TRANSCRIPTS)
+    return path
+
+
+def test_lookup(corpus_path):
+    with TranscriptCorpus(corpus_path) as corpus:
+        assert len(corpus) == len(TRANSCRIPTS)
+        assert corpus.ids() == sorted(TRANSCRIPTS)
+        for participant_id, text in TRANSCRIPTS.items():
+            assert corpus[participant_id] == text
+            assert bytes(corpus.raw(participant_id)) == text.encode("utf-8")
+        assert "003" in corpus and "999" not in corpus
+        assert corpus.get("999") is None
+        with pytest.raises(KeyError):
+            corpus["999"]
+        assert dict(corpus.items(["005", "001"])) == {"005": TRANSCRIPTS["005"], "001": TRANSCRIPTS["001"]}
+
+
+def test_build_from_jsonl(tmp_path):
+    export = tmp_path / "export.jsonl"
+    export.write_text("".join(
+        json.dumps({"participant_id": participant_id, "transcript": text}) + "\n"
+        for participant_id, text in TRANSCRIPTS.items()
+    ), encoding="utf-8")
+    build_corpus(export, tmp_path / "corpus.cctc")
+    with TranscriptCorpus(tmp_path / "corpus.cctc") as corpus:
+        assert dict(corpus.items()) == TRANSCRIPTS
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8])
+def test_shards_are_disjoint_and_cover_every_id(corpus_path, count):
+    with TranscriptCorpus(corpus_path) as corpus:
+        shards = [corpus.shard(k, count) for k in range(count)]
+        assert [pid for shard in shards for pid in shard] == corpus.ids()
+        with pytest.raises(ValueError):
+            corpus.shard(count, count)
+
+
+def test_verify_reports_corrupt_transcripts(corpus_path):
+    with TranscriptCorpus(corpus_path) as corpus:
+        assert corpus.verify() == []
+        offset = corpus.entry("002")["offset"]
+    data = bytearray(corpus_path.read_bytes())
+    data[offset] ^= 0xFF
+    corpus_path.write_bytes(bytes(data))
+    with TranscriptCorpus(corpus_path) as corpus:
+        assert corpus.verify() == ["002"]
+
+
+def test_close_with_a_raw_view_alive(corpus_path):
+    corpus = TranscriptCorpus(corpus_path)
+    view = corpus.raw("001")
+    corpus.close()
+    assert corpus._file.closed
+    assert bytes(view) == TRANSCRIPTS["001"].encode("utf-8")
+    view.release()
+
+
+def test_rejects_non_corpus_files(tmp_path):
+    empty = tmp_path / "empty.cctc"
+    empty.write_bytes(b"")
+    other = tmp_path / "other.cctc"
+    other.write_bytes(b"x" * 100)
+    for path in (empty, other):
+        with pytest.raises(CorpusFormatError):
+            TranscriptCorpus(path)
+
+
+@pytest.mark.parametrize("participant_ids", [["001", "001"], ["x" * 70000]])
+def test_build_rejects_bad_ids_without_leaving_a_file(tmp_path, participant_ids):
+    export = tmp_path / "export.jsonl"
+    export.write_text("".join(
+        json.dumps({"participant_id": participant_id, "transcript": "text"}) + "\n"
+        for participant_id in participant_ids
+    ), encoding="utf-8")
+    with pytest.raises(ValueError):
+        build_corpus(export, tmp_path / "corpus.cctc")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["export.jsonl"]